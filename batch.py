@@ -0,0 +1,209 @@
+import argparse
+import glob
+import json
+import os
+import signal
+import sys
+import time
+from functools import partial
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from lexer import tokenize, LexerError
+from parser import Parser
+from semantic import SemanticAnalyzer
+from interme_code import IntermediateCodeGenerator
+from optimizer import Optimizer
+from cache import CompilationCache, MAX_BYTES, MISSING
+
+
+class CompileTimeout(BaseException):
+    """Raised from SIGALRM; not an Exception, so the parser's error recovery cannot swallow it"""
+
+
+def on_alarm(signum, frame):
+    raise CompileTimeout()
+
+
+def compile_source(source, cache=None):
+    """Result fields for one program run through the lexer, parser, analyzer, generator and optimizer.
+
+    With a cache, each stage's artifact is looked up before it is computed.
+    Only programs without errors get an optimized artifact, and only ones
+    that parse get semantic errors, so a warm run reads a couple of small
+    files per program and loads no AST unless a later stage is missing.
+    """
+    key = cache.key(source) if cache else None
+
+    def stage(name, compute):
+        return cache.stage(key, name, compute) if cache else compute()
+
+    if cache:
+        optimized = cache.get(key, 'optimized')
+        code = cache.get(key, 'tac') if optimized is not MISSING else MISSING
+        if code is not MISSING:
+            optimized, stats = optimized
+            return {'status': 'ok', 'instructions': len(code), 'optimized': optimized, 'stats': stats}
+        errors = cache.get(key, 'semantic errors')
+        if errors is not MISSING and errors:
+            return {'status': 'semantic error', 'errors': errors}
+
+    parsers = []
+
+    def parse():
+        if not parsers:
+            parsers.append(Parser(stage('tokens', lambda: tokenize(source)), build_parse_tree=False))
+            parsers[0].parse()
+        return parsers[0]
+
+    try:
+        errors = stage('syntax errors', lambda: parse().errors)
+        if errors:
+            return {'status': 'syntax error', 'errors': errors}
+        ast = stage('ast', lambda: parse().ast)
+    except LexerError as e:
+        return {'status': 'lexer error', 'errors': [{'message': str(e)}]}
+
+    analyzers = []
+
+    def analyze():
+        # The generator needs the types analysis puts on the tree, even when its errors are cached
+        if not analyzers:
+            analyzers.append(SemanticAnalyzer())
+            analyzers[0].analyze(ast)
+        return analyzers[0].errors
+
+    def generate():
+        analyze()
+        return IntermediateCodeGenerator().generate(ast)
+
+    errors = stage('semantic errors', analyze)
+    if errors:
+        return {'status': 'semantic error', 'errors': errors}
+    code = stage('tac', generate)
+
+    def optimize():
+        optimizer = Optimizer(list(code))
+        return optimizer.optimize(), dict(optimizer.stats)
+    optimized, stats = stage('optimized', optimize)
+    return {'status': 'ok', 'instructions': len(code), 'optimized': optimized, 'stats': stats}
+
+
+caches = {}    # (directory, max_bytes) -> this process's CompilationCache
+
+
+def open_cache(directory, max_bytes=MAX_BYTES):
+    """One CompilationCache per directory and process, so the compiler is fingerprinted once"""
+    if (directory, max_bytes) not in caches:
+        caches[directory, max_bytes] = CompilationCache(directory, max_bytes)
+    return caches[directory, max_bytes]
+
+
+def compile_file(path, timeout=None, emit=False, cache_dir=None, cache_bytes=MAX_BYTES):
+    """JSON-ready result for one file; never raises, so one bad file cannot stop a batch.
+
+    The timeout is enforced with SIGALRM where the platform has it, which
+    interrupts the worker's compilation without losing the worker.
+    """
+    start = time.perf_counter()
+    result = {'file': path, 'lines': 0}
+    alarm = timeout and hasattr(signal, 'setitimer')
+    try:
+        with open(path, encoding='utf-8') as f:
+            source = f.read()
+        result['lines'] = source.count('\n') + 1
+        if alarm:
+            previous = signal.signal(signal.SIGALRM, on_alarm)
+            signal.setitimer(signal.ITIMER_REAL, timeout)
+        try:
+            result.update(compile_source(source, cache_dir and open_cache(cache_dir, cache_bytes)))
+        finally:
+            if alarm:
+                signal.setitimer(signal.ITIMER_REAL, 0)
+                signal.signal(signal.SIGALRM, previous)
+    except CompileTimeout:
+        result.update(status='timeout', errors=[{'message': f"Compilation took over {timeout}s"}])
+    except RecursionError:
+        result.update(status='error', errors=[{'message': "Program nested too deeply"}])
+    except Exception as e:
+        result.update(status='error', errors=[{'message': f"{type(e).__name__}: {e}"}])
+    if 'optimized' in result:
+        optimized = result.pop('optimized')
+        result['optimized instructions'] = len(optimized)
+        if emit:
+            result['tac'] = optimized
+    result['seconds'] = round(time.perf_counter() - start, 6)
+    return result
+
+
+def expand(patterns):
+    """Files named by paths, globs or directories (every .txt below them), each once and in order"""
+    paths = []
+    seen = set()
+    for pattern in patterns:
+        if os.path.isdir(pattern):
+            matches = sorted(glob.glob(os.path.join(pattern, '**', '*.txt'), recursive=True))
+        else:
+            matches = sorted(glob.glob(pattern, recursive=True)) or [pattern]
+        for path in matches:
+            if path not in seen:
+                seen.add(path)
+                paths.append(path)
+    return paths
+
+
+def compile_files(paths, jobs=None, timeout=None, emit=False, cache_dir=None, cache_bytes=MAX_BYTES):
+    """Yield each file's result in input order as soon as it and those before it are done.
+
+    With one job everything runs in this process; otherwise files go to a
+    worker pool in chunks, so the per-task overhead is paid once per chunk
+    rather than once per file.
+    """
+    compile_one = partial(compile_file, timeout=timeout, emit=emit,
+                          cache_dir=cache_dir, cache_bytes=cache_bytes)
+    jobs = jobs or os.cpu_count() or 1
+    if jobs == 1 or len(paths) == 1:
+        yield from map(compile_one, paths)
+        return
+    chunksize = max(1, min(64, len(paths) // (jobs * 4)))
+    with ProcessPoolExecutor(jobs) as pool:
+        yield from pool.map(compile_one, paths, chunksize=chunksize)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Compile HindiPython programs headlessly, printing one JSON result per line")
+    parser.add_argument('files', nargs='+', help="source files, globs or directories of .txt files")
+    parser.add_argument('-j', '--jobs', type=int, default=None,
+                        help="worker processes (default: one per CPU)")
+    parser.add_argument('--timeout', type=float, default=None,
+                        help="seconds allowed per file before it is reported as a timeout")
+    parser.add_argument('--emit', action='store_true', help="include the optimized TAC in each result")
+    parser.add_argument('--cache', metavar='DIR', default=None,
+                        help="directory of stage artifacts shared across runs and workers")
+    parser.add_argument('--cache-size', type=float, default=MAX_BYTES / 2 ** 20,
+                        help="megabytes the cache may hold before the least recently used go")
+    args = parser.parse_args(argv)
+    cache_bytes = int(args.cache_size * 2 ** 20)
+
+    paths = expand(args.files)
+    statuses = Counter()
+    lines = 0
+    start = time.perf_counter()
+    for result in compile_files(paths, args.jobs, args.timeout, args.emit, args.cache, cache_bytes):
+        statuses[result['status']] += 1
+        lines += result['lines']
+        print(json.dumps(result, ensure_ascii=False), flush=True)
+    elapsed = time.perf_counter() - start
+    if args.cache:
+        open_cache(args.cache, cache_bytes).evict()
+
+    summary = {'files': len(paths), 'lines': lines, 'seconds': round(elapsed, 3),
+               'files/s': round(len(paths) / elapsed, 1) if elapsed else None,
+               'lines/s': round(lines / elapsed, 1) if elapsed else None,
+               'statuses': dict(statuses)}
+    print(json.dumps({'summary': summary}), file=sys.stderr)
+    return 0 if statuses['ok'] == len(paths) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
\ No newline at end of file
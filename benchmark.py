@@ -0,0 +1,542 @@
+import os
+import sys
+import time
+import tracemalloc
+from lexer import tokenize, iter_tokens
+from parser import Parser
+from interme_code import IntermediateCodeGenerator
+from executor import Executor
+from output import generate_output_from_ast
+from vm import BytecodeCompiler, VirtualMachine
+from translator import PythonTranslator
+from incremental import IncrementalDocument
+from my_ast import ASTNode, ColumnarAST, write_ast
+from semantic import SemanticAnalyzer
+from tac import ThreeAddressCodeGenerator
+from optimizer import Optimizer, PASSES
+from peephole import RULES
+from target import TargetCodeGenerator
+from regalloc import allocate_registers
+from machine import Assembler, TargetMachine
+
+
+def compile_to_tac(source_code):
+    _, ast = Parser(tokenize(source_code), build_parse_tree=False).parse()
+    SemanticAnalyzer().analyze(ast)  # Typed opcodes need the expression types
+    return IntermediateCodeGenerator().generate(ast)
+
+
+def timed(func, *args, repeat=3):
+    """Best wall-clock time of several runs, and the last result"""
+    best = None
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func(*args)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def loop_program(filler_lines, iterations=1000):
+    """A JabTak loop placed after a block of straight-line statements"""
+    lines = [f"Rakho Ginti v{i} = {i};" for i in range(filler_lines)]
+    lines.append("Rakho Ginti i = 0;")
+    lines.append("Rakho Ginti total = 0;")
+    lines.append(f"JabTak (i < {iterations}) {{")
+    lines.append("    total = total + i * 2;")
+    lines.append("    i = i + 1;")
+    lines.append("}")
+    lines.append("Dikhao total;")
+    return "\n".join(lines)
+
+
+def fib_program(globals_count, n=15):
+    """Recursive Fibonacci with a number of unrelated live globals"""
+    lines = [f"Rakho Ginti g{i} = {i};" for i in range(globals_count)]
+    lines.append("Kaam fib(Ginti n) Wapis Ginti {")
+    lines.append("    Agar (n < 2) { Wapis n; }")
+    lines.append("    Wapis fib(n - 1) + fib(n - 2);")
+    lines.append("}")
+    lines.append(f"Dikhao fib({n});")
+    return "\n".join(lines)
+
+
+def bench_executor_loops():
+    print("Executor: load and run time should grow linearly with program size")
+    print(f"{'lines':>8} {'TAC':>8} {'load (ms)':>10} {'run (ms)':>10}")
+    for size in [10, 1000, 5000, 10000]:
+        tac = compile_to_tac(loop_program(size))
+        executor = Executor()
+        load_time, _ = timed(executor.load, tac)
+
+        def run():
+            executor.reset_state()
+            executor.load(tac)
+            start = time.perf_counter()
+            executor.run()
+            return time.perf_counter() - start
+
+        run_time = min(run() for _ in range(3))
+        print(f"{size:>8} {len(tac):>8} {load_time * 1000:>10.2f} {run_time * 1000:>10.2f}")
+
+
+def bench_vm_throughput():
+    print("Register VM vs Executor on arithmetic loops")
+    print(f"{'iterations':>10} {'executor (ms)':>14} {'vm (ms)':>10} {'speedup':>8}")
+    for iterations in [1000, 10000, 100000]:
+        tac = compile_to_tac(loop_program(0, iterations))
+        executor_time, expected = timed(Executor().execute_tac, tac)
+        machine = VirtualMachine(BytecodeCompiler().compile(tac))
+        vm_time, result = timed(machine.run)
+        assert result == expected
+        print(f"{iterations:>10} {executor_time * 1000:>14.2f} {vm_time * 1000:>10.2f} "
+              f"{executor_time / vm_time:>7.1f}x")
+
+
+def bench_calls():
+    print("Call cost vs number of live globals (Executor frames vs OutputGenerator copies)")
+    print(f"{'globals':>8} {'executor (ms)':>14} {'tree walker (ms)':>17}")
+    for globals_count in [0, 100, 1000]:
+        source = fib_program(globals_count)
+        tac = compile_to_tac(source)
+        executor_time, result = timed(Executor().execute_tac, tac)
+        _, ast = Parser(tokenize(source)).parse()
+        walker_time, expected = timed(generate_output_from_ast, ast)
+        assert result == expected
+        print(f"{globals_count:>8} {executor_time * 1000:>14.2f} {walker_time * 1000:>17.2f}")
+
+
+def nested_loop_program(size):
+    return "\n".join([
+        "Rakho Ginti i = 0;",
+        "Rakho Ginti total = 0;",
+        f"JabTak (i < {size}) {{",
+        "    Rakho Ginti j = 0;",
+        f"    JabTak (j < {size}) {{",
+        "        Agar (j % 3 == 0) { total = total + j; } Warna { total = total - 1; }",
+        "        j = j + 1;",
+        "    }",
+        "    i = i + 1;",
+        "}",
+        "Dikhao total;",
+    ])
+
+
+def bench_ast_evaluators():
+    print("Tree-walking OutputGenerator vs closure-compiled evaluator")
+    print(f"{'program':>16} {'tree (ms)':>10} {'compiled (ms)':>14} {'speedup':>8}")
+    programs = [
+        ("nested loops 100", nested_loop_program(100)),
+        ("nested loops 300", nested_loop_program(300)),
+        ("fib(18)", fib_program(0, 18)),
+        ("fib(18) + 500 g", fib_program(500, 18)),
+    ]
+    for name, source in programs:
+        _, ast = Parser(tokenize(source)).parse()
+        tree_time, expected = timed(generate_output_from_ast, ast)
+        compiled_time, result = timed(generate_output_from_ast, ast, True)
+        assert result == expected
+        print(f"{name:>16} {tree_time * 1000:>10.2f} {compiled_time * 1000:>14.2f} "
+              f"{tree_time / compiled_time:>7.1f}x")
+
+
+def bench_frames():
+    print("Tree walker on fib(16): time and peak memory vs number of globals")
+    print(f"{'globals':>8} {'time (ms)':>10} {'peak (KiB)':>11}")
+    for globals_count in [0, 500, 2000]:
+        _, ast = Parser(tokenize(fib_program(globals_count, 16))).parse()
+        generate_output_from_ast(ast)  # Resolve slots outside the measurement
+        elapsed, _ = timed(generate_output_from_ast, ast)
+        tracemalloc.start()
+        generate_output_from_ast(ast)
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        print(f"{globals_count:>8} {elapsed * 1000:>10.2f} {peak / 1024:>11.1f}")
+
+
+def bench_translator():
+    print("TAC runtimes on arithmetic loops and recursion")
+    print(f"{'program':>14} {'executor (ms)':>14} {'vm (ms)':>8} {'python (ms)':>12}")
+    programs = [
+        ("loop 10000", loop_program(0, 10000)),
+        ("loop 100000", loop_program(0, 100000)),
+        ("fib(18)", fib_program(0, 18)),
+    ]
+    for name, source in programs:
+        tac = compile_to_tac(source)
+        executor_time, expected = timed(Executor().execute_tac, tac)
+        machine = VirtualMachine(BytecodeCompiler().compile(tac))
+        vm_time, vm_result = timed(machine.run)
+        PythonTranslator.compile(tac)  # Cached: later runs skip translation
+        python_time, result = timed(PythonTranslator.run, tac)
+        assert result == vm_result == expected
+        print(f"{name:>14} {executor_time * 1000:>14.2f} {vm_time * 1000:>8.2f} "
+              f"{python_time * 1000:>12.2f}")
+
+
+def measure(func, *args):
+    """Wall-clock time of one call, and its peak traced memory from a second call"""
+    start = time.perf_counter()
+    func(*args)
+    elapsed = time.perf_counter() - start
+    tracemalloc.start()
+    func(*args)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, peak
+
+
+def bench_lexer():
+    source = loop_program(40000)
+    print(f"Token list vs streaming tokens on a {len(source) / 1e6:.1f} MB source")
+    print(f"{'stage':>24} {'time (ms)':>10} {'peak (MiB)':>11}")
+
+    def drain(tokens):
+        for _ in tokens:
+            pass
+
+    rows = [
+        ("tokenize (list)", lambda: tokenize(source)),
+        ("iter_tokens (stream)", lambda: drain(iter_tokens(source))),
+        ("parse from list", lambda: Parser(tokenize(source)).parse()),
+        ("parse from stream", lambda: Parser(iter_tokens(source)).parse()),
+    ]
+    for name, func in rows:
+        elapsed, peak = measure(func)
+        print(f"{name:>24} {elapsed * 1000:>10.1f} {peak / 2 ** 20:>11.1f}")
+
+
+def bench_parse_modes():
+    print("Parser: building the parse tree alongside the AST versus AST only")
+    tokens = tokenize(loop_program(40000))
+    print(f"{'mode':>24} {'time (ms)':>10} {'peak (MiB)':>11} {'tokens/s':>11}")
+    for name, build in [("parse tree + AST", True), ("AST only", False)]:
+        elapsed, peak = measure(lambda: Parser(tokens, build_parse_tree=build).parse())
+        print(f"{name:>24} {elapsed * 1000:>10.1f} {peak / 2 ** 20:>11.1f} {len(tokens) / elapsed:>11.0f}")
+
+
+class DictASTNode:
+    """The previous __dict__-backed node layout, kept here for comparison"""
+    def __init__(self, node_type, children=None, value=None, line=None, column=None):
+        self.type = node_type
+        self.children = children or []
+        self.value = value
+        self.line = line
+        self.column = column
+        self.address = None
+        self.frame_size = None
+
+
+def declarations_ast(node, count):
+    """Program of count 'Rakho Ginti vN = N + 1;' declarations, six nodes each"""
+    program = node('Program')
+    for i in range(count):
+        program.children.append(node('Declaration', [
+            node('Type', value='Ginti', line=i, column=6),
+            node('Variable', value=f"v{i}", line=i, column=12),
+            node('BinaryOp', [node('Number', value=str(i), line=i, column=17),
+                              node('Number', value='1', line=i, column=21)],
+                 value='+', line=i, column=19),
+        ], line=i, column=0))
+    return program
+
+
+def bench_ast_memory():
+    print("AST memory: bytes per node for a 1M-node program")
+    count = 1000000 // 6
+    nodes = count * 6 + 1
+    print(f"{'layout':>24} {'build (ms)':>11} {'MiB':>8} {'bytes/node':>11}")
+
+    def traced(func, *args):
+        start = time.perf_counter()
+        result = func(*args)
+        elapsed = time.perf_counter() - start
+        del result
+        tracemalloc.start()
+        result = func(*args)
+        size, _ = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        return elapsed, size, result
+
+    for name, node in [("__dict__ nodes", DictASTNode), ("__slots__ kind classes", ASTNode)]:
+        elapsed, size, tree = traced(declarations_ast, node, count)
+        print(f"{name:>24} {elapsed * 1000:>11.0f} {size / 2 ** 20:>8.1f} {size / nodes:>11.1f}")
+    elapsed, size, columns = traced(ColumnarAST.encode, tree)
+    print(f"{'columnar arrays':>24} {elapsed * 1000:>11.0f} {size / 2 ** 20:>8.1f} {size / nodes:>11.1f}")
+
+
+def nested_if_program(depth):
+    return "\n".join(["Rakho Ginti x = 0;"] + ["Agar (x < 1) {"] * depth + ["x = x + 1;"]
+                     + ["}"] * depth + ["Dikhao x;"])
+
+
+def bench_deep_programs():
+    print("Deep programs: every pass runs on an explicit stack")
+    print(f"{'program':>22} {'parse':>8} {'semantic':>9} {'TAC':>8} {'evaluate':>9} {'dump':>8}  (ms)")
+    programs = [
+        (f"{depth} nested Agar", nested_if_program(depth)) for depth in [1000, 5000]
+    ] + [
+        (f"{terms}-term sum", "Rakho Ginti y = " + " + ".join(["1"] * terms) + ";\nDikhao y;")
+        for terms in [10000, 50000]
+    ]
+    for name, source in programs:
+        tokens = tokenize(source)
+        parse_time, (_, ast) = timed(lambda: Parser(tokens, build_parse_tree=False).parse(), repeat=1)
+        semantic_time, _ = timed(lambda: SemanticAnalyzer().analyze(ast), repeat=1)
+        tac_time, _ = timed(lambda: ThreeAddressCodeGenerator().generate(ast), repeat=1)
+        evaluate_time, _ = timed(generate_output_from_ast, ast, repeat=1)
+        with open(os.devnull, "w") as sink:
+            dump_time, _ = timed(write_ast, ast, sink, repeat=1)
+        print(f"{name:>22} {parse_time * 1000:>8.0f} {semantic_time * 1000:>9.0f} {tac_time * 1000:>8.0f} "
+              f"{evaluate_time * 1000:>9.0f} {dump_time * 1000:>8.0f}")
+
+
+def scoped_program(depth):
+    """Nested Agar blocks that each declare a local and read the global x"""
+    return "\n".join(["Rakho Ginti x = 0;"]
+                     + [f"Agar (x < 1) {{ Rakho Ginti v{level} = x + x;" for level in range(depth)]
+                     + ["}"] * depth + ["Dikhao x;"])
+
+
+def bench_symbol_table():
+    print("Symbol table: semantic analysis of nested scopes, with and without the retained scope tree")
+    print(f"{'depth':>8} {'lookups':>8} {'time (ms)':>10} {'peak KiB':>9} {'retained (ms)':>14} {'peak KiB':>9}")
+    for depth in [100, 1000, 5000]:
+        _, ast = Parser(tokenize(scoped_program(depth)), build_parse_tree=False).parse()
+        plain_time, plain_peak = measure(lambda: SemanticAnalyzer().analyze(ast))
+        kept_time, kept_peak = measure(lambda: SemanticAnalyzer(retain_scopes=True).analyze(ast))
+        print(f"{depth:>8} {depth * 3:>8} {plain_time * 1000:>10.1f} {plain_peak / 1024:>9.0f} "
+              f"{kept_time * 1000:>14.1f} {kept_peak / 1024:>9.0f}")
+
+
+def bench_incremental():
+    print("Incremental front end: a one-line edit re-lexes one line and re-parses one statement")
+    source = loop_program(50000)
+    lines = source.split("\n")
+    full_time, _ = timed(lambda: Parser(tokenize(source)).parse(), repeat=1)
+    document = IncrementalDocument(source)
+    print(f"{'edit':>28} {'update (ms)':>12} {'+ AST (ms)':>11}")
+    print(f"{'full tokenize + parse':>28} {full_time * 1000:>12.1f}")
+
+    middle = len(lines) // 2
+    edits = [
+        ("change a line", middle, f"Rakho Ginti v{middle} = 7;"),
+        ("change it back", middle, lines[middle]),
+        ("insert a line at the top", 0, None),
+    ]
+    for name, index, text in edits:
+        if text is None:
+            lines.insert(index, "Rakho Ginti w = 1;")
+        else:
+            lines[index] = text
+        code = "\n".join(lines)
+        update_time, _ = timed(document.update_text, code, repeat=1)
+        ast_time, _ = timed(lambda: document.ast, repeat=1)
+        print(f"{name:>28} {update_time * 1000:>12.2f} {ast_time * 1000:>11.2f}")
+
+
+def guarded_loop_program(iterations):
+    """A loop with a switched-off debug branch and repeated subexpressions"""
+    return "\n".join([
+        "Rakho HaaNaa debug = Ghalat;",
+        "Rakho Ginti scale = 2;",
+        "Kaam area(Ginti w, Ginti h) Wapis Ginti {",
+        "    Wapis (w * h + 1) * (h * w + 1);",
+        "}",
+        "Rakho Ginti i = 0;",
+        "Rakho Ginti total = 0;",
+        f"JabTak (i < {iterations}) {{",
+        "    Agar (debug) { Dikhao i; scale = scale + 1; }",
+        "    total = total + (i * 3 + 1) * scale + (i * 3 + 1);",
+        "    i = i + 1;",
+        "}",
+        "Dikhao total + area(i, scale);",
+    ])
+
+
+def bench_optimizer():
+    print("Optimizer: instructions the Executor runs with no passes, the dataflow passes, and all passes")
+    print(f"{'program':>22} {'TAC':>7} {'optimize (ms)':>14} {'executed':>10} {'dataflow':>10} "
+          f"{'all':>10} {'run (ms)':>9} {'opt run':>8}")
+    programs = [(f"loop, {size} filler", loop_program(size, iterations=10000)) for size in [10, 1000, 10000]]
+    programs.append(("nested loop 100", nested_loop_program(100)))
+    programs.append(("guarded loop", guarded_loop_program(10000)))
+    programs.append(("fib(18)", fib_program(10, n=18)))
+    for name, source in programs:
+        tac = compile_to_tac(source)
+        optimize_time, optimized = timed(lambda: Optimizer(list(tac)).optimize(), repeat=1)
+        dataflow = Optimizer(list(tac), passes=['propagate', 'copies', 'dead_code']).optimize()
+        counts = []
+        times = []
+        outputs = set()
+        for code in (tac, dataflow, optimized):
+            executor = Executor()
+            run_time, output = timed(executor.execute_tac, code, repeat=1)
+            counts.append(executor.executed)
+            times.append(run_time)
+            outputs.add(output)
+        assert len(outputs) == 1
+        print(f"{name:>22} {len(tac):>7} {optimize_time * 1000:>14.1f} {counts[0]:>10} {counts[1]:>10} "
+              f"{counts[2]:>10} {times[0] * 1000:>9.1f} {times[2] * 1000:>8.1f}")
+
+
+def invariant_loop_program(iterations):
+    """A loop recomputing a product of values fixed before it starts"""
+    return "\n".join([
+        "Kaam weighted(Ginti a, Ginti b, Ginti n) Wapis Ginti {",
+        "    Rakho Ginti i = 0;",
+        "    Rakho Ginti total = 0;",
+        "    JabTak (i < n) {",
+        "        total = total + (a * b + 1) * i + i * 4;",
+        "        i = i + 1;",
+        "    }",
+        "    Wapis total;",
+        "}",
+        f"Dikhao weighted(3, 5, {iterations});",
+    ])
+
+
+def bench_loops():
+    print("Loop optimizations: Executor instructions per loop iteration")
+    print(f"{'program':>16} {'unoptimized':>12} {'no loop pass':>13} {'all passes':>11} {'loop pass does':>40}")
+    programs = [("loop", lambda n: loop_program(10, iterations=n)),
+                ("guarded loop", guarded_loop_program),
+                ("invariant loop", invariant_loop_program)]
+    for name, program in programs:
+        per_iteration = []
+        for passes in ([], [name for name in PASSES if name != 'loops'], None):
+            counts = []
+            for iterations in (1000, 2000):
+                optimizer = Optimizer(compile_to_tac(program(iterations)), passes)
+                executor = Executor()
+                executor.execute_tac(optimizer.optimize())
+                counts.append(executor.executed)
+            per_iteration.append((counts[1] - counts[0]) / 1000)
+        done = ", ".join(f"{count} {what}" for what, count in sorted(optimizer.stats.items()))
+        print(f"{name:>16} {per_iteration[0]:>12.2f} {per_iteration[1]:>13.2f} {per_iteration[2]:>11.2f} {done:>40}")
+
+
+def mixed_program(groups):
+    """Groups of copies, arithmetic and an Agar/Warna, with a short loop in every tenth; about 28 TAC lines each"""
+    lines = ["Rakho Ginti total = 0;", "Rakho Ginti seed = 7;"]
+    for k in range(groups):
+        lines += [f"Rakho Ginti a{k} = seed + {k};",
+                  f"Rakho Ginti b{k} = a{k};",
+                  f"Rakho Ginti c{k} = b{k} + a{k} * 2;",
+                  f"Agar (c{k} > {k}) {{ c{k} = c{k} - 1; }} Warna {{ c{k} = b{k}; }}"]
+        if k % 10 == 0:
+            lines += [f"Rakho Ginti j{k} = 0;",
+                      f"JabTak (j{k} < 3) {{ total = total + j{k} * 4; j{k} = j{k} + 1; }}"]
+        lines += [f"total = total + c{k};", "seed = seed + total % 3;"]
+    lines.append("Dikhao total;")
+    return "\n".join(lines)
+
+
+def bench_passes():
+    print("Optimizer passes on large programs: microseconds per TAC instruction should stay flat")
+    print(f"{'TAC':>8} " + " ".join(f"{name:>11}" for name in PASSES) + f" {'all':>6}")
+    for groups in [900, 1800, 3600]:
+        tac = compile_to_tac(mixed_program(groups))
+        row = []
+        for passes in [[name] for name in PASSES] + [None]:
+            elapsed, _ = timed(lambda: Optimizer(list(tac), passes).optimize(), repeat=1)
+            row.append(elapsed * 1e6 / len(tac))
+        print(f"{len(tac):>8} " + " ".join(f"{cost:>11.1f}" for cost in row[:-1]) + f" {row[-1]:>6.1f}")
+
+
+def bench_peephole():
+    print("Peephole rules: Executor instructions with no passes, the peephole alone, every other pass, and all passes")
+    print(f"{'program':>16} {'unoptimized':>12} {'peephole':>10} {'no peephole':>12} {'all':>10}  rule hits")
+    programs = [("loop", loop_program(10, iterations=10000)),
+                ("nested loop 100", nested_loop_program(100)),
+                ("guarded loop", guarded_loop_program(10000)),
+                ("fib(18)", fib_program(10, n=18))]
+    for name, source in programs:
+        tac = compile_to_tac(source)
+        counts = []
+        outputs = set()
+        for passes in ([], ['peephole'], [name for name in PASSES if name != 'peephole'], None):
+            optimizer = Optimizer(list(tac), passes)
+            executor = Executor()
+            outputs.add(executor.execute_tac(optimizer.optimize()))
+            counts.append(executor.executed)
+        assert len(outputs) == 1
+        hits = ", ".join(f"{count} {rule}" for rule, count in sorted(optimizer.stats.items())
+                         if rule in RULES)
+        print(f"{name:>16} {counts[0]:>12} {counts[1]:>10} {counts[2]:>12} {counts[3]:>10}  {hits}")
+
+
+def bench_registers():
+    print("Register allocation: emitted target instructions / memory accesses / spilled temps by register file size")
+    sizes = [0, 2, 4, 8]
+    print(f"{'program':>16} " + " ".join(f"{f'{size} registers':>15}" for size in sizes))
+    programs = [("loop", loop_program(10, iterations=100)),
+                ("nested loop", nested_loop_program(10)),
+                ("guarded loop", guarded_loop_program(100)),
+                ("fib(18)", fib_program(10, n=18)),
+                ("mixed", mixed_program(20))]
+    for name, source in programs:
+        optimized = Optimizer(compile_to_tac(source)).optimize()
+        expected = Executor().execute_tac(optimized)
+        row = []
+        for size in sizes:
+            registers = [f"r{i}" for i in range(size)]
+            generator = TargetCodeGenerator(registers)
+            generator.generate(optimized)
+            stats = generator.stats
+            row.append(f"{stats['instructions']}/{stats['memory accesses']}/{stats['spilled']}")
+            assert Executor(registers).execute_tac(allocate_registers(optimized, registers)) == expected
+        print(f"{name:>16} " + " ".join(f"{cell:>15}" for cell in row))
+
+
+def bench_machine():
+    print("Target machine: time / instructions executed / cycles of the target code, beside the Executor")
+    sizes = [0, 4]
+    print(f"{'program':>16} {'executor':>20} " + " ".join(f"{f'{size} registers':>28}" for size in sizes))
+    programs = [("loop", loop_program(10, iterations=10000)),
+                ("nested loop 100", nested_loop_program(100)),
+                ("guarded loop", guarded_loop_program(10000)),
+                ("fib(18)", fib_program(10, n=18)),
+                ("mixed", mixed_program(20))]
+    for name, source in programs:
+        optimized = Optimizer(compile_to_tac(source)).optimize()
+        executor = Executor()
+        elapsed, expected = timed(executor.execute_tac, optimized, repeat=1)
+        row = [f"{elapsed * 1000:.1f}ms/{executor.executed}"]
+        for size in sizes:
+            target = TargetCodeGenerator([f"r{i}" for i in range(size)]).generate(optimized)
+            program = Assembler().assemble(target)
+            machine = TargetMachine()
+            elapsed, output = timed(machine.run, program, repeat=1)
+            assert output == expected
+            row.append(f"{elapsed * 1000:.1f}ms/{machine.executed}/{machine.cycles}")
+        print(f"{name:>16} {row[0]:>20} " + " ".join(f"{cell:>28}" for cell in row[1:]))
+
+
+BENCHMARKS = {
+    'executor': bench_executor_loops,
+    'vm': bench_vm_throughput,
+    'calls': bench_calls,
+    'evaluators': bench_ast_evaluators,
+    'frames': bench_frames,
+    'translator': bench_translator,
+    'lexer': bench_lexer,
+    'incremental': bench_incremental,
+    'parser': bench_parse_modes,
+    'ast': bench_ast_memory,
+    'deep': bench_deep_programs,
+    'symbols': bench_symbol_table,
+    'optimizer': bench_optimizer,
+    'loops': bench_loops,
+    'passes': bench_passes,
+    'peephole': bench_peephole,
+    'registers': bench_registers,
+    'machine': bench_machine,
+}
+
+if __name__ == "__main__":
+    names = sys.argv[1:] or list(BENCHMARKS)
+    for name in names:
+        BENCHMARKS[name]()
+        print()
\ No newline at end of file
@@ -0,0 +1,136 @@
+import hashlib
+import os
+import pickle
+import tempfile
+from serialize import dumps_ast, dumps_tac, loads
+
+# Modules whose code decides what each stage produces; editing any of them invalidates the cache
+COMPILER_FILES = ('lexer.py', 'parser.py', 'my_ast.py', 'traversal.py', 'semantic.py', 'interme_code.py',
+                  'opcodes.py', 'executor.py', 'vm.py', 'optimizer.py', 'cfg.py', 'ssa.py', 'loops.py',
+                  'peephole.py', 'serialize.py')
+STAGES = ('tokens', 'syntax errors', 'ast', 'semantic errors', 'tac', 'optimized')
+# Stages stored in the binary artifact format rather than pickled: (encode, decode a loaded view)
+BINARY_STAGES = {'ast': (dumps_ast, lambda view: view.decode()), 'tac': (dumps_tac, lambda view: view)}
+MAX_BYTES = 256 * 1024 * 1024
+MISSING = object()
+
+
+def compiler_fingerprint(directory=os.path.dirname(os.path.abspath(__file__))):
+    """sha256 over the compiler's own source files"""
+    digest = hashlib.sha256()
+    for name in COMPILER_FILES:
+        digest.update(name.encode('utf-8'))
+        with open(os.path.join(directory, name), 'rb') as f:
+            digest.update(f.read())
+    return digest.hexdigest()
+
+
+class CompilationCache:
+    """Content-addressed store of stage artifacts, shared through a directory.
+
+    An artifact lives at <directory>/<key[:2]>/<key>.<stage>, where the key
+    hashes the source text together with the compiler fingerprint. Writes go
+    to a temporary file that is renamed into place, so concurrent processes
+    only ever see whole artifacts. A hit touches the file, and eviction
+    removes the least recently used files until the directory fits in
+    max_bytes. ASTs and TAC use the binary artifact format, so deep trees
+    need no recursion and a TAC hit decodes only the lines that are read.
+    """
+
+    def __init__(self, directory, max_bytes=MAX_BYTES, fingerprint=None):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.fingerprint = fingerprint or compiler_fingerprint()
+        self.written = 0    # Bytes this instance stored since it last evicted
+        self.stats = {'hits': 0, 'misses': 0, 'writes': 0, 'evicted': 0}
+        os.makedirs(directory, exist_ok=True)
+
+    def key(self, source):
+        digest = hashlib.sha256(self.fingerprint.encode('ascii'))
+        digest.update(source.encode('utf-8'))
+        return digest.hexdigest()
+
+    def path(self, key, stage):
+        return os.path.join(self.directory, key[:2], f"{key}.{stage.replace(' ', '_')}")
+
+    def get(self, key, stage):
+        """The stored artifact, or MISSING"""
+        path = self.path(key, stage)
+        try:
+            with open(path, 'rb') as f:
+                data = f.read()
+            if stage in BINARY_STAGES:
+                value = BINARY_STAGES[stage][1](loads(data))
+            else:
+                value = pickle.loads(data)
+        except Exception:
+            # Unreadable or corrupt; pickle and the artifact views raise more than their own error types
+            self.stats['misses'] += 1
+            return MISSING
+        try:
+            os.utime(path)
+        except OSError:
+            pass    # Evicted by another process since the read
+        self.stats['hits'] += 1
+        return value
+
+    def put(self, key, stage, value):
+        if stage in BINARY_STAGES:
+            data = BINARY_STAGES[stage][0](value)
+        else:
+            data = pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+        path = self.path(key, stage)
+        folder = os.path.dirname(path)
+        os.makedirs(folder, exist_ok=True)
+        descriptor, temporary = tempfile.mkstemp(dir=folder, prefix='.tmp-')
+        try:
+            with os.fdopen(descriptor, 'wb') as f:
+                f.write(data)
+            os.replace(temporary, path)
+        except BaseException:
+            try:
+                os.unlink(temporary)
+            except OSError:
+                pass
+            raise
+        self.stats['writes'] += 1
+        self.written += len(data)
+        if self.written > self.max_bytes // 8:
+            self.evict()
+
+    def stage(self, key, stage, compute):
+        """Stored artifact for key, computing and storing it on a miss"""
+        value = self.get(key, stage)
+        if value is MISSING:
+            value = compute()
+            self.put(key, stage, value)
+        return value
+
+    def evict(self):
+        """Delete least recently used artifacts until the cache fits in max_bytes"""
+        self.written = 0
+        entries = []
+        total = 0
+        for folder in os.scandir(self.directory):
+            if not folder.is_dir():
+                continue
+            for entry in os.scandir(folder.path):
+                if entry.name.startswith('.tmp-'):
+                    continue    # Another process is still writing it
+                try:
+                    info = entry.stat()
+                except OSError:
+                    continue
+                entries.append((info.st_mtime, info.st_size, entry.path))
+                total += info.st_size
+        entries.sort()
+        for _, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            try:
+                os.unlink(path)
+                self.stats['evicted'] += 1
+            except OSError:
+                pass
+            total -= size
+        return total
\ No newline at end of file
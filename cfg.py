@@ -0,0 +1,357 @@
+from collections import deque
+from executor import BINARY_OPS, split_instruction, written_name, is_literal
+from opcodes import BRANCH_OPS, CONDITIONAL_JUMPS
+from vm import TEMP_PATTERN
+
+# Instructions that end a basic block
+BRANCHES = {'GOTO', 'RETURN'} | CONDITIONAL_JUMPS
+# Instructions whose last part is the label they may jump to
+JUMPS = {'GOTO'} | CONDITIONAL_JUMPS
+
+
+def read_positions(parts):
+    """Indexes of the operands an instruction reads"""
+    op = parts[0]
+    if op in BINARY_OPS or op in BRANCH_OPS:
+        return (1, 2)
+    if op in ('STORE', 'PRINT', 'IF_FALSE', 'ARG', 'RETURN') and len(parts) > 1:
+        return (1,)
+    return ()
+
+
+def write_position(parts):
+    """Index of the name an instruction assigns, or None"""
+    op = parts[0]
+    if op in ('STORE', 'LOAD', 'CALL') and len(parts) > 2:
+        return 2
+    if op in BINARY_OPS:
+        return 3
+    return None
+
+
+def read_names(parts):
+    """The variables and temps an instruction reads"""
+    return [parts[i] for i in read_positions(parts) if not is_literal(parts[i])]
+
+
+class BasicBlock:
+    """A maximal run of split TAC instructions entered only at the top and left only at the bottom"""
+    def __init__(self, index):
+        self.index = index
+        self.instructions = []
+        self.successors = []
+        self.predecessors = []
+
+    def __repr__(self):
+        return f"BasicBlock({self.index}, {len(self.instructions)} instructions)"
+
+
+class ControlFlowGraph:
+    """Basic blocks and edges of one code region: the main program or one function body.
+
+    A function graph keeps its FUNC_BEGIN, PARAM and GLOBAL lines in header
+    and its FUNC_END in footer; blocks[0] is the entry.
+    """
+
+    def __init__(self, instructions, name=None, header=(), footer=()):
+        self.name = name
+        self.header = list(header)
+        self.footer = list(footer)
+        self.blocks = []
+        self.labels = {}    # Label name -> block it starts
+        self.idom = None    # Immediate dominators, computed on demand
+        self.spans = None   # (preorder, last preorder below) of each block in the dominator tree
+        self.build(instructions)
+
+    def build(self, instructions):
+        block = self.new_block()
+        for parts in instructions:
+            # A label opens a new block; the entry stays a block with no predecessors
+            if parts[0] == 'LABEL' and (block.instructions or block.index == 0):
+                block = self.new_block()
+            block.instructions.append(parts)
+            if parts[0] in BRANCHES:
+                block = self.new_block()
+        if not block.instructions and len(self.blocks) > 1:
+            self.blocks.pop()
+        self.link()
+
+    def link(self):
+        """(Re)compute labels and edges from the blocks' instructions"""
+        self.idom = None
+        self.spans = None
+        self.labels = {}
+        for index, block in enumerate(self.blocks):
+            block.index = index
+            block.successors = []
+            block.predecessors = []
+            if block.instructions and block.instructions[0][0] == 'LABEL':
+                self.labels[block.instructions[0][1]] = block
+
+        for index, block in enumerate(self.blocks):
+            last = block.instructions[-1] if block.instructions else None
+            following = self.blocks[index + 1] if index + 1 < len(self.blocks) else None
+            if last is None or last[0] not in BRANCHES:
+                targets = [following]
+            elif last[0] == 'GOTO':
+                targets = [self.label_block(last[1])]
+            elif last[0] in CONDITIONAL_JUMPS:
+                targets = [following, self.label_block(last[-1])]
+            else:
+                targets = []    # RETURN leaves the region
+            for target in targets:
+                if target is not None and target not in block.successors:
+                    block.successors.append(target)
+                    target.predecessors.append(block)
+
+    def remove_blocks(self, dead):
+        """Drop the given blocks (never the entry) and relink the rest"""
+        self.blocks = [block for block in self.blocks if block.index == 0 or block not in dead]
+        self.link()
+
+    def new_block(self):
+        self.blocks.append(BasicBlock(len(self.blocks)))
+        return self.blocks[-1]
+
+    def label_block(self, label):
+        if label not in self.labels:
+            raise ValueError(f"Label {label} not found")
+        return self.labels[label]
+
+    def instructions(self):
+        """The region as split instructions again, header and footer included"""
+        parts = list(self.header)
+        for block in self.blocks:
+            parts.extend(block.instructions)
+        parts.extend(self.footer)
+        return parts
+
+    def variables(self):
+        """Named (non-temp) variables the region reads or writes"""
+        names = set()
+        for block in self.blocks:
+            for parts in block.instructions:
+                written = written_name(parts)
+                for name in read_names(parts) + ([written] if written else []):
+                    if not TEMP_PATTERN.match(name):
+                        names.add(name)
+        return names
+
+    def shared_variables(self):
+        """Named variables a call may read or assign: all of them but a function's own parameters"""
+        params = {parts[1] for parts in self.header if parts[0] == 'PARAM'}
+        return self.variables() - params
+
+    def reverse_postorder(self):
+        """Blocks reachable from the entry, each before its successors except along back edges"""
+        order = []
+        visited = {0}
+        stack = [(self.blocks[0], iter(self.blocks[0].successors))]
+        while stack:
+            block, successors = stack[-1]
+            for successor in successors:
+                if successor.index not in visited:
+                    visited.add(successor.index)
+                    stack.append((successor, iter(successor.successors)))
+                    break
+            else:
+                stack.pop()
+                order.append(block)
+        order.reverse()
+        return order
+
+    def dominators(self):
+        """Immediate dominator index of every block, None if unreachable (the entry is its own).
+
+        Uses Cooper, Harvey and Kennedy's iteration over reverse postorder.
+        """
+        order = self.reverse_postorder()
+        position = {block.index: number for number, block in enumerate(order)}
+        idom = [None] * len(self.blocks)
+        idom[0] = 0
+
+        def intersect(a, b):
+            while a != b:
+                while position[a] > position[b]:
+                    a = idom[a]
+                while position[b] > position[a]:
+                    b = idom[b]
+            return a
+
+        changed = True
+        while changed:
+            changed = False
+            for block in order[1:]:
+                new_idom = None
+                for predecessor in block.predecessors:
+                    if idom[predecessor.index] is not None:
+                        new_idom = (predecessor.index if new_idom is None
+                                    else intersect(predecessor.index, new_idom))
+                if idom[block.index] != new_idom:
+                    idom[block.index] = new_idom
+                    changed = True
+        self.idom = idom
+        self.spans = None
+        return idom
+
+    def dominator_tree(self):
+        """Children of every block in the dominator tree, by index"""
+        idom = self.idom if self.idom is not None else self.dominators()
+        children = [[] for _ in self.blocks]
+        for index, parent in enumerate(idom):
+            if parent is not None and index != 0:
+                children[parent].append(index)
+        return children
+
+    def dominance_frontiers(self):
+        """Blocks where each block's dominance ends, by index, for placing SSA phis"""
+        idom = self.idom if self.idom is not None else self.dominators()
+        frontiers = [set() for _ in self.blocks]
+        for block in self.blocks:
+            predecessors = [p for p in block.predecessors if idom[p.index] is not None]
+            if idom[block.index] is None or len(predecessors) < 2:
+                continue
+            for predecessor in predecessors:
+                runner = predecessor.index
+                while runner != idom[block.index]:
+                    frontiers[runner].add(block.index)
+                    runner = idom[runner]
+        return frontiers
+
+    def dominates(self, a, b):
+        """Whether block index a dominates block index b, in constant time once the tree is numbered"""
+        if self.spans is None:
+            self.number_dominator_tree()
+        if self.spans[a] is None or self.spans[b] is None:
+            return False
+        first, last = self.spans[a]
+        return first <= self.spans[b][0] <= last
+
+    def number_dominator_tree(self):
+        """Number the dominator tree in preorder; a dominates b when b's number falls in a's span"""
+        children = self.dominator_tree()
+        spans = [None] * len(self.blocks)
+        count = 0
+        stack = [(0, False)]
+        while stack:
+            index, done = stack.pop()
+            if done:
+                spans[index] = (spans[index], count - 1)
+                continue
+            spans[index] = count
+            count += 1
+            stack.append((index, True))
+            stack.extend((child, False) for child in children[index])
+        self.spans = spans
+
+
+def solve(graph, transfer, meet, boundary, forward=True, initial=None):
+    """Iterate a dataflow problem over graph to its fixed point with a worklist.
+
+    transfer(block, fact) is the fact on the far side of block; meet(facts)
+    combines the facts flowing in from several neighbours. Entry (or, going
+    backward, exit) blocks start from boundary. A block none of whose
+    neighbours has a fact yet starts from initial, or is skipped while
+    initial is None. Returns (inputs, outputs) indexed by block, where an
+    input is the fact before the block in the direction of the analysis.
+    """
+    blocks = graph.blocks
+    inputs = [None] * len(blocks)
+    outputs = [None] * len(blocks)
+    order = graph.reverse_postorder()
+    reached = {block.index for block in order}
+    order += [block for block in blocks if block.index not in reached]
+    if not forward:
+        order.reverse()
+
+    worklist = deque(order)
+    queued = {block.index for block in order}
+    while worklist:
+        block = worklist.popleft()
+        queued.discard(block.index)
+
+        neighbours = block.predecessors if forward else block.successors
+        facts = [outputs[n.index] for n in neighbours if outputs[n.index] is not None]
+        at_boundary = block.index == 0 if forward else not block.successors
+        if at_boundary:
+            facts.append(boundary)
+        if facts:
+            fact = meet(facts)
+        elif initial is not None:
+            fact = initial
+        else:
+            continue
+
+        inputs[block.index] = fact
+        result = transfer(block, fact)
+        if result != outputs[block.index]:
+            outputs[block.index] = result
+            for n in (block.successors if forward else block.predecessors):
+                if n.index not in queued:
+                    queued.add(n.index)
+                    worklist.append(n)
+    return inputs, outputs
+
+
+def union(sets):
+    """Meet for may-problems such as liveness"""
+    result = set()
+    for names in sets:
+        result |= names
+    return result
+
+
+def live_variables(graph, shared):
+    """Names live on entry to each block, by index"""
+    return liveness(graph, shared)[1]
+
+
+def liveness(graph, shared):
+    """Names live at the end and at the start of each block: (live out, live in) by index.
+
+    A CALL reads every name in shared, and so do a function's exits.
+    """
+    def transfer(block, live):
+        live = set(live)
+        for parts in reversed(block.instructions):
+            written = written_name(parts)
+            if written is not None:
+                live.discard(written)
+            live.update(read_names(parts))
+            if parts[0] == 'CALL':
+                live.update(shared)
+        return live
+
+    exits = set(shared) if graph.name is not None else set()
+    return solve(graph, transfer, union, exits, forward=False, initial=set())
+
+
+def build_graphs(tac_code):
+    """One ControlFlowGraph per function, in order of definition, then one for the main program"""
+    lines = tac_code.split('\n') if isinstance(tac_code, str) else tac_code
+    main = []
+    graphs = []
+    stack = []  # Open functions: (header, body)
+    for line in lines:
+        if not line.strip():
+            continue
+        parts = split_instruction(line)
+        op = parts[0]
+        if op == 'FUNC_BEGIN':
+            stack.append(([parts], []))
+        elif op == 'FUNC_END':
+            header, body = stack.pop()
+            graphs.append(ControlFlowGraph(body, header[0][1], header, [parts]))
+        elif stack and op in ('PARAM', 'GLOBAL'):
+            stack[-1][0].append(parts)
+        elif stack:
+            stack[-1][1].append(parts)
+        else:
+            main.append(parts)
+    graphs.append(ControlFlowGraph(main))
+    return graphs
+
+
+def flatten(graphs):
+    """TAC lines for a list of graphs"""
+    return [' '.join(parts) for graph in graphs for parts in graph.instructions()]
\ No newline at end of file
@@ -1,83 +1,399 @@
+from opcodes import TYPED_OPS, BRANCH_OPS
+
+# Opcodes of the decoded instruction array
+(OP_NOP, OP_STORE, OP_LOAD, OP_ADD, OP_SUB, OP_MUL, OP_DIV, OP_MOD,
+ OP_AND, OP_OR, OP_EQ, OP_NEQ, OP_LT, OP_LTE, OP_GT, OP_GTE,
+ OP_PRINT, OP_IF_FALSE, OP_GOTO, OP_CALL, OP_RETURN,
+ OP_IF_NOT_EQ, OP_IF_NOT_NEQ, OP_IF_NOT_LT, OP_IF_NOT_LTE, OP_IF_NOT_GT, OP_IF_NOT_GTE) = range(27)
+
+OPCODES = {
+    'STORE': OP_STORE, 'LOAD': OP_LOAD,
+    'ADD': OP_ADD, 'SUB': OP_SUB, 'MUL': OP_MUL, 'DIV': OP_DIV, 'MOD': OP_MOD,
+    'AND': OP_AND, 'OR': OP_OR,
+    'EQ': OP_EQ, 'NEQ': OP_NEQ, 'LT': OP_LT, 'LTE': OP_LTE, 'GT': OP_GT, 'GTE': OP_GTE,
+    'PRINT': OP_PRINT, 'IF_FALSE': OP_IF_FALSE, 'GOTO': OP_GOTO,
+}
+# Python already dispatches on operand types, so a typed opcode runs its untyped handler
+OPCODES.update({typed: OPCODES[op] for typed, op in TYPED_OPS.items()})
+BRANCH_OPCODES = {'EQ': OP_IF_NOT_EQ, 'NEQ': OP_IF_NOT_NEQ, 'LT': OP_IF_NOT_LT,
+                  'LTE': OP_IF_NOT_LTE, 'GT': OP_IF_NOT_GT, 'GTE': OP_IF_NOT_GTE}
+OPCODES.update({branch: BRANCH_OPCODES[TYPED_OPS.get(op, op)] for branch, op in BRANCH_OPS.items()})
+
+BINARY_OPS = {'ADD', 'SUB', 'MUL', 'DIV', 'MOD', 'AND', 'OR',
+              'EQ', 'NEQ', 'LT', 'LTE', 'GT', 'GTE'} | set(TYPED_OPS)
+
+MAX_CALL_DEPTH = 10000
+
+# Names the Executor keeps in its registers dict rather than in memory
+REGISTERS = ('r0', 'r1', 'r2', 'r3')
+
+
+def split_instruction(line):
+    """Split a TAC line into its parts, keeping quoted literals whole"""
+    line = line.strip()
+    if "'" not in line:
+        return line.split()
+    # LOAD '<string literal>' dest - the literal may contain spaces
+    op, rest = line.split(None, 1)
+    literal, dest = rest.rsplit(None, 1)
+    return [op, literal, dest]
+
+
+BOOLEAN_LITERALS = {'Sahi': True, 'Ghalat': False}
+
+
+def parse_literal(text):
+    """Convert a LOAD literal to its runtime value"""
+    if text.startswith("'"):
+        return text.strip("'")
+    if text in BOOLEAN_LITERALS:
+        return BOOLEAN_LITERALS[text]
+    return float(text) if '.' in text else int(text)
+
+
+def is_literal(operand):
+    return operand[0].isdigit() or (operand[0] == '-' and operand[1:2].isdigit())
+
+
+def written_name(parts):
+    """The name an instruction assigns to, if any"""
+    op = parts[0]
+    if op in ('STORE', 'LOAD', 'CALL') and len(parts) > 2:
+        return parts[2]
+    if op in BINARY_OPS:
+        return parts[3]
+    return None
+
+
+class FunctionInfo:
+    """Frame layout and entry point of one FUNC_BEGIN ... FUNC_END region"""
+    def __init__(self, name):
+        self.name = name
+        self.entry = None        # Index of the first instruction of the body
+        self.end = None          # Index of the instruction after FUNC_END
+        self.params = []         # Parameter slots, in declaration order
+        self.slot_names = {}     # Local name -> slot
+        self.template = []       # Initial contents of a frame
+        self.written = set()     # Names assigned in the body are local...
+        self.shared = set()      # ...unless declared GLOBAL
+        self.global_reads = []   # (local slot, global slot) copied in on each call
+        self.global_writes = []  # (local slot, global slot) of GLOBAL names, copied out again
+        self.free_frames = []    # Frames kept for reuse by later calls
+
+    def new_frame(self):
+        if self.free_frames:
+            frame = self.free_frames.pop()
+            frame[:] = self.template
+            return frame
+        return self.template[:]
+
+
 class Executor:
-    def __init__(self):
+    def __init__(self, registers=REGISTERS):
         self.memory = {}
         self.output = []
         self.pc = 0  # Program counter
-        self.registers = {'r0': 0, 'r1': 0, 'r2': 0, 'r3': 0}
-    
+        self.register_names = tuple(registers)
+        self.registers = dict.fromkeys(self.register_names, 0)
+        self.code = []      # Decoded instructions: (opcode, a, b, c)
+        self.source = []    # Original instruction text, for error messages
+        self.labels = {}    # Label name -> index of the instruction after it
+        self.slot_names = {}
+        self.slots = []
+        self.functions = {}  # Function name -> FunctionInfo
+        self.function = None  # Function being decoded, None at top level
+        self.pending_args = []
+        self.max_depth = MAX_CALL_DEPTH
+        self.executed = 0   # Instructions dispatched since the last reset, LABELs and ARGs included
+
+    def load(self, tac_code):
+        """Decode TAC once into the instruction array and label table"""
+        lines = tac_code.split('\n') if isinstance(tac_code, str) else tac_code
+        self.source = [line.strip() for line in lines if line.strip()]
+        self.slot_names = {}
+        self.slots = []
+        self.labels = {}
+        self.functions = {}
+
+        decoded = []
+        regions = [None] * len(self.source)
+        open_functions = []
+        for index, instruction in enumerate(self.source):
+            parts = split_instruction(instruction)
+            op = parts[0]
+            if op == "LABEL":
+                self.labels[parts[1]] = index + 1
+            elif op == "FUNC_BEGIN":
+                open_functions.append(FunctionInfo(parts[1]))
+                self.functions[parts[1]] = open_functions[-1]
+            elif op == "FUNC_END":
+                open_functions.pop().end = index + 1
+            elif open_functions:
+                function = open_functions[-1]
+                if op == "PARAM":
+                    function.written.add(parts[1])
+                elif op == "GLOBAL":
+                    function.shared.add(parts[1])
+                else:
+                    if function.entry is None:
+                        function.entry = index
+                    name = written_name(parts)
+                    if name:
+                        function.written.add(name)
+            regions[index] = open_functions[-1] if open_functions else None
+            decoded.append(parts)
+
+        self.code = []
+        for parts, function in zip(decoded, regions):
+            self.function = function
+            self.code.append(self.decode(parts))
+        self.function = None
+
+        for function in self.functions.values():
+            if function.entry is None:
+                function.entry = function.end - 1
+
+    def decode(self, parts):
+        """Turn one split instruction into an (opcode, a, b, c) tuple"""
+        op = parts[0]
+        opcode = OPCODES.get(op, OP_NOP)
+
+        if op == "LOAD":
+            return (opcode, parse_literal(parts[1]), self.slot(parts[2]), None)
+        elif op == "STORE":
+            return (opcode, self.slot(parts[1]), self.slot(parts[2]), None)
+        elif op in BINARY_OPS:
+            return (opcode, self.slot(parts[1]), self.slot(parts[2]), self.slot(parts[3]))
+        elif op == "PRINT":
+            return (opcode, self.slot(parts[1]), None, None)
+        elif op == "IF_FALSE":
+            return (opcode, self.slot(parts[1]), self.resolve_label(parts[3]), None)
+        elif op in BRANCH_OPS:
+            return (opcode, self.slot(parts[1]), self.slot(parts[2]), self.resolve_label(parts[4]))
+        elif op == "GOTO":
+            return (opcode, self.resolve_label(parts[1]), None, None)
+        elif op == "FUNC_BEGIN":
+            # Straight-line execution jumps over function bodies
+            return (OP_GOTO, self.functions[parts[1]].end, None, None)
+        elif op == "PARAM":
+            self.function.params.append(self.slot(parts[1]))
+        elif op == "ARG":
+            self.pending_args.append(self.slot(parts[1]))
+        elif op == "CALL":
+            return self.decode_call(parts)
+        elif op == "RETURN":
+            return (OP_RETURN, self.slot(parts[1]) if len(parts) > 1 else None, None, None)
+        elif op == "FUNC_END":
+            return (OP_RETURN, None, None, None)
+
+        # LABEL is resolved at load time; PARAM and ARG are bound by CALL, GLOBAL by slot
+        return (OP_NOP, None, None, None)
+
+    def decode_call(self, parts):
+        function = self.functions.get(parts[1])
+        if function is None:
+            raise ValueError(f"Function {parts[1]} not found")
+        args = tuple(self.pending_args)
+        self.pending_args = []
+        if len(args) != len(function.params):
+            raise ValueError(f"Function {function.name} expects {len(function.params)} "
+                             f"arguments but got {len(args)}")
+        dest = self.slot(parts[2]) if len(parts) > 2 else None
+        return (OP_CALL, function, dest, args)
+
+    def slot(self, identifier):
+        """Get the slot index for a name, register or numeric literal.
+
+        Inside a function, names the body never assigns or declares GLOBAL
+        are globals; they get a local slot that CALL fills from the global
+        one. GLOBAL names are also copied back out whenever control leaves
+        the function, so callees and the caller see what it assigned.
+        """
+        function = self.function
+        if function is not None:
+            index = function.slot_names.get(identifier)
+            if index is None:
+                index = len(function.template)
+                function.slot_names[identifier] = index
+                if is_literal(identifier):
+                    function.template.append(parse_literal(identifier))
+                else:
+                    function.template.append(identifier)
+                    if identifier not in function.written or identifier in function.shared:
+                        glob = self.global_slot(identifier)
+                        function.global_reads.append((index, glob))
+                        if identifier in function.shared:
+                            function.global_writes.append((index, glob))
+            return index
+        return self.global_slot(identifier)
+
+    def global_slot(self, identifier):
+        index = self.slot_names.get(identifier)
+        if index is None:
+            index = len(self.slots)
+            self.slot_names[identifier] = index
+            if identifier in self.registers:
+                self.slots.append(self.registers[identifier])
+            elif is_literal(identifier):
+                self.slots.append(parse_literal(identifier))
+            else:
+                self.slots.append(identifier)
+        return index
+
+    def resolve_label(self, label):
+        if label not in self.labels:
+            raise ValueError(f"Label {label} not found")
+        return self.labels[label]
+
     def execute_tac(self, tac_code):
         """Execute Three Address Code directly"""
         self.reset_state()
-        instructions = [line.strip() for line in tac_code.split('\n') if line.strip()]
-        
-        while self.pc < len(instructions):
-            instruction = instructions[self.pc]
-            self.pc += 1
-            
-            try:
-                parts = instruction.split()
-                op = parts[0]
-                
-                if op == "STORE":
-                    src = self.get_value(parts[1])
-                    dest = parts[2]
-                    self.memory[dest] = src
-                    
-                elif op == "LOAD":
-                    value = parts[1].strip("'") if parts[1].startswith("'") else int(parts[1])
-                    dest = parts[2]
-                    self.memory[dest] = value
-                    
-                elif op == "ADD":
-                    src1 = self.get_value(parts[1])
-                    src2 = self.get_value(parts[2])
-                    dest = parts[3]
-                    self.memory[dest] = src1 + src2
-                    
-                elif op == "SUB":
-                    src1 = self.get_value(parts[1])
-                    src2 = self.get_value(parts[2])
-                    dest = parts[3]
-                    self.memory[dest] = src1 - src2
-                    
-                elif op == "PRINT":
-                    value = self.get_value(parts[1])
-                    self.output.append(str(value))
-                    
-                elif op == "IF_FALSE":
-                    condition = self.get_value(parts[1])
-                    if not condition:
-                        self.pc = self.find_label(instructions, parts[3])
-                        
-                elif op == "GOTO":
-                    self.pc = self.find_label(instructions, parts[1])
-                    
-                elif op == "LABEL":
-                    continue  # Handled during jumps
-                    
-                # Add other operations as needed...
-                
-            except Exception as e:
-                raise RuntimeError(f"Error executing '{instruction}': {str(e)}")
-        
+        self.load(tac_code)
+        self.run()
         return '\n'.join(self.output)
-    
+
+    def run(self):
+        """Dispatch loop over the decoded instruction array"""
+        code = self.code
+        slots = global_slots = self.slots
+        output = self.output
+        end = len(code)
+        pc = self.pc
+        call_stack = []  # (return pc, caller frame, result slot, callee)
+        max_depth = self.max_depth
+        # Only when some function assigns globals can a call change the ones its caller copied in
+        sync = any(function.global_writes for function in self.functions.values())
+        # Counted per straight-line run, on each jump, rather than per instruction
+        executed = self.executed
+        start = pc
+
+        try:
+            while pc < end:
+                op, a, b, c = code[pc]
+                pc += 1
+
+                if op == OP_LOAD:
+                    slots[b] = a
+                elif op == OP_STORE:
+                    slots[b] = slots[a]
+                elif op == OP_IF_FALSE:
+                    if not slots[a]:
+                        executed += pc - start
+                        pc = start = b
+                elif op == OP_IF_NOT_LT:
+                    if not slots[a] < slots[b]:
+                        executed += pc - start
+                        pc = start = c
+                elif op == OP_GOTO:
+                    executed += pc - start
+                    pc = start = a
+                elif op == OP_ADD:
+                    slots[c] = slots[a] + slots[b]
+                elif op == OP_SUB:
+                    slots[c] = slots[a] - slots[b]
+                elif op == OP_LT:
+                    slots[c] = slots[a] < slots[b]
+                elif op == OP_MUL:
+                    slots[c] = slots[a] * slots[b]
+                elif op == OP_DIV:
+                    slots[c] = slots[a] / slots[b]
+                elif op == OP_MOD:
+                    slots[c] = slots[a] % slots[b]
+                elif op == OP_LTE:
+                    slots[c] = slots[a] <= slots[b]
+                elif op == OP_GT:
+                    slots[c] = slots[a] > slots[b]
+                elif op == OP_GTE:
+                    slots[c] = slots[a] >= slots[b]
+                elif op == OP_EQ:
+                    slots[c] = slots[a] == slots[b]
+                elif op == OP_NEQ:
+                    slots[c] = slots[a] != slots[b]
+                elif op == OP_AND:
+                    slots[c] = slots[a] and slots[b]
+                elif op == OP_OR:
+                    slots[c] = slots[a] or slots[b]
+                elif op == OP_PRINT:
+                    output.append(str(slots[a]))
+                elif op == OP_IF_NOT_LTE:
+                    if not slots[a] <= slots[b]:
+                        executed += pc - start
+                        pc = start = c
+                elif op == OP_IF_NOT_GT:
+                    if not slots[a] > slots[b]:
+                        executed += pc - start
+                        pc = start = c
+                elif op == OP_IF_NOT_GTE:
+                    if not slots[a] >= slots[b]:
+                        executed += pc - start
+                        pc = start = c
+                elif op == OP_IF_NOT_EQ:
+                    if not slots[a] == slots[b]:
+                        executed += pc - start
+                        pc = start = c
+                elif op == OP_IF_NOT_NEQ:
+                    if not slots[a] != slots[b]:
+                        executed += pc - start
+                        pc = start = c
+                elif op == OP_CALL:
+                    if len(call_stack) >= max_depth:
+                        raise RecursionError(f"Maximum recursion depth {max_depth} exceeded")
+                    if sync and call_stack:
+                        for local, glob in call_stack[-1][3].global_writes:
+                            global_slots[glob] = slots[local]
+                    frame = a.new_frame()
+                    for param, arg in zip(a.params, c):
+                        frame[param] = slots[arg]
+                    for local, glob in a.global_reads:
+                        frame[local] = global_slots[glob]
+                    call_stack.append((pc, slots, b, a))
+                    slots = frame
+                    executed += pc - start
+                    pc = start = a.entry
+                elif op == OP_RETURN:
+                    executed += pc - start
+                    if not call_stack:
+                        pc = start = end
+                        continue
+                    value = slots[a] if a is not None else None
+                    pc, caller, dest, function = call_stack.pop()
+                    start = pc
+                    for local, glob in function.global_writes:
+                        global_slots[glob] = slots[local]
+                    function.free_frames.append(slots)
+                    slots = caller
+                    if sync and call_stack:
+                        for local, glob in call_stack[-1][3].global_reads:
+                            slots[local] = global_slots[glob]
+                    if dest is not None:
+                        slots[dest] = value
+        except Exception as e:
+            raise RuntimeError(f"Error executing '{self.source[pc - 1]}': {str(e)}")
+        finally:
+            self.pc = pc
+            self.executed = executed + pc - start
+            self.store_memory()
+
+    def store_memory(self):
+        """Copy slot values back into the named memory and registers"""
+        for name, index in self.slot_names.items():
+            if is_literal(name):
+                continue
+            if name in self.registers:
+                self.registers[name] = self.slots[index]
+            elif self.slots[index] is not name:
+                self.memory[name] = self.slots[index]
+
     def get_value(self, identifier):
         """Get value from memory or registers"""
         if identifier in self.registers:
             return self.registers[identifier]
         return self.memory.get(identifier, identifier)
-    
-    def find_label(self, instructions, label):
-        """Find instruction index for a label"""
-        for i, instr in enumerate(instructions):
-            if instr.startswith(f"LABEL {label}"):
-                return i
-        raise ValueError(f"Label {label} not found")
-    
+
     def reset_state(self):
         """Reset execution state"""
         self.memory = {}
         self.output = []
         self.pc = 0
-        self.registers = {'r0': 0, 'r1': 0, 'r2': 0, 'r3': 0}
\ No newline at end of file
+        self.executed = 0
+        self.registers = dict.fromkeys(self.register_names, 0)
\ No newline at end of file
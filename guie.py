@@ -1,21 +1,15 @@
 import tkinter as tk
 from tkinter import ttk, scrolledtext, filedialog, messagebox
-from lexer import tokenize
-from parser import Parser
-from semantic import SemanticAnalyzer
-from tac import ThreeAddressCodeGenerator
-from interme_code import IntermediateCodeGenerator
-from target import TargetCodeGenerator
-from executor import Executor
+from lexer import LexerError
+from pipeline import CompilationSession
 from translator import PythonTranslator
-from optimizer import Optimizer
-from output import generate_output_from_ast  # ✅ New import
 
 class CompilerGUI:
     def __init__(self, root):
         self.root = root
         self.root.title("HindiPython Compiler")
         self.root.geometry("1200x800")
+        self.session = CompilationSession(retain_scopes=True)  # Stage artifacts kept in step with the editor
         self.create_widgets()
 
     def create_widgets(self):
@@ -26,6 +20,7 @@ class CompilerGUI:
             self.source_frame, wrap=tk.WORD, width=80, height=15,
             font=('Consolas', 11))
         self.source_text.pack(fill=tk.BOTH, expand=True)
+        self.source_text.bind("<<Modified>>", self.on_source_modified)
 
         self.button_frame = ttk.Frame(self.root)
         self.button_frame.pack(fill=tk.X, padx=10, pady=5)
@@ -86,6 +81,26 @@ Dikhao z;""")
                 self.source_text.delete(1.0, tk.END)
                 self.source_text.insert(tk.END, f.read())
 
+    def on_source_modified(self, event=None):
+        """Re-lex and re-parse only the edited lines on every change"""
+        try:
+            self.front_end()
+        except LexerError:
+            pass  # Reported when a stage is run
+        self.source_text.edit_modified(False)
+
+    def front_end(self):
+        self.session.set_source(self.source_text.get(1.0, tk.END))
+        return self.session
+
+    def analyzed_session(self):
+        """The session for the current source, or None after showing its semantic errors"""
+        session = self.front_end()
+        if session.semantic_errors():
+            self.show_errors(session.semantic_errors())
+            return None
+        return session
+
     def clear_outputs(self):
         for attr in [
             'tokens_text', 'parse_tree_text', 'ast_text', 'semantic_text',
@@ -98,8 +113,7 @@ Dikhao z;""")
     def tokenize(self):
         self.clear_outputs()
         try:
-            code = self.source_text.get(1.0, tk.END)
-            tokens = tokenize(code)
+            tokens = self.front_end().tokens()
             self.tokens_text.insert(tk.END, "\n".join(str(t) for t in tokens))
             messagebox.showinfo("Success", "Tokenization completed!")
         except Exception as e:
@@ -107,16 +121,14 @@ Dikhao z;""")
 
     def parse(self):
         try:
-            code = self.source_text.get(1.0, tk.END)
-            tokens = tokenize(code)
-            parser = Parser(tokens)
-            self.parse_tree, self.ast = parser.parse()
+            session = self.front_end()
+            self.parse_tree, self.ast = session.parse_tree(), session.ast()
 
             self.parse_tree_text.insert(tk.END, str(self.parse_tree))
             self.ast_text.insert(tk.END, str(self.ast))
 
-            if parser.errors:
-                self.show_errors(parser.errors)
+            if session.syntax_errors():
+                self.show_errors(session.syntax_errors())
                 messagebox.showwarning("Warning", "Parsing completed with errors")
             else:
                 messagebox.showinfo("Success", "Parsing completed successfully")
@@ -125,18 +137,16 @@ Dikhao z;""")
 
     def semantic_analysis(self):
         try:
-            code = self.source_text.get(1.0, tk.END)
-            tokens = tokenize(code)
-            parser = Parser(tokens)
-            self.parse_tree, self.ast = parser.parse()
+            session = self.front_end()
+            self.ast = session.ast()
 
-            if parser.errors:
-                self.show_errors(parser.errors)
+            if session.syntax_errors():
+                self.show_errors(session.syntax_errors())
                 messagebox.showerror("Error", "Cannot analyze with syntax errors")
                 return
 
-            self.analyzer = SemanticAnalyzer()
-            errors = self.analyzer.analyze(self.ast)
+            self.analyzer = session.analysis()
+            errors = self.analyzer.errors
 
             if errors:
                 self.show_errors(errors)
@@ -149,33 +159,29 @@ Dikhao z;""")
         except Exception as e:
             self.show_error(f"Semantic error: {str(e)}")
 
-    def display_symbol_table(self, symbol_table, indent=0):
+    def display_symbol_table(self, root_scope, indent=0):
         lines = []
-        prefix = "  " * indent
-        for name, entry in symbol_table.symbols.items():
-            if entry['is_function']:
-                params = ", ".join([f"{ptype} {pname}" for ptype, pname in entry['params']])
-                lines.append(f"{prefix}Function: {name}({params}) -> {entry['return_type']}")
-            else:
-                lines.append(f"{prefix}Variable: {name} : {entry['type']} (Scope Level {entry['scope_level']})")
-        for child in symbol_table.children:
-            lines.extend(self.display_symbol_table(child, indent + 1))
+        stack = [(root_scope, indent)]
+        while stack:
+            scope, level = stack.pop()
+            prefix = "  " * level
+            for name, entry in scope.symbols.items():
+                if entry.is_function:
+                    params = ", ".join([f"{ptype} {pname}" for ptype, pname in entry.params])
+                    lines.append(f"{prefix}Function: {name}({params}) -> {entry.return_type}")
+                else:
+                    lines.append(f"{prefix}Variable: {name} : {entry.type} (Scope Level {entry.scope_level})")
+            for child in reversed(scope.children):
+                stack.append((child, level + 1))
         return lines
 
     def generate_intermediate(self):
         try:
-            code = self.source_text.get(1.0, tk.END)
-            tokens = tokenize(code)
-            parser = Parser(tokens)
-            _, ast = parser.parse()
-
-            analyzer = SemanticAnalyzer()
-            if analyzer.analyze(ast):
-                self.show_errors(analyzer.errors)
+            session = self.analyzed_session()
+            if session is None:
                 return
 
-            generator = IntermediateCodeGenerator()
-            intermediate = generator.generate(ast)
+            intermediate = session.intermediate()
             self.intermediate_code_text.insert(tk.END, "\n".join(intermediate))
             messagebox.showinfo("Success", "Intermediate code generated")
         except Exception as e:
@@ -183,18 +189,11 @@ Dikhao z;""")
 
     def generate_tac(self):
         try:
-            code = self.source_text.get(1.0, tk.END)
-            tokens = tokenize(code)
-            parser = Parser(tokens)
-            _, ast = parser.parse()
-
-            analyzer = SemanticAnalyzer()
-            if analyzer.analyze(ast):
-                self.show_errors(analyzer.errors)
+            session = self.analyzed_session()
+            if session is None:
                 return
 
-            tac_gen = ThreeAddressCodeGenerator()
-            tac = tac_gen.generate(ast)
+            tac = session.tac()
             self.three_address_code_text.insert(tk.END, "\n".join(tac))
             messagebox.showinfo("Success", "TAC generation completed")
         except Exception as e:
@@ -202,13 +201,11 @@ Dikhao z;""")
 
     def optimize_code(self):
         try:
-            tac = self.three_address_code_text.get(1.0, tk.END).strip().splitlines()
-            if not tac:
-                messagebox.showwarning("Warning", "Please generate TAC first")
+            session = self.analyzed_session()
+            if session is None:
                 return
 
-            optimizer = Optimizer(tac)
-            optimized = optimizer.optimize()
+            optimized = session.optimized()
 
             self.optimized_code_text.delete(1.0, tk.END)
             self.optimized_code_text.insert(tk.END, "\n".join(optimized))
@@ -218,13 +215,11 @@ Dikhao z;""")
 
     def generate_target(self):
         try:
-            tac = self.optimized_code_text.get(1.0, tk.END).strip()
-            if not tac:
-                messagebox.showwarning("Warning", "Please optimize TAC first")
+            session = self.analyzed_session()
+            if session is None:
                 return
 
-            target_gen = TargetCodeGenerator()
-            target = target_gen.generate(tac)
+            target = session.target()
             self.target_code_text.insert(tk.END, target)
             messagebox.showinfo("Success", "Target code generated")
         except Exception as e:
@@ -232,22 +227,23 @@ Dikhao z;""")
 
     def execute_code(self):
         try:
-            executor = Executor()
-            tac = self.optimized_code_text.get(1.0, tk.END)
-            if tac.strip():
-                output = executor.execute_tac(tac)
-                self.execution_text.insert(tk.END, "=== TAC Execution ===\n" + output + "\n")
-
-            target = self.target_code_text.get(1.0, tk.END)
-            if target.strip():
+            session = self.analyzed_session()
+            if session is None:
+                return
+
+            output = session.execution()
+            self.execution_text.insert(tk.END, "=== TAC Execution ===\n" + output + "\n")
+            output = session.target_execution()
+            self.execution_text.insert(tk.END, "\n=== Target Machine ===\n" + output + "\n")
+
+            tac = session.optimized()
+            try:
                 py_code = PythonTranslator.tac_to_python(tac)
                 self.execution_text.insert(tk.END, "\n=== Python Translation ===\n" + py_code + "\n")
-                loc = {}
-                try:
-                    exec(py_code, {}, loc)
-                    self.execution_text.insert(tk.END, "\n=== Execution Output ===\n" + loc.get('result', 'No output'))
-                except Exception as e:
-                    self.execution_text.insert(tk.END, f"\n=== Execution Error ===\n{str(e)}")
+                output = PythonTranslator.run(tac)
+                self.execution_text.insert(tk.END, "\n=== Execution Output ===\n" + (output or 'No output'))
+            except Exception as e:
+                self.execution_text.insert(tk.END, f"\n=== Execution Error ===\n{str(e)}")
 
             messagebox.showinfo("Success", "Execution completed")
         except Exception as e:
@@ -255,12 +251,7 @@ Dikhao z;""")
 
     def generate_source_output(self):
         try:
-            code = self.source_text.get(1.0, tk.END)
-            tokens = tokenize(code)
-            parser = Parser(tokens)
-            _, ast = parser.parse()
-
-            output = generate_output_from_ast(ast)
+            output = self.front_end().output()
             self.output_text.insert(tk.END, output or "No output")
             messagebox.showinfo("Success", "Source output generated")
         except Exception as e:
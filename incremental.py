@@ -0,0 +1,165 @@
+from bisect import bisect_left
+from lexer import tokenize
+from parser import Parser
+from my_ast import ASTNode
+
+
+class StatementRecord:
+    """One top-level parse step: a statement, or the tokens skipped while recovering from an error"""
+
+    def __init__(self, ast, errors, line):
+        self.ast = ast
+        self.errors = errors
+        self.line = line  # Line numbers currently stored in the AST and errors
+
+
+class IncrementalDocument:
+    """Token stream and top-level statements of an editor buffer, updated edit by edit.
+
+    Tokens never span lines, so every line is lexed on its own and an edit only
+    re-lexes the lines it touches. Top-level statements are kept with the
+    (line, column) of their first token; an edit re-parses from the statement
+    before the damage until the parser lands on an unchanged statement again.
+    Statements are parsed AST-only; the parse tree is rebuilt on request.
+    """
+
+    def __init__(self, code=""):
+        self.lines = []        # Source text of each line
+        self.line_tokens = []  # Tokens of each line, possibly with stale line numbers
+        self.starts = []       # (line, column) of the first token of each record
+        self.records = []
+        self.stale_ast = False  # Some records moved since their AST line numbers were fixed
+        self.cached_parse_tree = None
+        self.update_text(code)
+
+    def update_text(self, code):
+        """Bring the document up to date with the full buffer text by diffing whole lines"""
+        new_lines = code.split('\n')
+        old_lines = self.lines
+        limit = min(len(old_lines), len(new_lines))
+
+        prefix = common_run(old_lines, new_lines, limit, 0, 0, 1)
+        if prefix == len(old_lines) == len(new_lines):
+            return False
+        suffix = common_run(old_lines, new_lines, limit - prefix,
+                            len(old_lines) - 1, len(new_lines) - 1, -1)
+
+        self.update(prefix + 1, len(old_lines) - suffix + 1,
+                    new_lines[prefix:len(new_lines) - suffix])
+        return True
+
+    def update(self, start, end, new_lines):
+        """Replace lines start..end-1 (1-based, end exclusive) with new_lines and re-parse"""
+        tokens = [tokenize(text, start + i) for i, text in enumerate(new_lines)]  # May raise LexerError
+        delta = len(new_lines) - (end - start)
+        self.lines[start - 1:end - 1] = new_lines
+        self.line_tokens[start - 1:end - 1] = tokens
+
+        # Re-parse from the last statement starting before the damage: its
+        # lookahead may have seen the damaged lines
+        old_starts = self.starts
+        first = bisect_left(old_starts, (start, 0)) - 1
+        if first < 0:
+            first, (line, column) = 0, (1, 0)
+        else:
+            line, column = old_starts[first]
+        damage_end = start + len(new_lines)  # First undamaged line, new numbering
+
+        self.cached_parse_tree = None
+        parser = Parser(self.tokens_from(line, column), build_parse_tree=False)
+        new_starts = []
+        new_records = []
+        resume = len(old_starts)
+        while not parser.stream.at_end():
+            token = parser.current()
+            if token.line >= damage_end:
+                index = bisect_left(old_starts, (token.line - delta, token.column), first)
+                if index < len(old_starts) and old_starts[index] == (token.line - delta, token.column):
+                    resume = index
+                    break
+            error_count = len(parser.errors)
+            _, stmt_ast = parser.parse_statement()
+            new_starts.append((token.line, token.column))
+            new_records.append(StatementRecord(stmt_ast, parser.errors[error_count:], token.line))
+
+        if delta:
+            self.stale_ast = True
+            new_starts.extend((line + delta, column) for line, column in old_starts[resume:])
+        else:
+            new_starts.extend(old_starts[resume:])
+        self.starts = old_starts[:first] + new_starts
+        self.records[first:resume] = new_records
+        return first, first + len(new_records)
+
+    def tokens_from(self, line, column):
+        """Yield tokens with current line numbers, starting at (line, column)"""
+        for number in range(line, len(self.line_tokens) + 1):
+            for token in self.line_tokens[number - 1]:
+                if number == line and token.column < column:
+                    continue
+                yield token if token.line == number else token._replace(line=number)
+
+    def tokens(self):
+        return list(self.tokens_from(1, 0))
+
+    def relocate(self):
+        """Move stored AST and error line numbers to where each statement is now"""
+        if self.stale_ast:
+            for record, (line, _) in zip(self.records, self.starts):
+                delta = line - record.line
+                if delta:
+                    if record.ast:
+                        shift_ast(record.ast, delta)
+                    for error in record.errors:
+                        if error['line'] > 0:
+                            error['line'] += delta
+                    record.line = line
+            self.stale_ast = False
+
+    @property
+    def errors(self):
+        self.relocate()
+        return [error for record in self.records for error in record.errors]
+
+    @property
+    def parse_tree(self):
+        """Concrete parse tree for display, from one full parse of the current tokens"""
+        if self.cached_parse_tree is None:
+            self.cached_parse_tree, _ = Parser(self.tokens_from(1, 0)).parse()
+        return self.cached_parse_tree
+
+    @property
+    def ast(self):
+        """A fresh Program node over the current statements, safe to hand to semantic analysis"""
+        self.relocate()
+        program = ASTNode('Program')
+        program.children = [record.ast for record in self.records if record.ast]
+        return program
+
+
+def common_run(old, new, limit, old_index, new_index, step, block=512):
+    """Length of the run of equal lines walking from the given indexes in direction step"""
+    run = 0
+    # Compare whole blocks with C-level list equality, then finish line by line
+    while run + block <= limit:
+        if step > 0:
+            equal = (old[old_index + run:old_index + run + block]
+                     == new[new_index + run:new_index + run + block])
+        else:
+            equal = (old[old_index - run - block + 1:old_index - run + 1]
+                     == new[new_index - run - block + 1:new_index - run + 1])
+        if not equal:
+            break
+        run += block
+    while run < limit and old[old_index + step * run] == new[new_index + step * run]:
+        run += 1
+    return run
+
+
+def shift_ast(node, delta):
+    stack = [node]
+    while stack:
+        node = stack.pop()
+        if node.line is not None and node.line > 0:
+            node.line += delta
+        stack.extend(node.children)
\ No newline at end of file
@@ -1,4 +1,7 @@
-from my_ast import ASTNode
+from my_ast import ASTNode, dispatch_table
+from traversal import walk
+from semantic import assigned_globals, tac_name
+from opcodes import typed_opcode
 
 class IntermediateCodeGenerator:
     def __init__(self):
@@ -6,6 +9,7 @@ class IntermediateCodeGenerator:
         self.temp_counter = 0
         self.label_counter = 0
         self.current_scope = "global"
+        self.visitors = dispatch_table(self, 'visit_', self.generic_visit)
     
     def generate(self, ast):
         self.code = []
@@ -18,14 +22,12 @@ class IntermediateCodeGenerator:
         if not isinstance(node, ASTNode):
             return
         
-        method_name = 'visit_' + node.type
-        visitor = getattr(self, method_name, self.generic_visit)
-        return visitor(node)
+        return walk(self.visitors, node)
     
     def generic_visit(self, node):
         results = []
         for child in node.children:
-            results.append(self.visit(child))
+            results.append((yield child))
         return results
     
     def new_temp(self):
@@ -40,43 +42,26 @@ class IntermediateCodeGenerator:
     
     def visit_Program(self, node):
         for child in node.children:
-            self.visit(child)
+            yield child
     
     def visit_Declaration(self, node):
-        var_type = node.children[0].value
-        var_name = node.children[1].value
+        var_name = tac_name(node.children[1])
         
         if len(node.children) > 2 and node.children[2].type != 'NoValue':
-            expr_result = self.visit(node.children[2])
+            expr_result = yield node.children[2]
             self.code.append(f"STORE {expr_result} {var_name}")
     
     def visit_Assignment(self, node):
-        var_name = node.children[0].value
-        expr_result = self.visit(node.children[1])
+        var_name = tac_name(node.children[0])
+        expr_result = yield node.children[1]
         self.code.append(f"STORE {expr_result} {var_name}")
     
     def visit_BinaryOp(self, node):
-        left = self.visit(node.children[0])
-        right = self.visit(node.children[1])
+        left = yield node.children[0]
+        right = yield node.children[1]
         temp = self.new_temp()
         
-        op_map = {
-            '+': 'ADD',
-            '-': 'SUB',
-            '*': 'MUL',
-            '/': 'DIV',
-            '%': 'MOD',
-            '&&': 'AND',
-            '||': 'OR',
-            '==': 'EQ',
-            '!=': 'NEQ',
-            '<': 'LT',
-            '<=': 'LTE',
-            '>': 'GT',
-            '>=': 'GTE'
-        }
-        
-        op = op_map.get(node.value, node.value)
+        op = typed_opcode(node)
         self.code.append(f"{op} {left} {right} {temp}")
         return temp
     
@@ -86,7 +71,7 @@ class IntermediateCodeGenerator:
         return temp
     
     def visit_Variable(self, node):
-        return node.value
+        return tac_name(node)
     
     def visit_String(self, node):
         temp = self.new_temp()
@@ -95,16 +80,15 @@ class IntermediateCodeGenerator:
     
     def visit_Boolean(self, node):
         temp = self.new_temp()
-        value = 1 if node.value == 'Sahi' else 0
-        self.code.append(f"LOAD {value} {temp}")
+        self.code.append(f"LOAD {node.value} {temp}")
         return temp
     
     def visit_Output(self, node):
-        expr_result = self.visit(node.children[0])
+        expr_result = yield node.children[0]
         self.code.append(f"PRINT {expr_result}")
     
     def visit_IfStatement(self, node):
-        condition = self.visit(node.children[0])
+        condition = yield node.children[0]
         true_label = self.new_label()
         false_label = self.new_label()
         end_label = self.new_label()
@@ -114,15 +98,15 @@ class IntermediateCodeGenerator:
         self.code.append(f"LABEL {true_label}")
         
         # Process true block
-        self.visit(node.children[1])
+        yield node.children[1]
         self.code.append(f"GOTO {end_label}")
         
         # Process else/elif blocks if any
         self.code.append(f"LABEL {false_label}")
         i = 2
         while i < len(node.children):
-            if i + 1 < len(node.children) and node.children[i+1].type == 'BinaryOp':  # elif condition
-                elif_condition = self.visit(node.children[i+1])
+            if i + 1 < len(node.children):  # elif condition and block
+                elif_condition = yield node.children[i]
                 elif_true_label = self.new_label()
                 next_elif_label = self.new_label()
                 
@@ -130,13 +114,13 @@ class IntermediateCodeGenerator:
                 self.code.append(f"GOTO {elif_true_label}")
                 self.code.append(f"LABEL {elif_true_label}")
                 
-                self.visit(node.children[i+2])  # elif block
+                yield node.children[i+1]  # elif block
                 self.code.append(f"GOTO {end_label}")
                 self.code.append(f"LABEL {next_elif_label}")
                 
-                i += 3
+                i += 2
             else:  # else block
-                self.visit(node.children[i])
+                yield node.children[i]
                 i += 1
         
         self.code.append(f"LABEL {end_label}")
@@ -150,10 +134,10 @@ class IntermediateCodeGenerator:
         self.code.append(f"GOTO {condition_label}")
         self.code.append(f"LABEL {condition_label}")
         
-        condition = self.visit(node.children[0])
+        condition = yield node.children[0]
         self.code.append(f"IF_FALSE {condition} GOTO {end_label}")
         
-        self.visit(node.children[1])  # while block
+        yield node.children[1]  # while block
         self.code.append(f"GOTO {start_label}")
         self.code.append(f"LABEL {end_label}")
     
@@ -172,12 +156,16 @@ class IntermediateCodeGenerator:
         
         # Parameters
         for param in params:
-            param_name = param.children[1].value
+            param_name = tac_name(param.children[1])
             param_type = param.children[0].value
             self.code.append(f"PARAM {param_name} {param_type}")
         
+        # Globals the body assigns; every other name it assigns is a local
+        for name in assigned_globals(node):
+            self.code.append(f"GLOBAL {name}")
+        
         # Function body
-        self.visit(body)
+        yield body
         
         # Function epilogue
         self.code.append(f"FUNC_END {func_name}")
@@ -187,14 +175,16 @@ class IntermediateCodeGenerator:
     
     def visit_Return(self, node):
         if node.children[0].type != 'NoReturnValue':
-            expr_result = self.visit(node.children[0])
+            expr_result = yield node.children[0]
             self.code.append(f"RETURN {expr_result}")
         else:
             self.code.append("RETURN")
     
     def visit_FunctionCall(self, node):
         func_name = node.value
-        args = [self.visit(arg) for arg in node.children]
+        args = []
+        for arg in node.children:
+            args.append((yield arg))
         temp = self.new_temp()
         
         for arg in args:
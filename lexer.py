@@ -1,4 +1,5 @@
 import re
+import sys
 from collections import namedtuple
 
 Token = namedtuple('Token', ['value', 'type', 'line', 'column'])
@@ -19,13 +20,74 @@ TOKEN_SPEC = [
 ]
 
 token_regex = '|'.join(f'(?P<{name}>{pattern})' for name, pattern in TOKEN_SPEC)
+token_pattern = re.compile(token_regex)
 
-def tokenize(code):
-    tokens = []
+# Interned type ids for streamed tokens, in TOKEN_SPEC order
+TOKEN_TYPES = [name for name, _ in TOKEN_SPEC]
+TYPE_IDS = {name: index for index, name in enumerate(TOKEN_TYPES)}
+INTERNED_TYPES = {TYPE_IDS['KEYWORD'], TYPE_IDS['OPERATOR'], TYPE_IDS['ASSIGN'], TYPE_IDS['SEPARATOR']}
+
+
+class LexerError(Exception):
+    pass
+
+
+class StreamToken:
+    """Compact token that points into the source instead of copying its text"""
+    __slots__ = ('source', 'type_id', 'start', 'end', 'line', 'column', '_value')
+
+    def __init__(self, source, type_id, start, end, line, column):
+        self.source = source
+        self.type_id = type_id
+        self.start = start
+        self.end = end
+        self.line = line
+        self.column = column
+        self._value = None
+
+    @property
+    def value(self):
+        if self._value is None:
+            text = self.source[self.start:self.end]
+            self._value = sys.intern(text) if self.type_id in INTERNED_TYPES else text
+        return self._value
+
+    @property
+    def type(self):
+        return TOKEN_TYPES[self.type_id]
+
+    def __repr__(self):
+        return f"Token(value={self.value!r}, type={self.type!r}, line={self.line}, column={self.column})"
+
+
+def iter_tokens(code):
+    """Yield StreamTokens one at a time from a single pass over the source"""
     line_num = 1
     line_start = 0
-    
-    for mo in re.finditer(token_regex, code):
+    newline = TYPE_IDS['NEWLINE']
+    skipped = (TYPE_IDS['SKIP'], TYPE_IDS['COMMENT'])
+    mismatch = TYPE_IDS['MISMATCH']
+
+    for mo in token_pattern.finditer(code):
+        type_id = TYPE_IDS[mo.lastgroup]
+        start = mo.start()
+
+        if type_id == newline:
+            line_start = mo.end()
+            line_num += 1
+        elif type_id in skipped:
+            continue
+        elif type_id == mismatch:
+            raise LexerError(f"Unrecognized token '{mo.group()}' at line {line_num}, column {start - line_start}")
+        else:
+            yield StreamToken(code, type_id, start, mo.end(), line_num, start - line_start)
+
+
+def tokenize(code, line_num=1):
+    tokens = []
+    line_start = 0
+
+    for mo in token_pattern.finditer(code):
         kind = mo.lastgroup
         value = mo.group()
         column = mo.start() - line_start
@@ -37,8 +99,8 @@ def tokenize(code):
         elif kind == 'SKIP' or kind == 'COMMENT':
             continue
         elif kind == 'MISMATCH':
-            raise Exception(f"Unrecognized token '{value}' at line {line_num}, column {column}")
+            raise LexerError(f"Unrecognized token '{value}' at line {line_num}, column {column}")
         else:
             tokens.append(Token(value, kind, line_num, column))
-    
+
     return tokens
\ No newline at end of file
@@ -0,0 +1,373 @@
+import re
+from collections import Counter
+from cfg import JUMPS, BasicBlock, read_names, read_positions, live_variables
+from executor import is_literal, written_name
+from opcodes import is_pure
+from vm import TEMP_PATTERN
+
+LABEL_PATTERN = re.compile(r'L(\d+)$')
+
+
+class NameSupply:
+    """Temp and label names that no instruction of the program uses yet"""
+    def __init__(self, graphs):
+        self.temps = 0
+        self.labels = 0
+        for graph in graphs:
+            for parts in graph.instructions():
+                for part in parts:
+                    if TEMP_PATTERN.match(part):
+                        self.temps = max(self.temps, int(part[1:]) + 1)
+                if parts[0] == 'LABEL' and LABEL_PATTERN.match(parts[1]):
+                    self.labels = max(self.labels, int(parts[1][1:]) + 1)
+
+    def temp(self):
+        self.temps += 1
+        return f"t{self.temps - 1}"
+
+    def label(self):
+        self.labels += 1
+        return f"L{self.labels - 1}"
+
+
+class Loop:
+    """A natural loop: its header and every block reaching one of its back edges without passing the header"""
+    def __init__(self, header):
+        self.header = header
+        self.blocks = {header}
+        self.preheader = None
+
+    def layout(self, position):
+        """The loop's blocks in program order, given a sort key for a block's place in it"""
+        return sorted(self.blocks, key=position)
+
+    def exits(self):
+        """(block inside, block outside) for every edge leaving the loop"""
+        return [(block, successor) for block in self.blocks
+                for successor in block.successors if successor not in self.blocks]
+
+
+def natural_loops(graph):
+    """The graph's natural loops, innermost first; back edges to one header make one loop"""
+    loops = {}
+    for block in graph.blocks:
+        for successor in block.successors:
+            if graph.dominates(successor.index, block.index):
+                loop = loops.setdefault(successor, Loop(successor))
+                work = [block]
+                while work:
+                    member = work.pop()
+                    if member not in loop.blocks:
+                        loop.blocks.add(member)
+                        work.extend(member.predecessors)
+    return sorted(loops.values(), key=lambda loop: len(loop.blocks))
+
+
+def is_integer(operand):
+    return is_literal(operand) and '.' not in operand
+
+
+class LoopOptimizer:
+    """Invariant code motion and induction variable strength reduction over one graph's loops.
+
+    Loops are visited innermost first, so code hoisted out of an inner loop
+    lands in a preheader that the enclosing loop can hoist it out of again.
+    Counts of what was done are kept in stats.
+
+    Liveness is solved once, before any loop changes. The changes only
+    ever drop reads of existing names or move them to a preheader of a
+    loop that already read them, so the sets stay safe over-approximations
+    for every name but the fresh temps, which are never live where they
+    are asked about. Likewise preheaders are spliced into the block list
+    but the graph is only relinked at the end, and block indexes keep
+    their original meaning for dominance in the meantime.
+    """
+
+    def __init__(self, graph, names):
+        self.graph = graph
+        self.names = names
+        self.shared = graph.shared_variables()
+        self.loops = []
+        self.live_in = {}   # Block -> names live on entry to it
+        self.reads = Counter()  # How often each name is read in the graph
+        self.stand_in = {}  # Preheader -> the header it was made for
+        self.stats = Counter()
+
+    def optimize(self):
+        graph = self.graph
+        self.loops = natural_loops(graph)
+        if not self.loops:
+            return self.stats
+        self.live_in = dict(zip(graph.blocks, live_variables(graph, self.shared)))
+        for block in graph.blocks:
+            for parts in block.instructions:
+                self.reads.update(read_names(parts))
+        for loop in self.loops:
+            self.stats['loops'] += 1
+            self.hoist_invariants(loop)
+            self.reduce_strength(loop)
+        if self.stand_in:
+            graph.link()
+        return self.stats
+
+    def position(self, block):
+        """Sort key putting blocks in program order, each preheader just before its header"""
+        header = self.stand_in.get(block)
+        return (header.index, 0) if header is not None else (block.index, 1)
+
+    def dominates(self, a, b):
+        """Whether block a dominates block b, where a preheader dominates what its header does and the header too"""
+        if a is b:
+            return True
+        header_a = self.stand_in.get(a, a)
+        header_b = self.stand_in.get(b, b)
+        if header_a is header_b:
+            return header_b is b    # A preheader dominates its header, not the other way round
+        return self.graph.dominates(header_a.index, header_b.index)
+
+    def add(self, block, parts, position=None):
+        """Put a new instruction in a block, at the end unless a position is given"""
+        if position is None:
+            block.instructions.append(parts)
+        else:
+            block.instructions.insert(position, parts)
+        self.reads.update(read_names(parts))
+
+    def rewrite(self, parts, new):
+        """Replace an instruction's parts in place"""
+        self.reads.subtract(read_names(parts))
+        parts[:] = new
+        self.reads.update(read_names(parts))
+
+    def definitions(self, loop):
+        """How often each name is assigned in the loop; a CALL counts for every shared name"""
+        counts = Counter()
+        for block in loop.blocks:
+            for parts in block.instructions:
+                counts[written_name(parts)] += 1
+                if parts[0] == 'CALL':
+                    counts.update(self.shared)
+        return counts
+
+    def preheader(self, loop):
+        """The block every entry to the loop passes through first, made on first use; None if it cannot be"""
+        if loop.preheader is not None:
+            return loop.preheader
+        graph = self.graph
+        header = loop.header
+        position = graph.blocks.index(header)
+        previous = graph.blocks[position - 1]
+        if previous in loop.blocks and header in previous.successors and (
+                not previous.instructions or previous.instructions[-1][0] != 'GOTO'):
+            return None     # A back edge falls into the header
+        if not header.instructions or header.instructions[0][0] != 'LABEL':
+            return None
+
+        preheader = BasicBlock(header.index)
+        target = header.instructions[0][1]
+        entries = [block for block in header.predecessors if block not in loop.blocks]
+        jumps = [block for block in entries
+                 if block.instructions and block.instructions[-1][0] in JUMPS
+                 and block.instructions[-1][-1] == target]
+        if jumps:
+            label = self.names.label()
+            preheader.instructions.append(['LABEL', label])
+            graph.labels[label] = preheader
+            for block in jumps:
+                block.instructions[-1] = block.instructions[-1][:-1] + [label]
+
+        # Splice the edges by hand; the graph is relinked once all loops are done
+        graph.blocks.insert(position, preheader)
+        for block in entries:
+            block.successors = [preheader if successor is header else successor
+                                for successor in block.successors]
+        preheader.predecessors = entries
+        preheader.successors = [header]
+        header.predecessors = [block for block in header.predecessors if block in loop.blocks] + [preheader]
+        self.stand_in[preheader] = header
+        self.live_in[preheader] = self.live_in[header]
+        for other in self.loops:
+            if other is not loop and header in other.blocks:
+                other.blocks.add(preheader)
+        loop.preheader = preheader
+        return preheader
+
+    def hoist_invariants(self, loop):
+        """Move instructions computing the same value on every iteration to the preheader.
+
+        An instruction moves if it cannot fail, its operands are not
+        assigned in the loop (or only by code already moved), it is the
+        loop's only assignment to its name, no use in the loop can see the
+        name's value from before the loop, and the name is dead after the
+        loop wherever the instruction might not have run yet.
+        """
+        definitions = self.definitions(loop)
+        live_in = self.live_in
+        exits = loop.exits()
+        invariant = set()
+        hoisted = []
+
+        changed = True
+        while changed:
+            changed = False
+            for block in loop.layout(self.position):
+                for parts in block.instructions:
+                    dest = written_name(parts)
+                    if (dest is None or dest in invariant or not is_pure(parts[0])
+                            or definitions[dest] != 1 or dest in live_in[loop.header]):
+                        continue
+                    if any(definitions[name] and name not in invariant for name in read_names(parts)):
+                        continue
+                    if any(dest in live_in[outside] and not self.dominates(block, inside)
+                           for inside, outside in exits):
+                        continue
+                    invariant.add(dest)
+                    hoisted.append(parts)
+                    changed = True
+
+        if not hoisted:
+            return
+        preheader = self.preheader(loop)
+        if preheader is None:
+            return
+        moved = {id(parts) for parts in hoisted}
+        for block in loop.blocks:
+            block.instructions = [parts for parts in block.instructions if id(parts) not in moved]
+        preheader.instructions.extend(hoisted)
+        self.stats['hoisted'] += len(hoisted)
+
+    def induction_variables(self, loop, definitions):
+        """Basic induction variables: name -> (block, its one assignment in the loop, IADD or ISUB, step).
+
+        The assignment is `IADD i c i`, or `STORE t i` right after `IADD i c t`,
+        with c an integer literal.
+        """
+        found = {}
+        for block in loop.blocks:
+            code = block.instructions
+            for position, parts in enumerate(code):
+                if parts[0] == 'STORE' and position > 0 and code[position - 1][-1] == parts[1]:
+                    update, name = code[position - 1], parts[2]
+                elif parts[0] in ('IADD', 'ISUB'):
+                    update, name = parts, parts[3]
+                else:
+                    continue
+                if definitions[name] != 1 or update[0] not in ('IADD', 'ISUB'):
+                    continue
+                if update[1] == name and is_integer(update[2]):
+                    step = update[2]
+                elif update[0] == 'IADD' and update[2] == name and is_integer(update[1]):
+                    step = update[1]
+                else:
+                    continue
+                found[name] = (block, parts, update[0], int(step))
+        return found
+
+    def reduce_strength(self, loop):
+        """Replace `IMUL i k t`, with i an induction variable and k invariant, by a running product.
+
+        The product p = i * k is set up in the preheader and stepped right
+        after each update of i, so p == i * k holds throughout the loop.
+        Comparisons of i with an invariant then compare p instead when k is
+        a positive literal, and the update of i goes if nothing else reads i.
+        """
+        definitions = self.definitions(loop)
+        variables = self.induction_variables(loop, definitions)
+        products = {}   # (i, k) -> [(block, multiplication)]
+        for block in loop.layout(self.position):
+            for parts in block.instructions:
+                if parts[0] != 'IMUL':
+                    continue
+                for name, factor in ((parts[1], parts[2]), (parts[2], parts[1])):
+                    if name in variables and (is_integer(factor) or not definitions[factor]):
+                        products.setdefault((name, factor), []).append((block, parts))
+                        break
+        if not products or self.preheader(loop) is None:
+            return
+
+        scaled = {}     # i -> (running product, positive literal k), for rewriting comparisons
+        for (name, factor), multiplications in products.items():
+            block, assignment, op, step = variables[name]
+            running = self.names.temp()
+            self.add(loop.preheader, ['IMUL', name, factor, running])
+            if is_integer(factor):
+                increment = str(step * int(factor))
+            elif step == 1:
+                increment = factor
+            else:
+                increment = self.names.temp()
+                self.add(loop.preheader, ['IMUL', factor, str(step), increment])
+            position = block.instructions.index(assignment)
+            self.add(block, [op, running, increment, running], position + 1)
+
+            for owner, parts in multiplications:
+                self.rewrite(parts, ['STORE', running, parts[3]])
+                self.forward_copy(owner, parts)
+            self.stats['reduced'] += len(multiplications)
+            if is_integer(factor) and int(factor) > 0:
+                scaled.setdefault(name, (running, factor))
+
+        for name, (running, factor) in scaled.items():
+            self.replace_comparisons(loop, name, running, factor, definitions)
+            self.eliminate_variable(loop, name, variables[name])
+
+    def forward_copy(self, block, copy):
+        """Let the uses of a temp copied from a running product read the product itself.
+
+        Only done when every use follows the copy in its block before either
+        name is assigned again, so the copy can go.
+        """
+        source, temp = copy[1], copy[2]
+        if not TEMP_PATTERN.match(temp):
+            return
+        code = block.instructions
+        start = next(position for position, parts in enumerate(code) if parts is copy)
+        uses = []
+        for parts in code[start + 1:]:
+            uses.extend((parts, index) for index in read_positions(parts) if parts[index] == temp)
+            if written_name(parts) in (temp, source):
+                break
+        if len(uses) != self.reads[temp]:
+            return
+        for parts, index in uses:
+            self.rewrite(parts, parts[:index] + [source] + parts[index + 1:])
+        self.reads.subtract(read_names(code.pop(start)))
+
+    def replace_comparisons(self, loop, name, running, factor, definitions):
+        """Compare running == i * k with the invariant bound * k wherever the loop compares i with it"""
+        for block in loop.blocks:
+            for parts in block.instructions:
+                if parts[0] not in ('ILT', 'ILTE', 'IGT', 'IGTE', 'IEQ', 'INEQ') or name not in parts[1:3]:
+                    continue
+                bound = parts[2] if parts[1] == name else parts[1]
+                if is_integer(bound):
+                    bound = str(int(bound) * int(factor))
+                elif not definitions[bound]:
+                    product = self.names.temp()
+                    self.add(loop.preheader, ['IMUL', bound, factor, product])
+                    bound = product
+                else:
+                    continue
+                operands = [running, bound] if parts[1] == name else [bound, running]
+                self.rewrite(parts, parts[:1] + operands + parts[3:])
+                self.stats['compared'] += 1
+
+    def eliminate_variable(self, loop, name, variable):
+        """Drop the update of an induction variable that only its own update reads, and that is dead on exit.
+
+        An update through a temp goes only if the STORE is that temp's one
+        reader, since the temp holds the variable's next value.
+        """
+        block, assignment, _, _ = variable
+        reads = sum(read_names(parts).count(name) for member in loop.blocks for parts in member.instructions)
+        if reads != 1 or any(name in self.live_in[outside] for _, outside in loop.exits()):
+            return
+        if assignment[0] == 'STORE' and self.reads[assignment[1]] != 1:
+            return
+        code = block.instructions
+        position = next(index for index, parts in enumerate(code) if parts is assignment)
+        drop = {position, position - 1} if assignment[0] == 'STORE' else {position}
+        for index in drop:
+            self.reads.subtract(read_names(code[index]))
+        block.instructions = [parts for index, parts in enumerate(code) if index not in drop]
+        self.stats['eliminated'] += 1
\ No newline at end of file
@@ -0,0 +1,380 @@
+import operator
+import re
+from array import array
+from executor import BOOLEAN_LITERALS, parse_literal, is_literal
+from opcodes import base_opcode
+from target import RESERVED, WORD, NONE
+
+# Machine opcodes. Every encoded instruction is four ints: opcode, a, b, c
+(MOV, ADD, SUB, MUL, DIV, MOD, AND, OR, EQ, NEQ, LT, LTE, GT, GTE,
+ JMP, JZ, JE, JNE, JL, JLE, JG, JGE, CALL, RET, PUSH, POP, PRINT, HLT) = range(28)
+
+ARITHMETIC = {'ADD': ADD, 'SUB': SUB, 'MUL': MUL, 'DIV': DIV, 'MOD': MOD, 'AND': AND, 'OR': OR,
+              'EQ': EQ, 'NEQ': NEQ, 'LT': LT, 'LTE': LTE, 'GT': GT, 'GTE': GTE}
+# Conditional jumps after cmp, fused with it into one instruction that jumps when the test holds
+JUMPS = {'je': JE, 'jne': JNE, 'jl': JL, 'jle': JLE, 'jg': JG, 'jge': JGE}
+
+OPERATIONS = {
+    ADD: operator.add, SUB: operator.sub, MUL: operator.mul, DIV: operator.truediv, MOD: operator.mod,
+    AND: lambda a, b: a and b, OR: lambda a, b: a or b,
+    EQ: operator.eq, NEQ: operator.ne, LT: operator.lt, LTE: operator.le, GT: operator.gt, GTE: operator.ge,
+    JE: operator.eq, JNE: operator.ne, JL: operator.lt, JLE: operator.le, JG: operator.gt, JGE: operator.ge,
+}
+
+# Operand kinds, in the low two bits of an encoded operand
+REGISTER, CONSTANT, GLOBAL, FRAME = range(4)
+AX, BP, SP = range(3)   # Indexes of the reserved registers
+
+REGISTER_PATTERN = re.compile(r'r\d+$')
+FRAME_PATTERN = re.compile(r'\[bp([+-]\d+)\]$')
+LABEL_PATTERN = re.compile(r'[A-Za-z_]\w*:$')
+
+MEMORY_CYCLES = 3       # Extra cycles for each memory operand or stack access
+STACK_WORDS = 1 << 16
+
+
+def split_operands(text):
+    """Comma-separated operands, keeping commas inside quoted literals"""
+    operands = []
+    current = ''
+    quoted = False
+    for char in text:
+        if char == "'":
+            quoted = not quoted
+        if char == ',' and not quoted:
+            operands.append(current.strip())
+            current = ''
+        else:
+            current += char
+    if current.strip():
+        operands.append(current.strip())
+    return operands
+
+
+class MachineCode:
+    """Assembled target code: the instruction stream and the tables its operands index"""
+    def __init__(self):
+        self.code = array('i')  # Four ints per instruction
+        self.registers = list(RESERVED)
+        self.constants = []
+        self.globals = []       # Names, whose cells start out holding the name as the Executor's do
+        self.source = []        # Assembly text per instruction, for error messages
+
+    def __len__(self):
+        return len(self.code) // 4
+
+    def size(self):
+        """Bytes in the encoded instruction stream"""
+        return len(self.code) * self.code.itemsize
+
+
+class Assembler:
+    """Encodes TargetCodeGenerator output into MachineCode.
+
+    A cmp or test and the conditional jump after it become one instruction.
+    Jumps and calls hold the offset of their target from themselves. The
+    stack is addressed in words, so byte offsets and byte amounts added to
+    sp are divided by WORD.
+    """
+
+    def __init__(self):
+        self.program = None
+        self.indexes = {}   # (kind, text) -> index in the program's tables
+
+    def assemble(self, text):
+        self.program = MachineCode()
+        self.indexes = {(REGISTER, name): index for index, name in enumerate(RESERVED)}
+        lines = [line.strip() for line in text.split('\n') if line.strip()]
+
+        # First pass: where every label points and which lines fuse into one instruction
+        labels = {}
+        statements = []
+        pending = None
+        for line in lines:
+            if LABEL_PATTERN.match(line):
+                labels[line[:-1]] = len(statements)
+                continue
+            mnemonic, _, rest = line.partition(' ')
+            operands = split_operands(rest)
+            if mnemonic in ('cmp', 'test'):
+                pending = (line, mnemonic, operands)
+                continue
+            if pending is not None:
+                if mnemonic not in JUMPS and mnemonic != 'jz':
+                    raise ValueError(f"'{pending[0]}' must be followed by a conditional jump")
+                line = f"{pending[0]}; {line}"
+                operands = pending[2] + operands
+                pending = None
+            elif mnemonic in JUMPS or mnemonic == 'jz':
+                raise ValueError(f"'{line}' needs a cmp or test before it")
+            statements.append((line, mnemonic, operands))
+        if pending is not None:
+            raise ValueError(f"'{pending[0]}' must be followed by a conditional jump")
+
+        for index, (line, mnemonic, operands) in enumerate(statements):
+            self.program.code.extend(self.encode(index, mnemonic, operands, labels))
+            self.program.source.append(line)
+        return self.program
+
+    def encode(self, index, mnemonic, operands, labels):
+        def target(label):
+            if label not in labels:
+                raise ValueError(f"Label {label} not found")
+            return labels[label] - index
+
+        if mnemonic == 'mov':
+            return (MOV, self.operand(operands[0]), self.operand(operands[1]), 0)
+        if mnemonic in ('add', 'sub') and len(operands) == 2:
+            # add sp, 8: the stack pointer moves in words
+            dest = self.operand(operands[0])
+            amount = int(operands[1]) // WORD if operands[0] in ('sp', 'bp') else operands[1]
+            return (ARITHMETIC[mnemonic.upper()], dest, dest, self.operand(str(amount)))
+        if mnemonic == 'jmp':
+            return (JMP, target(operands[0]), 0, 0)
+        if mnemonic == 'jz':
+            # test x, x; jz L
+            return (JZ, self.operand(operands[0]), 0, target(operands[2]))
+        if mnemonic in JUMPS:
+            return (JUMPS[mnemonic], self.operand(operands[0]), self.operand(operands[1]), target(operands[2]))
+        if mnemonic == 'call' and operands[0] == 'printf':
+            return (PRINT, self.operand(operands[1]), 0, 0)
+        if mnemonic == 'call':
+            return (CALL, target(operands[0]), 0, 0)
+        if mnemonic == 'ret':
+            return (RET, 0, 0, 0)
+        if mnemonic == 'hlt':
+            return (HLT, 0, 0, 0)
+        if mnemonic == 'push':
+            return (PUSH, self.operand(operands[0]), 0, 0)
+        if mnemonic == 'pop':
+            return (POP, self.operand(operands[0]), 0, 0)
+        opcode = ARITHMETIC.get(base_opcode(mnemonic.upper()))
+        if opcode is None or len(operands) != 3:
+            raise ValueError(f"Unknown instruction '{mnemonic} {', '.join(operands)}'")
+        return (opcode, self.operand(operands[0]), self.operand(operands[1]), self.operand(operands[2]))
+
+    def operand(self, text):
+        """Encode an operand as its table index shifted past its kind"""
+        frame = FRAME_PATTERN.match(text)
+        if frame:
+            offset = int(frame.group(1)) // WORD
+            return ((offset << 1) ^ (offset >> 31)) << 2 | FRAME   # Zigzag keeps it small and positive
+        if text in RESERVED or REGISTER_PATTERN.match(text):
+            return self.index(REGISTER, text, self.program.registers) << 2 | REGISTER
+        if is_literal(text) or text.startswith("'") or text in BOOLEAN_LITERALS or text == NONE:
+            key = len(self.program.constants)
+            index = self.indexes.setdefault((CONSTANT, text), key)
+            if index == key:
+                self.program.constants.append(None if text == NONE else parse_literal(text))
+            return index << 2 | CONSTANT
+        return self.index(GLOBAL, text, self.program.globals) << 2 | GLOBAL
+
+    def index(self, kind, text, table):
+        if (kind, text) not in self.indexes:
+            self.indexes[(kind, text)] = len(table)
+            table.append(text)
+        return self.indexes[(kind, text)]
+
+
+class TargetMachine:
+    """Runs MachineCode over one array of cells: registers, constants, globals, then the stack.
+
+    Loading turns operands into cell indexes, so an instruction whose
+    operands are registers, constants or globals runs without decoding.
+    One with a [bp±n] operand is marked framed and has its cells worked out
+    from bp each time. Counting follows the Executor: instructions run and
+    cycles (one per instruction plus MEMORY_CYCLES per memory operand or
+    stack access) are added up per straight-line run, from prefix sums.
+    """
+
+    def __init__(self, stack_words=STACK_WORDS):
+        self.stack_words = stack_words
+        self.cells = []
+        self.code = []          # Decoded: (opcode, a, b, c), with a framed flag on opcodes needing bp
+        self.prefix = [0]       # Cycles of the instructions before each index
+        self.source = []
+        self.stack_base = 0
+        self.output = []
+        self.executed = 0
+        self.cycles = 0
+
+    def load(self, program):
+        registers = len(program.registers)
+        constants = registers
+        globals_ = constants + len(program.constants)
+        self.stack_base = globals_ + len(program.globals)
+        self.cells = ([0] * registers + list(program.constants) + list(program.globals)
+                      + [None] * self.stack_words)
+        self.cells[SP] = self.cells[BP] = len(self.cells)
+        self.source = program.source
+
+        def cell(operand):
+            """(framed, cell index or word offset from bp) of an encoded operand"""
+            kind, value = operand & 3, operand >> 2
+            if kind == FRAME:
+                return True, (value >> 1) ^ -(value & 1)
+            return False, value + (0, constants, globals_)[kind]
+
+        self.code = []
+        self.prefix = [0]
+        encoded = program.code
+        for index in range(0, len(encoded), 4):
+            op, a, b, c = encoded[index:index + 4]
+            pc = index // 4
+            if op in (JMP, CALL):
+                operands = ()
+                a += pc
+            elif op in (RET, HLT):
+                operands = ()
+            elif op in (JZ, PUSH, POP, PRINT):
+                operands = (a,)
+            elif op in (MOV, JE, JNE, JL, JLE, JG, JGE):
+                operands = (a, b)
+            else:
+                operands = (a, b, c)
+            if op == JZ or op in JUMPS.values():
+                c += pc
+            cells = [cell(operand) for operand in operands]
+
+            memory = sum(framed or index >= globals_ for framed, index in cells)
+            if op in (PUSH, POP, CALL, RET):
+                memory += 1
+            self.prefix.append(self.prefix[-1] + 1 + MEMORY_CYCLES * memory)
+
+            if any(framed for framed, _ in cells):
+                # A negative opcode marks an instruction with [bp±n] operands
+                self.code.append((-1 - op, tuple(cells), None, c))
+            elif operands:
+                indexes = [index for _, index in cells] + [0, 0]
+                self.code.append((op, indexes[0], indexes[1], c if op == JZ or op in JUMPS.values()
+                                  else indexes[2]))
+            else:
+                self.code.append((op, a, 0, 0))
+
+    def run(self, program=None):
+        """Run from the first instruction until hlt, returning the printed output"""
+        if program is not None:
+            self.load(program)
+        cells = self.cells
+        code = self.code
+        prefix = self.prefix
+        output = self.output = []
+        stack_base = self.stack_base
+        top = len(cells)
+        executed = cycles = 0
+        pc = start = 0
+        end = len(code)
+
+        try:
+            while pc < end:
+                op, a, b, c = code[pc]
+                pc += 1
+
+                if op == MOV:
+                    cells[a] = cells[b]
+                elif op == ADD:
+                    cells[a] = cells[b] + cells[c]
+                elif op == JL:
+                    if cells[a] < cells[b]:
+                        executed += pc - start
+                        cycles += prefix[pc] - prefix[start]
+                        pc = start = c
+                elif op == JGE:
+                    if cells[a] >= cells[b]:
+                        executed += pc - start
+                        cycles += prefix[pc] - prefix[start]
+                        pc = start = c
+                elif op == JMP:
+                    executed += pc - start
+                    cycles += prefix[pc] - prefix[start]
+                    pc = start = a
+                elif op == SUB:
+                    cells[a] = cells[b] - cells[c]
+                elif op == MUL:
+                    cells[a] = cells[b] * cells[c]
+                elif op == JZ:
+                    if not cells[a]:
+                        executed += pc - start
+                        cycles += prefix[pc] - prefix[start]
+                        pc = start = c
+                elif op == PUSH:
+                    sp = cells[SP] - 1
+                    cells[sp] = cells[a]
+                    cells[SP] = sp
+                elif op == POP:
+                    sp = cells[SP]
+                    cells[a] = cells[sp]
+                    cells[SP] = sp + 1
+                elif op == CALL:
+                    sp = cells[SP] - 1
+                    if sp < stack_base:
+                        raise RecursionError("Stack overflow")
+                    cells[sp] = pc
+                    cells[SP] = sp
+                    executed += pc - start
+                    cycles += prefix[pc] - prefix[start]
+                    pc = start = a
+                elif op == RET:
+                    executed += pc - start
+                    cycles += prefix[pc] - prefix[start]
+                    sp = cells[SP]
+                    if sp >= top:
+                        pc = start = end    # Returning from the main program ends it
+                        continue
+                    pc = start = cells[sp]
+                    cells[SP] = sp + 1
+                elif op == PRINT:
+                    output.append(str(cells[a]))
+                elif op == HLT:
+                    break
+                elif op >= 0:
+                    if op >= JE:
+                        if OPERATIONS[op](cells[a], cells[b]):
+                            executed += pc - start
+                            cycles += prefix[pc] - prefix[start]
+                            pc = start = c
+                    else:
+                        cells[a] = OPERATIONS[op](cells[b], cells[c])
+                else:
+                    target = self.framed(-1 - op, a, c)
+                    if target is not None:
+                        executed += pc - start
+                        cycles += prefix[pc] - prefix[start]
+                        pc = start = target
+        except Exception as e:
+            raise RuntimeError(f"Error executing '{self.source[pc - 1]}': {str(e)}")
+        finally:
+            self.executed = executed + pc - start
+            self.cycles = cycles + prefix[pc] - prefix[start]
+        return '\n'.join(output)
+
+    def framed(self, op, operands, target):
+        """Run an instruction with [bp±n] operands; returns the jump target if it jumps"""
+        cells = self.cells
+        bp = cells[BP]
+        a, b, c = [bp + index if framed else index for framed, index in operands] + [None] * (3 - len(operands))
+        if op == MOV:
+            cells[a] = cells[b]
+        elif op == PUSH:
+            sp = cells[SP] - 1
+            cells[sp] = cells[a]
+            cells[SP] = sp
+        elif op == POP:
+            sp = cells[SP]
+            cells[a] = cells[sp]
+            cells[SP] = sp + 1
+        elif op == PRINT:
+            self.output.append(str(cells[a]))
+        elif op == JZ:
+            return target if not cells[a] else None
+        elif op >= JE:
+            return target if OPERATIONS[op](cells[a], cells[b]) else None
+        else:
+            cells[a] = OPERATIONS[op](cells[b], cells[c])
+        return None
+
+
+def run_target(target_code, machine=None):
+    """Assemble target code and run it, returning the printed output"""
+    machine = machine or TargetMachine()
+    return machine.run(Assembler().assemble(target_code))
\ No newline at end of file
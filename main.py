@@ -1,21 +1,19 @@
-from lexer import tokenize
-from parser import Parser
-from semantic import SemanticAnalyzer
-from interme_code import IntermediateCodeGenerator
+from pipeline import CompilationSession
 import tkinter as tk
 from guie import CompilerGUI
 
 def test_compiler(source_code):
     try:
+        session = CompilationSession(source_code)
+
         # Tokenization
-        tokens = tokenize(source_code)
+        tokens = session.tokens()
         print("Tokens generated successfully:")
         for token in tokens:
             print(f"{token.type}: {token.value} (Line {token.line}, Column {token.column})")
         
         # Parsing
-        parser = Parser(tokens)
-        parse_tree, ast = parser.parse()
+        parse_tree, ast = session.parse_tree(), session.ast()
         
         print("\nParse Tree:")
         print(parse_tree)
@@ -24,15 +22,14 @@ def test_compiler(source_code):
         print(ast)
         
         # Print any errors
-        if parser.errors:
+        if session.syntax_errors():
             print("\nParser errors found:")
-            for error in parser.errors:
+            for error in session.syntax_errors():
                 print(f"Line {error['line']}, Column {error['column']}: {error['message']}")
             return False
         
         # Semantic Analysis
-        analyzer = SemanticAnalyzer()
-        semantic_errors = analyzer.analyze(ast)
+        semantic_errors = session.semantic_errors()
         
         if semantic_errors:
             print("\nSemantic errors found:")
@@ -41,8 +38,7 @@ def test_compiler(source_code):
             return False
         
         # Intermediate Code Generation
-        codegen = IntermediateCodeGenerator()
-        intermediate_code = codegen.generate(ast)
+        intermediate_code = session.intermediate()
         print("\nIntermediate Code:")
         print("\n".join(intermediate_code))
         
@@ -1,18 +1,237 @@
+import io
+from array import array
+from traversal import dump
+
+# Every AST node kind, indexed by its integer kind tag
+KINDS = [
+    'Program', 'Declaration', 'Assignment', 'Output', 'IfStatement', 'WhileLoop', 'Block',
+    'Function', 'Parameters', 'Parameter', 'Return', 'FunctionCall', 'BinaryOp',
+    'Variable', 'Number', 'String', 'Boolean', 'Type', 'Name', 'ReturnType',
+    'NoValue', 'NoReturnValue', 'Unknown', 'Break',
+]
+KIND = {name: index for index, name in enumerate(KINDS)}
+
+
 class ASTNode:
-    def __init__(self, node_type, children=None, value=None, line=None, column=None):
-        self.type = node_type
-        self.children = children or []
+    """Base of the per-kind node classes; ASTNode(node_type, ...) builds the class for node_type"""
+    __slots__ = ('value', 'line', 'column')
+    kind = None
+    type = None
+    children = ()       # Leaf kinds share one empty tuple
+    address = None      # (frame depth, slot index), set on Variables by semantic analysis
+    frame_size = None   # Slots needed by a Program or Function frame
+    data_type = None    # Resolved type of an expression, set by semantic analysis
+    symbol = None       # Symbol a Variable or FunctionCall resolved to
+
+    def __new__(cls, node_type=None, children=None, value=None, line=None, column=None):
+        if cls is ASTNode:
+            if node_type not in NODE_CLASSES:
+                raise ValueError(f"Unknown AST node type '{node_type}'")
+            cls = NODE_CLASSES[node_type]
+        return object.__new__(cls)
+
+    def __init__(self, node_type=None, children=None, value=None, line=None, column=None):
         self.value = value
         self.line = line
         self.column = column
-    
+        if children:
+            raise ValueError(f"{self.type} nodes have no children")
+
     def __repr__(self, level=0):
-        ret = "  " * level + f"{self.type}"
-        if self.value is not None:
-            ret += f": {self.value}"
-        if self.line is not None:
-            ret += f" (Line: {self.line}, Column: {self.column})"
-        ret += "\n"
-        for child in self.children:
-            ret += child.__repr__(level + 1)
-        return ret
\ No newline at end of file
+        out = io.StringIO()
+        dump(self, out, ast_label, level)
+        return out.getvalue()
+
+
+class InnerNode(ASTNode):
+    __slots__ = ('children',)
+
+    def __init__(self, node_type=None, children=None, value=None, line=None, column=None):
+        self.children = children or []
+        self.value = value
+        self.line = line
+        self.column = column
+
+
+class ScopeNode(InnerNode):
+    __slots__ = ('frame_size',)
+
+    def __init__(self, node_type=None, children=None, value=None, line=None, column=None):
+        InnerNode.__init__(self, node_type, children, value, line, column)
+        self.frame_size = None
+
+
+class LiteralNode(ASTNode):
+    __slots__ = ('data_type',)
+
+    def __init__(self, node_type=None, children=None, value=None, line=None, column=None):
+        ASTNode.__init__(self, node_type, children, value, line, column)
+        self.data_type = None
+
+
+class VariableNode(LiteralNode):
+    __slots__ = ('address', 'symbol')
+
+    def __init__(self, node_type=None, children=None, value=None, line=None, column=None):
+        LiteralNode.__init__(self, node_type, children, value, line, column)
+        self.address = None
+        self.symbol = None
+
+
+class OperatorNode(InnerNode):
+    __slots__ = ('data_type',)
+
+    def __init__(self, node_type=None, children=None, value=None, line=None, column=None):
+        InnerNode.__init__(self, node_type, children, value, line, column)
+        self.data_type = None
+
+
+class CallNode(OperatorNode):
+    __slots__ = ('symbol',)
+
+    def __init__(self, node_type=None, children=None, value=None, line=None, column=None):
+        OperatorNode.__init__(self, node_type, children, value, line, column)
+        self.symbol = None
+
+
+LEAF_KINDS = {'Variable', 'Number', 'String', 'Boolean', 'Type', 'Name', 'ReturnType',
+              'NoValue', 'NoReturnValue', 'Unknown', 'Break'}
+SCOPE_KINDS = {'Program', 'Function'}
+LITERAL_KINDS = {'Number', 'String', 'Boolean'}
+
+
+def node_class(name):
+    if name == 'Variable':
+        base = VariableNode
+    elif name == 'FunctionCall':
+        base = CallNode
+    elif name == 'BinaryOp':
+        base = OperatorNode
+    elif name in LITERAL_KINDS:
+        base = LiteralNode
+    elif name in SCOPE_KINDS:
+        base = ScopeNode
+    elif name in LEAF_KINDS:
+        base = ASTNode
+    else:
+        base = InnerNode
+    return type(f"{name}Node", (base,), {'__slots__': (), 'kind': KIND[name], 'type': name})
+
+
+NODE_CLASSES = {name: node_class(name) for name in KINDS}
+
+
+def ast_label(node):
+    label = node.type
+    if node.value is not None:
+        label += f": {node.value}"
+    if node.line is not None:
+        label += f" (Line: {node.line}, Column: {node.column})"
+    return label
+
+
+def write_ast(node, out):
+    """Stream an AST dump, in the same format as repr(node), to a file-like object"""
+    dump(node, out, ast_label)
+
+
+def dispatch_table(visitor, prefix, default):
+    """Bound visitor methods indexed by node kind, e.g. table[node.kind](node)"""
+    return [getattr(visitor, prefix + name, default) for name in KINDS]
+
+
+class ColumnarAST:
+    """A whole tree as parallel arrays, one entry per node in preorder.
+
+    Child links are first_child / next_sibling indexes (-1 for none); values
+    are indexes into a table of distinct values. Semantic-analysis results
+    (address, frame_size, data_type, symbol) are not stored.
+    """
+
+    def __init__(self):
+        self.kinds = array('B')
+        self.values = array('i')
+        self.lines = array('i')
+        self.columns = array('i')
+        self.first_child = array('i')
+        self.next_sibling = array('i')
+        self.value_table = [None]
+
+    def __len__(self):
+        return len(self.kinds)
+
+    @classmethod
+    def encode(cls, root):
+        """Flatten a node tree without recursion"""
+        columns = cls()
+        value_ids = {None: 0}
+        last_child = {}  # parent index -> index of its most recently appended child
+        stack = [(root, -1)]
+        while stack:
+            node, parent = stack.pop()
+            index = len(columns.kinds)
+            value_id = value_ids.get(node.value)
+            if value_id is None:
+                value_id = value_ids[node.value] = len(columns.value_table)
+                columns.value_table.append(node.value)
+            columns.kinds.append(node.kind)
+            columns.values.append(value_id)
+            columns.lines.append(-1 if node.line is None else node.line)
+            columns.columns.append(-1 if node.column is None else node.column)
+            columns.first_child.append(-1)
+            columns.next_sibling.append(-1)
+
+            if parent >= 0:
+                previous = last_child.pop(parent, None)
+                if previous is None:
+                    columns.first_child[parent] = index
+                else:
+                    columns.next_sibling[previous] = index
+                last_child[parent] = index
+            children = node.children
+            for position in range(len(children) - 1, -1, -1):
+                stack.append((children[position], index))
+        return columns
+
+    def children(self, index):
+        child = self.first_child[index]
+        while child != -1:
+            yield child
+            child = self.next_sibling[child]
+
+    def node(self, index):
+        """A standalone ASTNode for one entry, without its children"""
+        line, column = self.lines[index], self.columns[index]
+        return ASTNode(KINDS[self.kinds[index]], value=self.value_table[self.values[index]],
+                       line=None if line < 0 else line, column=None if column < 0 else column)
+
+    def decode(self):
+        """Rebuild the node tree; node 0 is the root.
+
+        Preorder puts every link after the node it leaves, so a link that
+        points backwards, out of the table or at a node already linked is
+        rejected with ValueError rather than building a cycle or shared node.
+        """
+        count = len(self.kinds)
+        if count and not (0 <= min(self.kinds) and max(self.kinds) < len(KINDS)):
+            raise ValueError("Node table has an unknown node kind")
+        nodes = [self.node(index) for index in range(count)]
+        first_child, next_sibling = self.first_child, self.next_sibling
+        linked = bytearray(count)
+        for index, node in enumerate(nodes):
+            child = first_child[index]
+            if child == -1:
+                continue
+            children = []
+            previous = index
+            while child != -1:
+                if not previous < child < count or linked[child]:
+                    raise ValueError(f"Node {index} has an invalid child link to {child}")
+                linked[child] = 1
+                children.append(nodes[child])
+                previous = child
+                child = next_sibling[child]
+            if not isinstance(node, InnerNode):
+                raise ValueError(f"{node.type} node {index} has children")
+            node.children = children
+        return nodes[0] if nodes else None
\ No newline at end of file
@@ -0,0 +1,78 @@
+# Untyped TAC opcode for each source operator
+OPERATOR_OPCODES = {
+    '+': 'ADD',
+    '-': 'SUB',
+    '*': 'MUL',
+    '/': 'DIV',
+    '%': 'MOD',
+    '&&': 'AND',
+    '||': 'OR',
+    '==': 'EQ',
+    '!=': 'NEQ',
+    '<': 'LT',
+    '<=': 'LTE',
+    '>': 'GT',
+    '>=': 'GTE'
+}
+
+# Typed opcodes put a one-letter operand type in front of the untyped name. Every runtime still
+# runs them on the untyped handler, so the prefix records what analysis proved and nothing more
+TYPE_PREFIXES = {'Ginti': 'I', 'PointWala': 'F', 'Baat': 'S', 'HaaNaa': 'B'}
+PREFIX_TYPES = {prefix: data_type for data_type, prefix in TYPE_PREFIXES.items()}
+
+NUMERIC_OPS = ('ADD', 'SUB', 'MUL', 'DIV', 'MOD', 'EQ', 'NEQ', 'LT', 'LTE', 'GT', 'GTE')
+TYPED_OPS = {}  # Typed opcode -> untyped opcode
+for prefix, ops in (('I', tuple(op for op in NUMERIC_OPS if op != 'DIV')), ('F', NUMERIC_OPS),
+                    ('S', ('EQ', 'NEQ')), ('B', ('EQ', 'NEQ', 'AND', 'OR'))):
+    for op in ops:
+        TYPED_OPS[prefix + op] = op
+TYPED_OPS['SCONCAT'] = 'ADD'   # Baat + Baat
+
+# A comparison feeding only an IF_FALSE fuses with it into IF_NOT_<comparison> a b GOTO L,
+# which jumps to L when the comparison does not hold
+COMPARISONS = ('EQ', 'NEQ', 'LT', 'LTE', 'GT', 'GTE')
+BRANCH_OPS = {}     # Fused branch opcode -> the comparison opcode it tests
+for op in COMPARISONS + tuple(TYPED_OPS):
+    if TYPED_OPS.get(op, op) in COMPARISONS:
+        BRANCH_OPS['IF_NOT_' + op] = op
+CONDITIONAL_JUMPS = {'IF_FALSE'} | set(BRANCH_OPS)
+
+
+def typed_opcode(node):
+    """TAC opcode for a BinaryOp, typed when semantic analysis resolved its operands"""
+    op = OPERATOR_OPCODES.get(node.value, node.value)
+    left, right = node.children[0].data_type, node.children[1].data_type
+    if node.data_type is None or left not in TYPE_PREFIXES or right not in TYPE_PREFIXES:
+        return op
+    if op == 'ADD' and node.data_type == 'Baat':
+        return 'SCONCAT'
+    operand_type = 'PointWala' if 'PointWala' in (left, right) or op == 'DIV' else left  # '/' divides exactly
+    typed = TYPE_PREFIXES[operand_type] + op
+    return typed if typed in TYPED_OPS else op
+
+
+def base_opcode(op):
+    """The untyped opcode behind a typed one; untyped opcodes map to themselves"""
+    return TYPED_OPS.get(op, op)
+
+
+def opcode_type(op):
+    """Operand type a typed opcode was specialised for, or None if untyped"""
+    if op == 'SCONCAT':
+        return 'Baat'
+    if op in TYPED_OPS:
+        return PREFIX_TYPES[op[0]]
+    return None
+
+
+def is_pure(op):
+    """Whether an unused result may be dropped: LOAD, STORE and typed ops that cannot fail"""
+    if op in ('LOAD', 'STORE'):
+        return True
+    return opcode_type(op) is not None and base_opcode(op) not in ('DIV', 'MOD')
+
+
+def branch_opcode(op):
+    """The fused branch for a comparison opcode, or None if op is not a comparison"""
+    branch = 'IF_NOT_' + op
+    return branch if branch in BRANCH_OPS else None
\ No newline at end of file
@@ -1,117 +1,285 @@
-import re
+from collections import Counter
+from opcodes import BRANCH_OPS, base_opcode, opcode_type, is_pure
+from executor import BINARY_OPS, written_name, is_literal
+from cfg import JUMPS, ControlFlowGraph, build_graphs, flatten, solve, liveness, read_names, read_positions, union
+from ssa import SSAForm
+from loops import LoopOptimizer, NameSupply
+from peephole import PeepholeOptimizer
+from vm import TEMP_PATTERN
+
+# Optimizer method for each pass name, in the default order
+PASSES = {
+    'propagate': 'fold_constants_and_propagate',
+    'dead_code': 'eliminate_dead_code',
+    'loops': 'optimize_loops',
+    'copies': 'propagate_copies',
+    'ssa': 'optimize_ssa',
+    'unreachable': 'remove_unreachable_code',
+    'peephole': 'optimize_peephole',
+}
 
 class Optimizer:
-    def __init__(self, tac_instructions):
+    def __init__(self, tac_instructions, passes=None, rules=None):
         self.original = tac_instructions
         self.optimized = []
+        self.graphs = []    # One ControlFlowGraph per function, then the main program
+        self.passes = list(PASSES) if passes is None else passes
+        self.stats = Counter()  # What the passes that keep counts did
+        self.rules = rules      # Peephole rules to apply, all of them if None
 
     def is_constant(self, value):
-        return re.match(r'^-?\d+(\.\d+)?$', str(value)) is not None
+        """Whether value is the text of a number: digits, optionally signed, with an optional fraction"""
+        text = str(value)
+        if text.startswith('-'):
+            text = text[1:]
+        whole, point, fraction = text.partition('.')
+        return whole.isdecimal() and (fraction.isdecimal() or not point)
 
-    def fold_constants_and_propagate(self):
-        temp_values = {}     # Track values of temporaries
-        variable_values = {} # Track values of named variables
+    def keeps_writes(self, graph, name):
+        """Whether a redundant write to name must stay: a function's named variables are local because it writes them"""
+        return graph.name is not None and not TEMP_PATTERN.match(name)
 
-        new_code = []
+    def fold_constants_and_propagate(self):
+        """Forward constant propagation over each CFG, then folding block by block.
 
-        for instr in self.original:
-            parts = instr.strip().split()
+        A fact maps a name to the constant text it holds on every path
+        reaching that point; a name missing from it is not a constant.
+        Facts leaving a block keep only the names live there, so their size
+        follows the live variables rather than every name assigned so far.
+        """
+        for graph in self.graphs:
+            live_out, _ = liveness(graph, graph.shared_variables())
+            inputs, _ = solve(graph, lambda block, facts: self.propagate(graph, block, facts,
+                                                                         live_out[block.index])[1],
+                              meet_constants, {})
+            for block in graph.blocks:
+                if inputs[block.index] is not None:
+                    block.instructions = self.propagate(graph, block, inputs[block.index])[0]
 
-            if not parts:
-                continue
+    def propagate(self, graph, block, facts, live=None):
+        """Rewrite a block with the constants known on entry; returns (instructions, facts on exit)"""
+        facts = dict(facts)
+        code = []
+        for parts in block.instructions:
+            op = parts[0]
 
             # Handle arithmetic ops
-            if len(parts) == 4 and parts[0] in {'ADD', 'SUB', 'MUL', 'DIV'}:
-                op, a, b, result = parts
-                a_val = temp_values.get(a, variable_values.get(a, a))
-                b_val = temp_values.get(b, variable_values.get(b, b))
-
-                if self.is_constant(a_val) and self.is_constant(b_val):
-                    a_num = float(a_val)
-                    b_num = float(b_val)
-                    res = None
-                    if op == 'ADD': res = a_num + b_num
-                    elif op == 'SUB': res = a_num - b_num
-                    elif op == 'MUL': res = a_num * b_num
-                    elif op == 'DIV': res = a_num / b_num if b_num != 0 else 0
-
-                    res = int(res) if res.is_integer() else res
-                    temp_values[result] = str(res)
-                    new_code.append(f"LOAD {res} {result}")
-                else:
-                    temp_values[result] = result
-                    new_code.append(instr)
-
-            # Handle LOAD
-            elif len(parts) == 3 and parts[0] == 'LOAD':
-                _, value, target = parts
-                const_val = temp_values.get(value, variable_values.get(value, value))
-                if self.is_constant(const_val):
-                    variable_values[target] = const_val
+            if op in BINARY_OPS:
+                _, a, b, result = parts
+                a_val = facts.get(a, a)
+                b_val = facts.get(b, b)
+
+                res = None
+                if (base_opcode(op) in {'ADD', 'SUB', 'MUL', 'DIV'}
+                        and self.is_constant(a_val) and self.is_constant(b_val)):
+                    if opcode_type(op) is None:
+                        res = self.fold_untyped(base_opcode(op), a_val, b_val)
+                    elif opcode_type(op) != 'Baat':
+                        res = self.fold_typed(base_opcode(op), a_val, b_val)
+
+                if res is not None:
+                    facts[result] = str(res)
+                    parts = ['LOAD', str(res), result]
                 else:
-                    variable_values.pop(target, None)
-                new_code.append(f"LOAD {const_val} {target}")
+                    facts.pop(result, None)
+                    parts = [op, a_val, b_val, result]
 
-            # Handle STORE
-            elif len(parts) == 3 and parts[0] == 'STORE':
+            # Handle LOAD and STORE; writing the constant a name already holds is redundant
+            elif op in ('LOAD', 'STORE'):
                 _, source, target = parts
-                value = temp_values.get(source, variable_values.get(source, source))
-                if self.is_constant(value):
-                    variable_values[target] = value
-                    new_code.append(f"LOAD {value} {target}")
+                value = facts.get(source, source) if op == 'STORE' else source
+                if not self.is_constant(value):
+                    facts.pop(target, None)
+                elif facts.get(target) == value and not self.keeps_writes(graph, target):
+                    continue
                 else:
-                    variable_values.pop(target, None)
-                    new_code.append(f"STORE {value} {target}")
+                    facts[target] = value
+                    parts = ['LOAD', value, target]
+
+            # Handle PRINT and the other single-operand reads
+            elif op in ('PRINT', 'IF_FALSE', 'ARG', 'RETURN') and len(parts) > 1:
+                value = facts.get(parts[1], parts[1])
+                if self.is_constant(value):
+                    parts = [op, value] + parts[2:]
+
+            # A fused compare-and-branch reads two operands
+            elif op in BRANCH_OPS:
+                parts = [op, facts.get(parts[1], parts[1]), facts.get(parts[2], parts[2])] + parts[3:]
+
+            # The callee may assign any global
+            elif op == 'CALL':
+                facts = {name: value for name, value in facts.items() if TEMP_PATTERN.match(name)}
+                if len(parts) > 2:
+                    facts.pop(parts[2], None)
 
-            # Handle PRINT
-            elif len(parts) == 2 and parts[0] == 'PRINT':
-                val = temp_values.get(parts[1], variable_values.get(parts[1], parts[1]))
-                new_code.append(f"PRINT {val}")
+            code.append(parts)
+        if live is not None:
+            facts = {name: value for name, value in facts.items() if name in live}
+        return code, facts
 
-            else:
-                new_code.append(instr)
+    def propagate_copies(self):
+        """Forward copy propagation over each CFG, dropping redundant STOREs on the way.
 
-        self.optimized = new_code
+        A fact maps a name to the name it was copied from by a STORE, on
+        every path reaching that point, while neither has been assigned
+        since; later reads of the copy read the original instead. A STORE
+        between names the facts already show equal goes.
+        """
+        for graph in self.graphs:
+            live_out, _ = liveness(graph, graph.shared_variables())
+            inputs, _ = solve(graph, lambda block, copies: self.forward_copies(graph, block, copies,
+                                                                               live_out[block.index])[1],
+                              meet_constants, {})
+            for block in graph.blocks:
+                if inputs[block.index] is not None:
+                    block.instructions = self.forward_copies(graph, block, inputs[block.index])[0]
+
+    def forward_copies(self, graph, block, copies, live=None):
+        """Rewrite a block's reads through the copies known on entry; returns (instructions, copies on exit)"""
+        copies = dict(copies)
+        copied = {}     # Name -> names that may hold a copy of it
+        for name, source in copies.items():
+            copied.setdefault(source, []).append(name)
+        code = []
+        for parts in block.instructions:
+            positions = [i for i in read_positions(parts) if parts[i] in copies]
+            if positions:
+                parts = list(parts)
+                for i in positions:
+                    parts[i] = copies[parts[i]]
+
+            op = parts[0]
+            if op == 'STORE':
+                _, source, target = parts
+                if ((source == target or copies.get(target) == source)
+                        and not self.keeps_writes(graph, target)):
+                    continue
+            elif op == 'CALL':
+                # The callee may assign any global
+                copies = {name: source for name, source in copies.items()
+                          if TEMP_PATTERN.match(name) and TEMP_PATTERN.match(source)}
+
+            dest = written_name(parts)
+            if dest is not None:
+                copies.pop(dest, None)
+                for name in copied.pop(dest, ()):
+                    if copies.get(name) == dest:
+                        del copies[name]
+                if op == 'STORE' and not is_literal(source) and source != dest:
+                    copies[dest] = source
+                    copied.setdefault(source, []).append(dest)
+            code.append(parts)
+        if live is not None:
+            copies = {name: source for name, source in copies.items() if name in live}
+        return code, copies
+
+    def fold_untyped(self, op, a_val, b_val):
+        a_num = float(a_val)
+        b_num = float(b_val)
+        res = None
+        if op == 'ADD': res = a_num + b_num
+        elif op == 'SUB': res = a_num - b_num
+        elif op == 'MUL': res = a_num * b_num
+        elif op == 'DIV': res = a_num / b_num if b_num != 0 else 0
+
+        return int(res) if res.is_integer() else res
+
+    def fold_typed(self, op, a_val, b_val):
+        """Fold a typed numeric op with the runtime's own int/float arithmetic"""
+        a_num = float(a_val) if '.' in a_val else int(a_val)
+        b_num = float(b_val) if '.' in b_val else int(b_val)
+        if op == 'DIV' and b_num == 0:
+            return None  # Left for the runtime to report
+        res = None
+        if op == 'ADD': res = a_num + b_num
+        elif op == 'SUB': res = a_num - b_num
+        elif op == 'MUL': res = a_num * b_num
+        elif op == 'DIV': res = a_num / b_num
+
+        return res if self.is_constant(res) else None
 
     def eliminate_dead_code(self):
-        used_vars = set()
-        final_code = []
+        """Drop writes nothing reads afterwards, using liveness across blocks.
 
-        for instr in reversed(self.optimized):
-            parts = instr.strip().split()
+        Only writes that cannot fail at run time are dropped: LOAD, STORE and
+        typed ops other than division and modulo.
+        """
+        for graph in self.graphs:
+            # A function's named variables may be globals, so they stay live at its exit
+            variables = graph.variables()
+            boundary = variables if graph.name is not None else set()
+            live_out, _ = solve(graph, lambda block, live: self.sweep(block, live, variables)[1],
+                                union, boundary, forward=False, initial=set())
+            for block in graph.blocks:
+                block.instructions = self.sweep(block, live_out[block.index], variables)[0]
 
-            if not parts:
+    def sweep(self, block, live, variables):
+        """Remove dead writes from a block given the names live at its end; returns (instructions, live at start)"""
+        live = set(live)
+        code = []
+        for parts in reversed(block.instructions):
+            op = parts[0]
+            dest = written_name(parts)
+            if dest is not None and dest not in live and self.removable(op):
                 continue
+            if dest is not None:
+                live.discard(dest)
+            live.update(read_names(parts))
+            if op == 'CALL':
+                live.update(variables)  # The callee may read any global
+            code.append(parts)
+        code.reverse()
+        return code, live
 
-            if parts[0] == "PRINT":
-                used_vars.add(parts[1])
-                final_code.insert(0, instr)
-
-            elif parts[0] == "LOAD" and len(parts) == 3:
-                val, var = parts[1], parts[2]
-                if var in used_vars:
-                    final_code.insert(0, instr)
-                    if not self.is_constant(val):
-                        used_vars.add(val)
+    def removable(self, op):
+        return is_pure(op)
 
-            elif parts[0] == "STORE" and len(parts) == 3:
-                val, var = parts[1], parts[2]
-                if var in used_vars:
-                    final_code.insert(0, instr)
-                    used_vars.add(val)
+    def optimize_ssa(self):
+        """Sparse conditional constant propagation, value numbering and aggressive DCE in SSA form"""
+        for index, graph in enumerate(self.graphs):
+            body = [parts for block in graph.blocks for parts in block.instructions]
+            ssa = SSAForm(graph)
+            ssa.propagate_constants()
+            ssa.number_values()
+            ssa.eliminate_dead_code()
+            if not ssa.destruct():
+                self.graphs[index] = ControlFlowGraph(body, graph.name, graph.header, graph.footer)
 
-            elif len(parts) == 4 and parts[0] in {"ADD", "SUB", "MUL", "DIV"}:
-                op, a, b, res = parts
-                if res in used_vars or res.startswith("t"):
-                    final_code.insert(0, instr)
-                    used_vars.update([a, b])
+    def optimize_loops(self):
+        """Loop-invariant code motion and strength reduction of induction variable products"""
+        names = NameSupply(self.graphs)
+        for graph in self.graphs:
+            self.stats.update(LoopOptimizer(graph, names).optimize())
 
-            else:
-                final_code.insert(0, instr)
+    def remove_unreachable_code(self):
+        """Drop blocks the entry cannot reach and labels no jump names, merging the blocks they split"""
+        for index, graph in enumerate(self.graphs):
+            reached = set(graph.reverse_postorder())
+            blocks = [block for block in graph.blocks if block in reached]
+            targets = {block.instructions[-1][-1] for block in blocks
+                       if block.instructions and block.instructions[-1][0] in JUMPS}
+            body = [parts for block in blocks for parts in block.instructions
+                    if parts[0] != 'LABEL' or parts[1] in targets]
+            self.graphs[index] = ControlFlowGraph(body, graph.name, graph.header, graph.footer)
 
-        self.optimized = final_code
+    def optimize_peephole(self):
+        """Rewrite short instruction windows by the peephole rule table, counting each rule's hits"""
+        peephole = PeepholeOptimizer(self.rules)
+        for index, graph in enumerate(self.graphs):
+            body = peephole.optimize([parts for block in graph.blocks for parts in block.instructions])
+            self.graphs[index] = ControlFlowGraph(body, graph.name, graph.header, graph.footer)
+        self.stats.update(peephole.hits)
 
     def optimize(self):
-        self.fold_constants_and_propagate()
-        self.eliminate_dead_code()
+        self.graphs = build_graphs(self.original)
+        for name in self.passes:
+            getattr(self, PASSES[name])()
+        self.optimized = flatten(self.graphs)
         return self.optimized
+
+
+def meet_constants(facts):
+    """Constants that agree on every incoming path"""
+    first = facts[0]
+    return {name: value for name, value in first.items()
+            if all(other.get(name) == value for other in facts[1:])}
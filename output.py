@@ -1,36 +1,59 @@
-from my_ast import ASTNode
+from my_ast import dispatch_table
+from traversal import walk
+from semantic import SemanticAnalyzer
 
 class OutputGenerator:
     def __init__(self):
-        self.variables = {}
+        self.frame = [None]   # Slot 0 links to the frame the function was defined in
+        self.variables = {}   # Names semantic analysis could not resolve
         self.functions = {}
         self.output_lines = []
         self.return_value = None
+        self.returning = False
         self.break_loop = False
+        self.evaluators = dispatch_table(self, 'eval_', self.generic_eval)
 
     def evaluate(self, node):
-        method_name = f"eval_{node.type}"
-        method = getattr(self, method_name, self.generic_eval)
-        return method(node)
+        return walk(self.evaluators, node)
 
     def generic_eval(self, node):
         for child in node.children:
-            self.evaluate(child)
+            yield child
+
+    def frame_at(self, depth):
+        frame = self.frame
+        for _ in range(depth):
+            frame = frame[0]
+        return frame
+
+    def load(self, node):
+        if node.address is None:
+            return self.variables.get(node.value, 0)
+        depth, index = node.address
+        return self.frame_at(depth)[index]
+
+    def store(self, node, value):
+        if node.address is None:
+            self.variables[node.value] = value
+        else:
+            depth, index = node.address
+            self.frame_at(depth)[index] = value
 
     def eval_Program(self, node):
+        self.frame = [None] + [0] * (node.frame_size or 0)
         for child in node.children:
-            self.evaluate(child)
+            yield child
+            if self.returning:
+                break
 
     def eval_Declaration(self, node):
         if len(node.children) >= 2:
-            var_name = node.children[1].value
-            value = self.evaluate(node.children[2]) if len(node.children) > 2 else None
-            self.variables[var_name] = value
+            value = (yield node.children[2]) if len(node.children) > 2 else None
+            self.store(node.children[1], value)
 
     def eval_Assignment(self, node):
-        var_name = node.children[0].value
-        value = self.evaluate(node.children[1])
-        self.variables[var_name] = value
+        value = yield node.children[1]
+        self.store(node.children[0], value)
 
     def eval_Number(self, node):
         return float(node.value) if '.' in node.value else int(node.value)
@@ -42,11 +65,11 @@ class OutputGenerator:
         return True if node.value == 'Sahi' else False
 
     def eval_Variable(self, node):
-        return self.variables.get(node.value, 0)
+        return self.load(node)
 
     def eval_BinaryOp(self, node):
-        left = self.evaluate(node.children[0])
-        right = self.evaluate(node.children[1])
+        left = yield node.children[0]
+        right = yield node.children[1]
         op = node.value
 
         try:
@@ -68,70 +91,92 @@ class OutputGenerator:
             return None
 
     def eval_Output(self, node):
-        value = self.evaluate(node.children[0])
+        value = yield node.children[0]
         self.output_lines.append(str(value))
 
     def eval_Function(self, node):
         name = node.children[0].value
-        self.functions[name] = node  # Store full AST node
+        self.functions[name] = (node, self.frame)  # AST node and defining frame
 
     def eval_FunctionCall(self, node):
         func_name = node.value
-        func_node = self.functions.get(func_name)
-        if not func_node:
+        if func_name not in self.functions:
             self.output_lines.append(f"Error: Function '{func_name}' not found")
             return None
+        func_node, defining_frame = self.functions[func_name]
 
         param_defs = func_node.children[1].children
         func_body = func_node.children[2]
 
-        args = [self.evaluate(arg) for arg in node.children]
+        args = []
+        for arg in node.children:
+            args.append((yield arg))
 
-        # Save previous scope
-        old_vars = self.variables.copy()
+        # New frame sized for the function's own locals
+        caller_frame = self.frame
+        self.frame = [defining_frame] + [0] * (func_node.frame_size or 0)
 
         # Bind parameters
         for i, param in enumerate(param_defs):
-            param_name = param.children[1].value
-            self.variables[param_name] = args[i]
+            self.store(param.children[1], args[i])
 
         # Execute function body
         self.return_value = None
-        self.evaluate(func_body)
+        yield func_body
+        self.returning = False
 
         # Restore scope
-        self.variables = old_vars
+        self.frame = caller_frame
         return self.return_value
 
     def eval_Return(self, node):
         if node.children:
-            self.return_value = self.evaluate(node.children[0])
+            self.return_value = yield node.children[0]
+        self.returning = True
 
     def eval_IfStatement(self, node):
-        condition = self.evaluate(node.children[0])
+        condition = yield node.children[0]
         if condition:
-            self.evaluate(node.children[1])  # if block
-        elif len(node.children) > 2:
-            self.evaluate(node.children[2])  # else block
+            yield node.children[1]  # if block
+            return
+        i = 2
+        while i < len(node.children):
+            if i + 1 < len(node.children):  # elif condition and block
+                if (yield node.children[i]):
+                    yield node.children[i + 1]
+                    return
+                i += 2
+            else:  # else block
+                yield node.children[i]
+                i += 1
 
     def eval_WhileLoop(self, node):
         condition_node = node.children[0]
         body_node = node.children[1]
-        while self.evaluate(condition_node):
-            self.evaluate(body_node)
+        while (yield condition_node):
+            yield body_node
+            if self.returning:
+                break
             if self.break_loop:
                 self.break_loop = False
                 break
 
     def eval_Block(self, node):
         for child in node.children:
-            self.evaluate(child)
+            yield child
+            if self.returning:
+                break
 
     def eval_Break(self, node):
         self.break_loop = True
 
 
-def generate_output_from_ast(ast):
+def generate_output_from_ast(ast, compiled=False):
+    if ast.frame_size is None:
+        SemanticAnalyzer().analyze(ast)  # Resolve variables to frame slots
+    if compiled:
+        from output_compiler import compile_output
+        return "\n".join(compile_output(ast)())
     generator = OutputGenerator()
     generator.evaluate(ast)
     return "\n".join(generator.output_lines)
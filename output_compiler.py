@@ -0,0 +1,317 @@
+import operator
+import sys
+from contextlib import contextmanager
+from my_ast import dispatch_table
+from traversal import MAX_DEPTH
+
+OPERATORS = {
+    '+': operator.add,
+    '-': operator.sub,
+    '*': operator.mul,
+    '/': operator.truediv,
+    '%': operator.mod,
+    '==': operator.eq,
+    '!=': operator.ne,
+    '<': operator.lt,
+    '<=': operator.le,
+    '>': operator.gt,
+    '>=': operator.ge,
+    '&&': lambda left, right: left and right,
+    '||': lambda left, right: left or right,
+}
+
+STATEMENTS = {'Program', 'Block', 'Declaration', 'Assignment', 'Output',
+              'Function', 'Return', 'IfStatement', 'WhileLoop'}
+COMPILE_FRAMES = 3  # Python frames compiling one level of the tree takes at most
+
+
+def nesting_depth(root):
+    """Levels in the tree below root, counted without recursion"""
+    deepest = 0
+    stack = [(root, 1)]
+    while stack:
+        node, depth = stack.pop()
+        deepest = max(deepest, depth)
+        stack.extend((child, depth + 1) for child in node.children)
+    return deepest
+
+
+@contextmanager
+def stack_room(frames):
+    """Let Python nest frames more calls than its default limit allows.
+
+    Closures only call other Python functions, which since CPython 3.11 use
+    no C stack, so the limit is only a counter and raising it is safe.
+    """
+    limit = sys.getrecursionlimit()
+    sys.setrecursionlimit(limit + frames)
+    try:
+        yield
+    finally:
+        sys.setrecursionlimit(limit)
+
+
+class OutputCompiler:
+    """Compiles an AST once into Python closures with the semantics of OutputGenerator.
+
+    Variables are read and written through the (depth, index) addresses
+    semantic analysis put on the AST. Statement closures return True when
+    a Wapis is unwinding. Closures call each other on the Python stack, so
+    compiling and running get as much room as the tree walker's explicit
+    stack: MAX_DEPTH nested levels, past which RecursionError is raised as
+    it is there. The tree's depth is checked before anything is compiled.
+    """
+
+    def __init__(self):
+        self.current = [None]   # Cell holding the active frame
+        self.variables = {}     # Names semantic analysis could not resolve
+        self.functions = {}
+        self.output_lines = []
+        self.return_value = [None]
+        self.compilers = dispatch_table(self, 'compile_', self.compile_generic)
+
+    def compile(self, node):
+        """Compile a Program node into a callable that runs it"""
+        depth = nesting_depth(node)
+        if depth > MAX_DEPTH:
+            raise RecursionError("maximum AST nesting depth exceeded")
+        with stack_room(COMPILE_FRAMES * depth):
+            program = self.statement(node)
+        size = node.frame_size or 0
+        current = self.current
+
+        def run():
+            current[0] = [None] + [0] * size
+            with stack_room(MAX_DEPTH):
+                program()
+            return self.output_lines
+        return run
+
+    def loader(self, node):
+        """Closure reading the variable a Variable node refers to"""
+        current = self.current
+        if node.address is None:
+            variables = self.variables
+            name = node.value
+            return lambda: variables.get(name, 0)
+        depth, index = node.address
+        if depth == 0:
+            return lambda: current[0][index]
+        if depth == 1:
+            return lambda: current[0][0][index]
+
+        def load():
+            frame = current[0]
+            for _ in range(depth):
+                frame = frame[0]
+            return frame[index]
+        return load
+
+    def storer(self, node, value):
+        """Closure evaluating value and writing it to the variable node refers to"""
+        current = self.current
+        if node.address is None:
+            variables = self.variables
+            name = node.value
+
+            def store_name():
+                variables[name] = value()
+            return store_name
+        depth, index = node.address
+        if depth == 0:
+            def store_local():
+                current[0][index] = value()
+            return store_local
+
+        def store():
+            result = value()
+            frame = current[0]
+            for _ in range(depth):
+                frame = frame[0]
+            frame[index] = result
+        return store
+
+    def statement(self, node):
+        if node.type in STATEMENTS:
+            return self.compilers[node.kind](node)
+        expression = self.expression(node)
+
+        def run():
+            expression()
+        return run
+
+    def expression(self, node):
+        return self.compilers[node.kind](node)
+
+    def sequence(self, nodes):
+        statements = [self.statement(child) for child in nodes]
+        if len(statements) == 1:
+            return statements[0]
+
+        def run():
+            for statement in statements:
+                if statement():
+                    return True
+        return run
+
+    def compile_generic(self, node):
+        body = self.sequence(node.children)
+
+        def run():
+            body()
+        return run
+
+    def compile_Program(self, node):
+        return self.sequence(node.children)
+
+    def compile_Block(self, node):
+        return self.sequence(node.children)
+
+    def compile_Declaration(self, node):
+        if len(node.children) < 2:
+            return lambda: None
+        if len(node.children) > 2:
+            value = self.expression(node.children[2])
+        else:
+            value = lambda: None
+        return self.storer(node.children[1], value)
+
+    def compile_Assignment(self, node):
+        return self.storer(node.children[0], self.expression(node.children[1]))
+
+    def compile_Number(self, node):
+        constant = float(node.value) if '.' in node.value else int(node.value)
+        return lambda: constant
+
+    def compile_String(self, node):
+        constant = str(node.value)
+        return lambda: constant
+
+    def compile_Boolean(self, node):
+        constant = node.value == 'Sahi'
+        return lambda: constant
+
+    def compile_Variable(self, node):
+        return self.loader(node)
+
+    def compile_BinaryOp(self, node):
+        left = self.expression(node.children[0])
+        right = self.expression(node.children[1])
+        op = node.value
+        function = OPERATORS.get(op)
+        output = self.output_lines
+        if function is None:
+            def unknown():
+                left()
+                right()
+            return unknown
+
+        def run():
+            a = left()
+            b = right()
+            try:
+                return function(a, b)
+            except Exception as e:
+                output.append(f"Error in operation {op}: {str(e)}")
+                return None
+        return run
+
+    def compile_Output(self, node):
+        value = self.expression(node.children[0])
+        output = self.output_lines
+
+        def run():
+            output.append(str(value()))
+        return run
+
+    def compile_Function(self, node):
+        name = node.children[0].value
+        params = [param.children[1] for param in node.children[1].children]
+        if all(param.address is not None for param in params):
+            params = [param.address[1] for param in params]
+        else:
+            params = None  # Unresolved parameters: leave the frame untouched
+        body = self.statement(node.children[2])
+        size = node.frame_size or 0
+        functions = self.functions
+        current = self.current
+
+        def run():
+            functions[name] = (params, body, size, current[0])
+        return run
+
+    def compile_FunctionCall(self, node):
+        name = node.value
+        args = [self.expression(arg) for arg in node.children]
+        functions = self.functions
+        output = self.output_lines
+        result = self.return_value
+        current = self.current
+
+        def run():
+            function = functions.get(name)
+            if function is None:
+                output.append(f"Error: Function '{name}' not found")
+                return None
+            params, body, size, defining_frame = function
+
+            frame = [defining_frame] + [0] * size
+            if params:
+                for param, arg in zip(params, args):
+                    frame[param] = arg()
+
+            caller_frame = current[0]
+            current[0] = frame
+            result[0] = None
+            body()
+            current[0] = caller_frame
+            return result[0]
+        return run
+
+    def compile_Return(self, node):
+        result = self.return_value
+        if node.children:
+            value = self.expression(node.children[0])
+        else:
+            value = lambda: None
+
+        def run():
+            result[0] = value()
+            return True
+        return run
+
+    def compile_IfStatement(self, node):
+        branches = [(self.expression(node.children[0]), self.statement(node.children[1]))]
+        otherwise = None
+        i = 2
+        while i < len(node.children):
+            if i + 1 < len(node.children):  # WarnaAgar condition and block
+                branches.append((self.expression(node.children[i]),
+                                 self.statement(node.children[i + 1])))
+                i += 2
+            else:  # Warna block
+                otherwise = self.statement(node.children[i])
+                i += 1
+
+        def run():
+            for condition, block in branches:
+                if condition():
+                    return block()
+            if otherwise is not None:
+                return otherwise()
+        return run
+
+    def compile_WhileLoop(self, node):
+        condition = self.expression(node.children[0])
+        body = self.statement(node.children[1])
+
+        def run():
+            while condition():
+                if body():
+                    return True
+        return run
+
+
+def compile_output(ast):
+    """Compile a resolved AST into a callable that returns the program's output lines"""
+    return OutputCompiler().compile(ast)
\ No newline at end of file
@@ -1,5 +1,20 @@
-from lexer import Token
+import io
+from collections import deque
+from lexer import Token, LexerError
 from my_ast import ASTNode
+from traversal import run, dump
+
+EOF_TOKEN = Token(None, 'EOF', -1, -1)
+
+# Binary operators, all left-associative; higher binds tighter
+BINARY_PRECEDENCE = {
+    '||': 1,
+    '&&': 2,
+    '==': 3, '!=': 3,
+    '<': 4, '<=': 4, '>': 4, '>=': 4,
+    '+': 5, '-': 5,
+    '*': 6, '/': 6, '%': 6,
+}
 
 class ParseTreeNode:
     def __init__(self, rule_name, children=None, token=None):
@@ -8,32 +23,89 @@ class ParseTreeNode:
         self.token = token
     
     def __repr__(self, level=0):
-        ret = "  " * level + f"{self.rule}"
-        if self.token:
-            ret += f" [Token: {self.token.value}]"
-        ret += "\n"
-        for child in self.children:
-            ret += child.__repr__(level + 1)
-        return ret
+        out = io.StringIO()
+        dump(self, out, parse_tree_label, level)
+        return out.getvalue()
 
-class Parser:
+
+def parse_tree_label(node):
+    if node.token:
+        return f"{node.rule} [Token: {node.token.value}]"
+    return node.rule
+
+
+def write_parse_tree(node, out):
+    """Stream a parse-tree dump, in the same format as repr(node), to a file-like object"""
+    dump(node, out, parse_tree_label)
+
+class DiscardedChildren(list):
+    """Children list of NO_PARSE_TREE: appends are dropped"""
+    def append(self, node):
+        pass
+
+
+# Returned for every parse-tree node when the parser builds only the AST
+NO_PARSE_TREE = ParseTreeNode("Discarded")
+NO_PARSE_TREE.children = DiscardedChildren()
+
+
+def no_parse_tree(rule_name, children=None, token=None):
+    return NO_PARSE_TREE
+
+
+class TokenStream:
+    """Bounded-lookahead view over a token list or a streaming token iterator"""
     def __init__(self, tokens):
-        self.tokens = tokens
-        self.pos = 0
+        self.iterator = iter(tokens)
+        self.buffer = deque()
+        self.consumed = 0
+
+    def fill(self, count):
+        while len(self.buffer) < count:
+            token = next(self.iterator, None)
+            if token is None:
+                return False
+            self.buffer.append(token)
+        return True
+
+    def peek(self, n=0):
+        if n < len(self.buffer) or self.fill(n + 1):
+            return self.buffer[n]
+        return EOF_TOKEN
+
+    def advance(self):
+        self.consumed += 1
+        if self.buffer or self.fill(1):
+            return self.buffer.popleft()
+        return EOF_TOKEN
+
+    def at_end(self):
+        return not (self.buffer or self.fill(1))
+
+
+class Parser:
+    def __init__(self, tokens, build_parse_tree=True):
+        self.stream = TokenStream(tokens)
         self.errors = []
-        self.parse_tree = ParseTreeNode("Program")
+        # AST-only mode skips the concrete tree; parse() then returns None for it
+        self.build_parse_tree = build_parse_tree
+        self.tree = ParseTreeNode if build_parse_tree else no_parse_tree
+        self.parse_tree = ParseTreeNode("Program") if build_parse_tree else None
         self.ast = ASTNode('Program')
         self.sync_tokens = [';', '}', 'Bas']
 
+    @property
+    def pos(self):
+        return self.stream.consumed
+
     def current(self):
-        return self.tokens[self.pos] if self.pos < len(self.tokens) else Token(None, 'EOF', -1, -1)
+        return self.stream.peek(0)
 
     def peek(self, n=1):
-        return self.tokens[self.pos + n] if self.pos + n < len(self.tokens) else Token(None, 'EOF', -1, -1)
+        return self.stream.peek(n)
 
     def advance(self):
-        self.pos += 1
-        return self.tokens[self.pos - 1] if self.pos - 1 < len(self.tokens) else Token(None, 'EOF', -1, -1)
+        return self.stream.advance()
 
     def expect(self, expected_types, message=None):
         token = self.current()
@@ -58,62 +130,73 @@ class Parser:
         return self.current()
 
     def parse(self):
-        while self.pos < len(self.tokens):
-            try:
-                stmt_parse, stmt_ast = self.statement()
-                if stmt_parse and stmt_ast:
+        while not self.stream.at_end():
+            stmt_parse, stmt_ast = self.parse_statement()
+            if stmt_parse and stmt_ast:
+                if self.build_parse_tree:
                     self.parse_tree.children.append(stmt_parse)
-                    self.ast.children.append(stmt_ast)
-                else:
-                    token = self.current()
-                    self.errors.append({
-                        'line': token.line,
-                        'column': token.column,
-                        'message': f"Unexpected token '{token.value}'"
-                    })
-                    self.advance()
-            except Exception as e:
-                token = self.current()
-                self.errors.append({
-                    'line': token.line,
-                    'column': token.column,
-                    'message': f"Parsing error: {str(e)}"
-                })
-                self.synchronize()
+                self.ast.children.append(stmt_ast)
         return self.parse_tree, self.ast
 
+    def parse_statement(self):
+        """Parse one top-level statement, recording an error and recovering if it fails"""
+        try:
+            stmt_parse, stmt_ast = run(self.statement())
+            if stmt_parse and stmt_ast:
+                return stmt_parse, stmt_ast
+            token = self.current()
+            self.errors.append({
+                'line': token.line,
+                'column': token.column,
+                'message': f"Unexpected token '{token.value}'"
+            })
+            self.advance()
+        except LexerError:
+            raise
+        except Exception as e:
+            token = self.current()
+            self.errors.append({
+                'line': token.line,
+                'column': token.column,
+                'message': f"Parsing error: {str(e)}"
+            })
+            self.synchronize()
+        return None, None
+
     def statement(self):
+        """Statement methods are generators run by traversal.run: they yield the
+        generator of each nested statement or expression instead of calling it"""
         token = self.current()
         if token.type == 'KEYWORD':
             if token.value == 'Rakho':
-                return self.declaration()
+                return (yield self.declaration())
             elif token.value == 'Dikhao':
-                return self.output_statement()
+                return (yield self.output_statement())
             elif token.value == 'Agar':
-                return self.if_statement()
+                return (yield self.if_statement())
             elif token.value == 'JabTak':
-                return self.while_loop()
+                return (yield self.while_loop())
             elif token.value == 'Kaam':
-                return self.function_definition()
+                return (yield self.function_definition())
             elif token.value == 'Wapis':
-                return self.return_statement()
+                return (yield self.return_statement())
         elif token.type == 'IDENTIFIER':
             next_token = self.peek()
             if next_token and next_token.type == 'ASSIGN':
-                return self.assignment_statement()
+                return (yield self.assignment_statement())
             elif next_token and next_token.value == '(':
-                return self.function_call_statement()
+                return (yield self.function_call_statement())
         elif token.value == '{':
-            return self.block()
+            return (yield self.block())
         return None, None
 
     def block(self):
         start = self.expect(['{'], "Expected '{' to start block")
-        block_parse = ParseTreeNode("Block")
+        block_parse = self.tree("Block")
         block_ast = ASTNode('Block', line=start.line, column=start.column)
         
         while self.current().value != '}' and self.current().type != 'EOF':
-            stmt_parse, stmt_ast = self.statement()
+            stmt_parse, stmt_ast = yield self.statement()
             if stmt_parse and stmt_ast:
                 block_parse.children.append(stmt_parse)
                 block_ast.children.append(stmt_ast)
@@ -125,17 +208,17 @@ class Parser:
 
     def declaration(self):
         start = self.expect(['Rakho'], "Expected 'Rakho'")
-        decl_parse = ParseTreeNode("Declaration")
+        decl_parse = self.tree("Declaration")
         
         dtype = self.expect(['Ginti', 'PointWala', 'Baat', 'HaaNaa'], "Expected data type")
-        decl_parse.children.append(ParseTreeNode("Type", token=dtype))
+        decl_parse.children.append(self.tree("Type", token=dtype))
         
         var = self.expect(['IDENTIFIER'], "Expected variable name")
-        decl_parse.children.append(ParseTreeNode("Variable", token=var))
+        decl_parse.children.append(self.tree("Variable", token=var))
         
         if self.current().type == 'ASSIGN':
             self.expect(['ASSIGN'], "Expected '='")
-            expr_parse, expr_ast = self.expression()
+            expr_parse, expr_ast = yield self.expression()
             decl_parse.children.append(expr_parse)
         else:
             expr_ast = ASTNode('NoValue')
@@ -152,10 +235,10 @@ class Parser:
 
     def return_statement(self):
         start = self.expect(['Wapis'], "Expected 'Wapis'")
-        return_parse = ParseTreeNode("ReturnStatement")
+        return_parse = self.tree("ReturnStatement")
         
         if self.current().value != ';':
-            expr_parse, expr_ast = self.expression()
+            expr_parse, expr_ast = yield self.expression()
             return_parse.children.append(expr_parse)
         else:
             expr_ast = ASTNode('NoReturnValue')
@@ -167,9 +250,9 @@ class Parser:
 
     def output_statement(self):
         token = self.expect(['Dikhao'], "Expected 'Dikhao'")
-        out_parse = ParseTreeNode("OutputStatement", token=token)
+        out_parse = self.tree("OutputStatement", token=token)
         
-        expr_parse, expr_ast = self.expression()
+        expr_parse, expr_ast = yield self.expression()
         out_parse.children.append(expr_parse)
         
         self.expect([';'], "Expected ';'")
@@ -179,10 +262,10 @@ class Parser:
 
     def assignment_statement(self):
         var = self.expect(['IDENTIFIER'], "Expected variable name")
-        assign_parse = ParseTreeNode("Assignment", token=var)
+        assign_parse = self.tree("Assignment", token=var)
         
         self.expect(['ASSIGN'], "Expected '='")
-        expr_parse, expr_ast = self.expression()
+        expr_parse, expr_ast = yield self.expression()
         assign_parse.children.append(expr_parse)
         
         self.expect([';'], "Expected ';'")
@@ -195,20 +278,20 @@ class Parser:
         return assign_parse, assign_ast
 
     def function_call_statement(self):
-        call_parse, call_ast = self.function_call()
+        call_parse, call_ast = yield self.function_call()
         self.expect([';'], "Expected ';' after function call")
         return call_parse, call_ast
 
     def if_statement(self):
         start = self.expect(['Agar'], "Expected 'Agar'")
-        if_parse = ParseTreeNode("IfStatement")
+        if_parse = self.tree("IfStatement")
         
         self.expect(['('], "Expected '(' after 'Agar'")
-        cond_parse, cond_ast = self.expression()
+        cond_parse, cond_ast = yield self.expression()
         if_parse.children.append(cond_parse)
         self.expect([')'], "Expected ')' after condition")
         
-        block_parse, block_ast = self.block()
+        block_parse, block_ast = yield self.block()
         if_parse.children.append(block_parse)
         
         if_nodes = [cond_ast, block_ast]
@@ -216,23 +299,23 @@ class Parser:
         while self.current().value in ['WarnaAgar', 'Warna']:
             if self.current().value == 'WarnaAgar':
                 elif_token = self.advance()
-                elif_parse = ParseTreeNode("ElseIf", token=elif_token)
+                elif_parse = self.tree("ElseIf", token=elif_token)
                 
                 self.expect(['('], "Expected '(' after 'WarnaAgar'")
-                elif_cond_parse, elif_cond_ast = self.expression()
+                elif_cond_parse, elif_cond_ast = yield self.expression()
                 elif_parse.children.append(elif_cond_parse)
                 self.expect([')'], "Expected ')' after condition")
                 
-                elif_block_parse, elif_block_ast = self.block()
+                elif_block_parse, elif_block_ast = yield self.block()
                 elif_parse.children.append(elif_block_parse)
                 
                 if_parse.children.append(elif_parse)
                 if_nodes.extend([elif_cond_ast, elif_block_ast])
             else:
                 else_token = self.advance()
-                else_parse = ParseTreeNode("Else", token=else_token)
+                else_parse = self.tree("Else", token=else_token)
                 
-                else_block_parse, else_block_ast = self.block()
+                else_block_parse, else_block_ast = yield self.block()
                 else_parse.children.append(else_block_parse)
                 
                 if_parse.children.append(else_parse)
@@ -243,14 +326,14 @@ class Parser:
 
     def while_loop(self):
         start = self.expect(['JabTak'], "Expected 'JabTak'")
-        while_parse = ParseTreeNode("WhileLoop")
+        while_parse = self.tree("WhileLoop")
         
         self.expect(['('], "Expected '(' after 'JabTak'")
-        cond_parse, cond_ast = self.expression()
+        cond_parse, cond_ast = yield self.expression()
         while_parse.children.append(cond_parse)
         self.expect([')'], "Expected ')' after condition")
         
-        block_parse, block_ast = self.block()
+        block_parse, block_ast = yield self.block()
         while_parse.children.append(block_parse)
         
         while_ast = ASTNode('WhileLoop', [cond_ast, block_ast], line=start.line, column=start.column)
@@ -258,22 +341,22 @@ class Parser:
 
     def function_definition(self):
         start = self.expect(['Kaam'], "Expected 'Kaam'")
-        func_parse = ParseTreeNode("FunctionDefinition")
+        func_parse = self.tree("FunctionDefinition")
         
         name = self.expect(['IDENTIFIER'], "Expected function name")
-        func_parse.children.append(ParseTreeNode("FunctionName", token=name))
+        func_parse.children.append(self.tree("FunctionName", token=name))
         
         self.expect(['('], "Expected '(' after function name")
         
-        params_parse = ParseTreeNode("Parameters")
+        params_parse = self.tree("Parameters")
         params_ast = []
         while self.current().value != ')' and self.current().type != 'EOF':
             param_type = self.expect(['Ginti', 'PointWala', 'Baat', 'HaaNaa'], "Expected parameter type")
             param_name = self.expect(['IDENTIFIER'], "Expected parameter name")
             
-            param_parse = ParseTreeNode("Parameter")
-            param_parse.children.append(ParseTreeNode("Type", token=param_type))
-            param_parse.children.append(ParseTreeNode("Variable", token=param_name))
+            param_parse = self.tree("Parameter")
+            param_parse.children.append(self.tree("Type", token=param_type))
+            param_parse.children.append(self.tree("Variable", token=param_name))
             params_parse.children.append(param_parse)
             
             params_ast.append(ASTNode('Parameter', [
@@ -292,11 +375,11 @@ class Parser:
         # Handle optional return type declaration
         return_type = None
         if self.current().value == 'Wapis':
-            return_token = self.advance()
+            self.advance()
             return_type = self.expect(['Ginti', 'PointWala', 'Baat', 'HaaNaa'], "Expected return type")
-            func_parse.children.append(ParseTreeNode("ReturnType", token=return_type))
+            func_parse.children.append(self.tree("ReturnType", token=return_type))
         
-        body_parse, body_ast = self.block()
+        body_parse, body_ast = yield self.block()
         func_parse.children.append(body_parse)
         
         func_ast = ASTNode('Function', [
@@ -310,14 +393,14 @@ class Parser:
 
     def function_call(self):
         fn = self.expect(['IDENTIFIER'])
-        call_parse = ParseTreeNode("FunctionCall", token=fn)
+        call_parse = self.tree("FunctionCall", token=fn)
         
         self.expect(['('], "Expected '(' in function call")
         
-        args_parse = ParseTreeNode("Arguments")
+        args_parse = self.tree("Arguments")
         args_ast = []
         while self.current().value != ')' and self.current().type != 'EOF':
-            arg_parse, arg_ast = self.expression()
+            arg_parse, arg_ast = yield self.expression()
             args_parse.children.append(arg_parse)
             args_ast.append(arg_ast)
             
@@ -333,135 +416,71 @@ class Parser:
         return call_parse, call_ast
 
     def expression(self):
-        left_parse, left_ast = self.logical_or()
-        return left_parse, left_ast
-
-    def logical_or(self):
-        left_parse, left_ast = self.logical_and()
-        parse_node = left_parse
-        
-        while self.current().value == '||':
-            op = self.advance()
-            right_parse, right_ast = self.logical_and()
-            
-            new_parse = ParseTreeNode("BinaryOp")
-            new_parse.children = [parse_node, ParseTreeNode("Operator", token=op), right_parse]
-            parse_node = new_parse
-            
-            left_ast = ASTNode('BinaryOp', [left_ast, right_ast], value=op.value, line=op.line, column=op.column)
-        
-        return parse_node, left_ast
-
-    def logical_and(self):
-        left_parse, left_ast = self.equality()
-        parse_node = left_parse
-        
-        while self.current().value == '&&':
-            op = self.advance()
-            right_parse, right_ast = self.equality()
-            
-            new_parse = ParseTreeNode("BinaryOp")
-            new_parse.children = [parse_node, ParseTreeNode("Operator", token=op), right_parse]
-            parse_node = new_parse
-            
-            left_ast = ASTNode('BinaryOp', [left_ast, right_ast], value=op.value, line=op.line, column=op.column)
-        
-        return parse_node, left_ast
+        """Precedence climbing over BINARY_PRECEDENCE with explicit stacks; only calls nest"""
+        operands = []   # (parse node, AST node) pairs
+        operators = []  # (precedence, operator token); an open parenthesis has precedence 0
+        current, advance, precedence_of = self.current, self.advance, BINARY_PRECEDENCE.get
+        while True:
+            while current().value == '(':
+                operators.append((0, advance()))
+            if current().type == 'IDENTIFIER' and self.peek().value == '(':
+                operands.append((yield self.function_call()))
+            else:
+                operands.append(self.primary())
 
-    def equality(self):
-        left_parse, left_ast = self.relational()
-        parse_node = left_parse
-        
-        while self.current().value in ['==', '!=']:
-            op = self.advance()
-            right_parse, right_ast = self.relational()
-            
-            new_parse = ParseTreeNode("BinaryOp")
-            new_parse.children = [parse_node, ParseTreeNode("Operator", token=op), right_parse]
-            parse_node = new_parse
-            
-            left_ast = ASTNode('BinaryOp', [left_ast, right_ast], value=op.value, line=op.line, column=op.column)
-        
-        return parse_node, left_ast
+            while True:
+                precedence = precedence_of(current().value)
+                if precedence is not None:
+                    if operators and operators[-1][0] >= precedence:
+                        self.reduce(operands, operators, precedence)
+                    operators.append((precedence, advance()))
+                    break
 
-    def relational(self):
-        left_parse, left_ast = self.additive()
-        parse_node = left_parse
-        
-        while self.current().value in ['<', '<=', '>', '>=']:
-            op = self.advance()
-            right_parse, right_ast = self.additive()
-            
-            new_parse = ParseTreeNode("BinaryOp")
-            new_parse.children = [parse_node, ParseTreeNode("Operator", token=op), right_parse]
-            parse_node = new_parse
-            
-            left_ast = ASTNode('BinaryOp', [left_ast, right_ast], value=op.value, line=op.line, column=op.column)
-        
-        return parse_node, left_ast
+                if operators:
+                    self.reduce(operands, operators, 1)
+                if not operators:
+                    return operands.pop()
 
-    def additive(self):
-        left_parse, left_ast = self.multiplicative()
-        parse_node = left_parse
-        
-        while self.current().value in ['+', '-']:
-            op = self.advance()
-            right_parse, right_ast = self.multiplicative()
-            
-            new_parse = ParseTreeNode("BinaryOp")
-            new_parse.children = [parse_node, ParseTreeNode("Operator", token=op), right_parse]
-            parse_node = new_parse
-            
-            left_ast = ASTNode('BinaryOp', [left_ast, right_ast], value=op.value, line=op.line, column=op.column)
-        
-        return parse_node, left_ast
+                # Close the innermost parenthesis
+                operators.pop()
+                expr_parse, expr_ast = operands.pop()
+                parse_node = self.tree("Parenthesized")
+                parse_node.children.append(expr_parse)
+                operands.append((parse_node, expr_ast))
+                self.expect([')'], "Expected ')' after expression")
 
-    def multiplicative(self):
-        left_parse, left_ast = self.primary()
-        parse_node = left_parse
-        
-        while self.current().value in ['*', '/', '%']:
-            op = self.advance()
-            right_parse, right_ast = self.primary()
-            
-            new_parse = ParseTreeNode("BinaryOp")
-            new_parse.children = [parse_node, ParseTreeNode("Operator", token=op), right_parse]
-            parse_node = new_parse
-            
-            left_ast = ASTNode('BinaryOp', [left_ast, right_ast], value=op.value, line=op.line, column=op.column)
-        
-        return parse_node, left_ast
+    def reduce(self, operands, operators, precedence):
+        """Combine operands for stacked operators binding at least as tightly as precedence"""
+        while operators and operators[-1][0] >= precedence:
+            _, op = operators.pop()
+            right_parse, right_ast = operands.pop()
+            left_parse, left_ast = operands.pop()
+            if self.build_parse_tree:
+                left_parse = ParseTreeNode("BinaryOp", [left_parse, ParseTreeNode("Operator", token=op), right_parse])
+            operands.append((left_parse, ASTNode('BinaryOp', [left_ast, right_ast], value=op.value,
+                                                 line=op.line, column=op.column)))
 
     def primary(self):
+        """A literal or variable operand; expression() handles parentheses and calls"""
         token = self.current()
         if token.type in ['NUMBER_INT', 'NUMBER_FLOAT']:
             self.advance()
-            parse_node = ParseTreeNode("Number", token=token)
+            parse_node = self.tree("Number", token=token)
             ast_node = ASTNode('Number', value=token.value, line=token.line, column=token.column)
             return parse_node, ast_node
         elif token.type == 'STRING':
             self.advance()
-            parse_node = ParseTreeNode("String", token=token)
+            parse_node = self.tree("String", token=token)
             ast_node = ASTNode('String', value=token.value, line=token.line, column=token.column)
             return parse_node, ast_node
-        elif token.value == '(':
-            self.advance()
-            parse_node = ParseTreeNode("Parenthesized")
-            expr_parse, expr_ast = self.expression()
-            parse_node.children.append(expr_parse)
-            self.expect([')'], "Expected ')' after expression")
-            return parse_node, expr_ast
         elif token.type == 'IDENTIFIER':
-            if self.peek().value == '(':
-                return self.function_call()
-            else:
-                self.advance()
-                parse_node = ParseTreeNode("Variable", token=token)
-                ast_node = ASTNode('Variable', value=token.value, line=token.line, column=token.column)
-                return parse_node, ast_node
+            self.advance()
+            parse_node = self.tree("Variable", token=token)
+            ast_node = ASTNode('Variable', value=token.value, line=token.line, column=token.column)
+            return parse_node, ast_node
         elif token.value in ['Sahi', 'Ghalat']:
             self.advance()
-            parse_node = ParseTreeNode("Boolean", token=token)
+            parse_node = self.tree("Boolean", token=token)
             ast_node = ASTNode('Boolean', value=token.value, line=token.line, column=token.column)
             return parse_node, ast_node
         else:
@@ -471,6 +490,6 @@ class Parser:
                 'message': f"Unexpected expression token '{token.value}'"
             })
             self.advance()
-            parse_node = ParseTreeNode("Unknown", token=token)
+            parse_node = self.tree("Unknown", token=token)
             ast_node = ASTNode('Unknown')
             return parse_node, ast_node
\ No newline at end of file
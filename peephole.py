@@ -0,0 +1,157 @@
+from collections import Counter
+from cfg import JUMPS, read_names, write_position
+from executor import BINARY_OPS, written_name
+from opcodes import BRANCH_OPS, branch_opcode, is_pure
+from vm import TEMP_PATTERN
+
+# PeepholeOptimizer method for each rule name, tried in this order on every window
+RULES = {
+    'thread_jump': 'thread_jump',
+    'unreachable': 'drop_unreachable',
+    'jump_to_next': 'drop_jump_to_next',
+    'fuse_store': 'fuse_store',
+    'compare_branch': 'fuse_compare_branch',
+    'dead_label': 'drop_dead_labels',
+}
+
+
+class PeepholeOptimizer:
+    """Rewrites the tail of a region's split TAC as each instruction is appended.
+
+    Every rule looks only at the last few instructions of the output and
+    returns whether it changed them; after a change all rules are tried
+    again, so one rewrite can enable the next. Facts about the whole region
+    (where each label leads, how often each temp is read and written) are
+    gathered once before the window pass.
+    """
+
+    def __init__(self, rules=None):
+        self.rules = list(RULES) if rules is None else rules
+        self.hits = Counter()   # Rule name -> times it fired
+        self.destinations = {}
+        self.reads = Counter()
+        self.writes = Counter()
+
+    def optimize(self, instructions):
+        """Rewritten copy of one region's split instructions"""
+        self.prepare(instructions)
+        # dead_label needs every jump of the region, so it runs once after the window pass
+        window = [(name, getattr(self, RULES[name])) for name in self.rules if name != 'dead_label']
+        code = []
+        for parts in instructions:
+            code.append(list(parts))
+            changed = True
+            while changed and code:
+                changed = False
+                for name, rule in window:
+                    if rule(code):
+                        self.hits[name] += 1
+                        changed = True
+                        break
+        if 'dead_label' in self.rules:
+            self.hits['dead_label'] += self.drop_dead_labels(code)
+        return code
+
+    def prepare(self, instructions):
+        """Count temp reads and writes and find the label each label's jumps can go straight to"""
+        self.reads = Counter(name for parts in instructions for name in read_names(parts))
+        self.writes = Counter(written_name(parts) for parts in instructions)
+
+        first = {}      # Label -> first label of the run of labels it stands in
+        after = {}      # Label -> instruction following its run, or None
+        run = []
+        for parts in instructions:
+            if parts[0] == 'LABEL':
+                run.append(parts[1])
+                continue
+            for label in run:
+                first[label] = run[0]
+                after[label] = parts
+            run = []
+        for label in run:
+            first[label] = run[0]
+            after[label] = None
+
+        # Follow runs of labels and chains of GOTOs; a cycle stops where it closes
+        self.destinations = {}
+        for label in first:
+            seen = set()
+            target = label
+            while target not in seen:
+                seen.add(target)
+                following = after[target]
+                if following is None or following[0] != 'GOTO' or following[1] not in first:
+                    break
+                target = following[1]
+            self.destinations[label] = first[target]
+
+    def single_use(self, temp):
+        """Whether temp is written once and read once in the region"""
+        return TEMP_PATTERN.match(temp) and self.reads[temp] == 1 and self.writes[temp] == 1
+
+    def thread_jump(self, code):
+        """A jump to a label that leads straight on to another goes there directly"""
+        parts = code[-1]
+        if parts[0] in JUMPS:
+            target = self.destinations.get(parts[-1], parts[-1])
+            if target != parts[-1]:
+                code[-1] = parts[:-1] + [target]
+                return True
+        return False
+
+    def drop_unreachable(self, code):
+        """Nothing between a GOTO or RETURN and the next label can run"""
+        if len(code) > 1 and code[-1][0] != 'LABEL' and code[-2][0] in ('GOTO', 'RETURN'):
+            del code[-1]
+            return True
+        return False
+
+    def drop_jump_to_next(self, code):
+        """A jump to one of the labels right after it goes nowhere"""
+        if code[-1][0] != 'LABEL':
+            return False
+        index = len(code) - 1
+        run = set()
+        while index >= 0 and code[index][0] == 'LABEL':
+            run.add(code[index][1])
+            index -= 1
+        parts = code[index] if index >= 0 else None
+        if parts is None or parts[0] not in JUMPS or parts[-1] not in run:
+            return False
+        # Dropping a conditional jump skips its test, which an untyped comparison may fail
+        if parts[0] in BRANCH_OPS and not is_pure(BRANCH_OPS[parts[0]]):
+            return False
+        del code[index]
+        return True
+
+    def fuse_store(self, code):
+        """An instruction writing a temp that only a following STORE reads writes the STORE's target instead"""
+        if len(code) < 2 or code[-1][0] != 'STORE':
+            return False
+        _, temp, target = code[-1]
+        previous = code[-2]
+        if written_name(previous) != temp or not self.single_use(temp):
+            return False
+        previous = list(previous)
+        previous[write_position(previous)] = target
+        code[-2:] = [previous]
+        return True
+
+    def fuse_compare_branch(self, code):
+        """A comparison whose temp only an IF_FALSE right after it reads becomes one IF_NOT_ branch"""
+        if len(code) < 2 or code[-1][0] != 'IF_FALSE':
+            return False
+        previous = code[-2]
+        branch = branch_opcode(previous[0]) if previous[0] in BINARY_OPS else None
+        if branch is None or previous[3] != code[-1][1] or not self.single_use(previous[3]):
+            return False
+        code[-2:] = [[branch, previous[1], previous[2]] + code[-1][2:]]
+        return True
+
+    def drop_dead_labels(self, code):
+        """Remove labels no jump names; returns how many went"""
+        targets = {parts[-1] for parts in code if parts[0] in JUMPS}
+        kept = [parts for parts in code if parts[0] != 'LABEL' or parts[1] in targets]
+        dropped = len(code) - len(kept)
+        code[:] = kept
+        return dropped
\ No newline at end of file
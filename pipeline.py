@@ -0,0 +1,113 @@
+import hashlib
+from collections import Counter
+from incremental import IncrementalDocument
+from semantic import SemanticAnalyzer
+from interme_code import IntermediateCodeGenerator
+from tac import ThreeAddressCodeGenerator
+from optimizer import Optimizer
+from target import TargetCodeGenerator
+from machine import run_target
+from executor import Executor
+from output import generate_output_from_ast
+
+
+class CompilationSession:
+    """Every stage's artifact for the current source, computed lazily and at most once.
+
+    Front-end stages are keyed by the sha256 of the source text. Stages after
+    TAC generation are keyed by the instructions they consume, so an edit that
+    leaves the TAC unchanged does not re-optimize or re-run anything.
+    """
+
+    def __init__(self, source="", retain_scopes=False):
+        self.document = IncrementalDocument()
+        self.retain_scopes = retain_scopes  # Keep the analyzer's scope tree for display
+        self.source_hash = None
+        self.cache = {}             # stage name -> (input key, artifact)
+        self.computed = Counter()   # How many times each stage actually ran
+        self.set_source(source)
+
+    def set_source(self, source):
+        """Switch to a new source text; returns False when it is unchanged"""
+        source_hash = hashlib.sha256(source.encode('utf-8')).hexdigest()
+        if source_hash == self.source_hash:
+            return False
+        self.document.update_text(source)  # Raises LexerError before anything changes
+        self.source_hash = source_hash
+        return True
+
+    def stage(self, name, key, compute):
+        cached = self.cache.get(name)
+        if cached is not None and (cached[0] is key or cached[0] == key):
+            return cached[1]
+        value = compute()
+        self.cache[name] = (key, value)
+        self.computed[name] += 1
+        return value
+
+    # Front end
+
+    def tokens(self):
+        return self.stage('tokens', self.source_hash, self.document.tokens)
+
+    def parse_tree(self):
+        return self.stage('parse_tree', self.source_hash, lambda: self.document.parse_tree)
+
+    def ast(self):
+        return self.stage('ast', self.source_hash, lambda: self.document.ast)
+
+    def syntax_errors(self):
+        return self.stage('syntax_errors', self.source_hash, lambda: self.document.errors)
+
+    def analysis(self):
+        """The SemanticAnalyzer after a run over the AST, with its errors and (if retained) root scope"""
+        def analyze():
+            analyzer = SemanticAnalyzer(self.retain_scopes)
+            analyzer.analyze(self.ast())
+            return analyzer
+        return self.stage('analysis', self.source_hash, analyze)
+
+    def semantic_errors(self):
+        return self.analysis().errors
+
+    # Code generation
+
+    def intermediate(self):
+        def generate():
+            self.analysis()  # Types the expressions, so generators can emit typed opcodes
+            return IntermediateCodeGenerator().generate(self.ast())
+        return self.stage('intermediate', self.source_hash, generate)
+
+    def tac(self):
+        def generate():
+            self.analysis()
+            return ThreeAddressCodeGenerator().generate(self.ast())
+        return self.stage('tac', self.source_hash, generate)
+
+    def optimized(self):
+        tac = self.tac()
+        return self.stage('optimized', tac, lambda: Optimizer(list(tac)).optimize())
+
+    def target(self):
+        optimized = self.optimized()
+        return self.stage('target', optimized,
+                          lambda: TargetCodeGenerator().generate("\n".join(optimized)))
+
+    # Execution
+
+    def execution(self):
+        """Printed output of the optimized TAC under the Executor"""
+        optimized = self.optimized()
+        return self.stage('execution', optimized, lambda: Executor().execute_tac(optimized))
+
+    def target_execution(self):
+        """Printed output of the target code under the simulated machine"""
+        target = self.target()
+        return self.stage('target execution', target, lambda: run_target(target))
+
+    def output(self):
+        """Printed output of the AST evaluator"""
+        def evaluate():
+            self.analysis()  # Resolves variable addresses on the shared AST
+            return generate_output_from_ast(self.ast())
+        return self.stage('output', self.source_hash, evaluate)
\ No newline at end of file
@@ -0,0 +1,165 @@
+from cfg import ControlFlowGraph, liveness, read_names, read_positions, write_position
+from executor import REGISTERS, split_instruction
+from vm import TEMP_PATTERN
+
+
+class LiveInterval:
+    """Positions from a temp's first definition to its last use in one region's linear order"""
+    def __init__(self, name, position):
+        self.name = name
+        self.start = position
+        self.end = position
+        self.register = None    # Register holding the temp, or None if spilled
+        self.slot = None        # Stack slot of a spilled temp
+
+    def extend(self, position):
+        self.start = min(self.start, position)
+        self.end = max(self.end, position)
+
+    def __repr__(self):
+        where = self.register if self.register is not None else f"slot {self.slot}"
+        return f"LiveInterval({self.name}, {self.start}-{self.end}, {where})"
+
+
+def live_intervals(instructions):
+    """One interval per temp of a region's split instructions, sorted by start.
+
+    A temp live into or out of a block covers the whole of it, so an
+    interval spans every loop the temp is live around.
+    """
+    graph = ControlFlowGraph(instructions)
+    live_out, live_in = liveness(graph, set())
+    intervals = {}
+
+    def cover(name, position):
+        if TEMP_PATTERN.match(name):
+            if name in intervals:
+                intervals[name].extend(position)
+            else:
+                intervals[name] = LiveInterval(name, position)
+
+    position = 0
+    for block in graph.blocks:
+        first = position
+        for parts in block.instructions:
+            for name in read_names(parts):
+                cover(name, position)
+            index = write_position(parts)
+            if index is not None:
+                cover(parts[index], position)
+            position += 1
+        last = max(first, position - 1)
+        for name in live_in[block.index] or ():
+            cover(name, first)
+        for name in live_out[block.index] or ():
+            cover(name, last)
+    return sorted(intervals.values(), key=lambda interval: (interval.start, interval.end))
+
+
+class LinearScanAllocator:
+    """Poletto and Sarkar's linear scan over a fixed register file.
+
+    Intervals are visited by start; those ending before the current one
+    starts give their registers back. When none is free, whichever of the
+    current and active intervals ends last goes to a stack slot, which is
+    reused once its interval has ended too.
+    """
+
+    def __init__(self, registers=REGISTERS):
+        self.registers = list(registers)
+        self.intervals = []
+        self.slots = 0      # Stack slots the region needs
+
+    def allocate(self, instructions):
+        """Assign each temp of a region a register or stack slot; returns the intervals by temp name"""
+        self.intervals = live_intervals(instructions)
+        self.slots = 0
+        free = list(reversed(self.registers))
+        free_slots = []     # (End of the slot's last interval, slot)
+        active = []     # Intervals holding registers, by end
+        spilled = []    # Intervals holding stack slots, by end
+
+        for interval in self.intervals:
+            # A register read at the start position can be written there again
+            while active and active[0].end <= interval.start:
+                free.append(active.pop(0).register)
+            while spilled and spilled[0].end <= interval.start:
+                ended = spilled.pop(0)
+                free_slots.append((ended.end, ended.slot))
+
+            if free:
+                interval.register = free.pop()
+                self.insert(active, interval)
+                continue
+            victim = active[-1] if active else None
+            if victim is not None and victim.end > interval.end:
+                interval.register, victim.register = victim.register, None
+                active.pop()
+                self.insert(active, interval)
+            else:
+                victim = interval
+            victim.slot = self.free_slot(free_slots, victim.start)
+            self.insert(spilled, victim)
+        return {interval.name: interval for interval in self.intervals}
+
+    def free_slot(self, free_slots, start):
+        """A slot free from start on, or a new one.
+
+        An active interval spilled late started before the current one, so a
+        slot freed at the current start may still be in use at its start.
+        """
+        for index, (end, slot) in enumerate(free_slots):
+            if end <= start:
+                del free_slots[index]
+                return slot
+        self.slots += 1
+        return self.slots - 1
+
+    @staticmethod
+    def insert(intervals, interval):
+        """Keep a list of intervals sorted by end"""
+        index = len(intervals)
+        while index and intervals[index - 1].end > interval.end:
+            index -= 1
+        intervals.insert(index, interval)
+
+
+def regions(instructions):
+    """(FUNC_BEGIN index, body indexes) of each function, then (None, indexes) of the main program.
+
+    Bodies leave out the FUNC_BEGIN, PARAM, GLOBAL and FUNC_END lines.
+    """
+    main = []
+    found = []
+    stack = []
+    for index, parts in enumerate(instructions):
+        op = parts[0]
+        if op == 'FUNC_BEGIN':
+            stack.append((index, []))
+        elif op == 'FUNC_END':
+            found.append(stack.pop())
+        elif op not in ('PARAM', 'GLOBAL') or not stack:
+            (stack[-1][1] if stack else main).append(index)
+    return found + [(None, main)]
+
+
+def allocate_registers(tac_code, registers=REGISTERS):
+    """TAC with every temp renamed to the register it was given; spilled temps keep their names.
+
+    The Executor keeps the registers in its registers dict, so running the
+    result leaves the last values of the main program's registers there.
+    """
+    lines = tac_code.split('\n') if isinstance(tac_code, str) else tac_code
+    instructions = [split_instruction(line) for line in lines if line.strip()]
+    renamed = [list(parts) for parts in instructions]
+    allocator = LinearScanAllocator(registers)
+    for _, region in regions(instructions):
+        allocation = allocator.allocate([instructions[index] for index in region])
+        for index in region:
+            parts = renamed[index]
+            written = write_position(parts)
+            for i in read_positions(parts) + ((written,) if written is not None else ()):
+                interval = allocation.get(parts[i])
+                if interval is not None and interval.register is not None:
+                    parts[i] = interval.register
+    return [' '.join(parts) for parts in renamed]
\ No newline at end of file
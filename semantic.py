@@ -1,6 +1,28 @@
-from my_ast import ASTNode
-
-class SymbolTable:
+from my_ast import dispatch_table
+from traversal import walk
+
+class Symbol:
+    """One binding of a name; scope_level is the depth of the scope that bound it.
+
+    name is what generated code calls the binding: the source name, or the
+    source name with a numbered suffix when the declaration shadows another.
+    """
+    __slots__ = ('name', 'type', 'scope_level', 'is_function', 'params', 'return_type', 'frame_level', 'index')
+
+    def __init__(self, symbol_type, scope_level, is_function=False, params=None, return_type=None,
+                 frame_level=0, index=None, name=None):
+        self.name = name
+        self.type = symbol_type
+        self.scope_level = scope_level
+        self.is_function = is_function
+        self.params = params or []
+        self.return_type = return_type
+        self.frame_level = frame_level
+        self.index = index
+
+
+class Scope:
+    """A retained record of the symbols one scope bound, kept only for display"""
     def __init__(self, parent=None):
         self.symbols = {}
         self.parent = parent
@@ -8,47 +30,141 @@ class SymbolTable:
         if parent:
             parent.children.append(self)
 
-    def add_symbol(self, name, symbol_type, scope_level, is_function=False, params=None, return_type=None):
-        self.symbols[name] = {
-            'type': symbol_type,
-            'scope_level': scope_level,
-            'is_function': is_function,
-            'params': params or [],
-            'return_type': return_type
-        }
+    def display(self, indent=0):
+        lines = []
+        stack = [(self, indent)]
+        while stack:
+            scope, level = stack.pop()
+            lines.append("  " * level + "Scope Level: {}\n".format(level))
+            for name, info in scope.symbols.items():
+                symbol_info = f"Name: {name}, Type: {info.type}, Scope: {info.scope_level}"
+                if info.is_function:
+                    symbol_info += f", Function Params: {info.params}, Returns: {info.return_type}"
+                lines.append("  " * (level + 1) + symbol_info + "\n")
+            for child in reversed(scope.children):
+                stack.append((child, level + 1))
+        return "".join(lines)
+
+
+class SymbolTable:
+    """Scoped symbols as one name -> stack of bindings map.
+
+    Each open scope keeps an undo log of the names it bound, so lookup only
+    reads the top of one stack and leaving a scope pops exactly its own
+    bindings. With retain_scopes the tree of Scope records is kept as well.
+    """
+
+    def __init__(self, retain_scopes=False):
+        self.bindings = {}
+        self.undo_logs = [[]]
+        self.root = Scope() if retain_scopes else None
+        self.scope = self.root
+
+    @property
+    def depth(self):
+        return len(self.undo_logs) - 1
+
+    def enter_scope(self):
+        self.undo_logs.append([])
+        if self.scope is not None:
+            self.scope = Scope(parent=self.scope)
+
+    def exit_scope(self):
+        bindings = self.bindings
+        for name in self.undo_logs.pop():
+            stack = bindings[name]
+            if len(stack) == 1:
+                del bindings[name]
+            else:
+                stack.pop()
+        if self.scope is not None:
+            self.scope = self.scope.parent
+
+    def add_symbol(self, name, symbol_type, is_function=False, params=None, return_type=None,
+                   frame_level=0, index=None, unique_name=None):
+        depth = len(self.undo_logs) - 1
+        symbol = Symbol(symbol_type, depth, is_function, params, return_type, frame_level, index,
+                        unique_name or name)
+        stack = self.bindings.get(name)
+        if stack is None:
+            self.bindings[name] = [symbol]
+            self.undo_logs[-1].append(name)
+        elif stack[-1].scope_level == depth:
+            stack[-1] = symbol  # Rebinding in the same scope is already in its undo log
+        else:
+            stack.append(symbol)
+            self.undo_logs[-1].append(name)
+        if self.scope is not None:
+            self.scope.symbols[name] = symbol
+        return symbol
 
     def lookup(self, name, current_scope_only=False):
-        symbol = self.symbols.get(name)
-        if symbol is not None:
-            return symbol
-        if not current_scope_only and self.parent:
-            return self.parent.lookup(name)
-        return None
+        stack = self.bindings.get(name)
+        if stack is None:
+            return None
+        symbol = stack[-1]
+        if current_scope_only and symbol.scope_level != len(self.undo_logs) - 1:
+            return None
+        return symbol
 
-    def display(self, indent=0):
-        output = "  " * indent + "Scope Level: {}\n".format(indent)
-        for name, info in self.symbols.items():
-            symbol_info = f"Name: {name}, Type: {info['type']}, Scope: {info['scope_level']}"
-            if info.get('is_function'):
-                symbol_info += f", Function Params: {info['params']}, Returns: {info['return_type']}"
-            output += "  " * (indent + 1) + symbol_info + "\n"
-        for child in self.children:
-            output += child.display(indent + 1)
-        return output
+    def display(self):
+        return self.root.display() if self.root is not None else ""
 
 
 class SemanticAnalyzer:
-    def __init__(self):
-        self.root_scope = SymbolTable()         # ✅ FIXED
-        self.current_scope = self.root_scope    # ✅ FIXED
+    def __init__(self, retain_scopes=False):
+        self.symbols = SymbolTable(retain_scopes)
+        self.root_scope = self.symbols.root     # Scope tree for display, None unless retained
         self.errors = []
-        self.scope_level = 0
         self.current_function_return_type = None
+        self.frame_sizes = [0]  # Slots allocated so far in each enclosing function frame
+        self.frame_names = [set()]  # Source names declared so far in each enclosing function frame
+        self.renames = {}       # Source name -> suffixes handed out to declarations that reuse it
+        self.visitors = dispatch_table(self, 'visit_', self.generic_visit)
 
     def analyze(self, ast):
         self.visit(ast)
+        ast.frame_size = self.frame_sizes[0]
         return self.errors
 
+    def declare(self, name, var_type, node):
+        """Add a variable to the current scope and give it a slot in the current frame.
+
+        TAC has one flat namespace per frame, so a declaration that shadows a
+        visible variable or reuses a name from elsewhere in its frame gets a
+        unique name, e.g. x.1; '.' cannot appear in a source name.
+        """
+        self.frame_sizes[-1] += 1
+        unique_name = name
+        shadowed = self.symbols.lookup(name)
+        if name in self.frame_names[-1] or (shadowed is not None and not shadowed.is_function):
+            self.renames[name] = self.renames.get(name, 0) + 1
+            unique_name = f"{name}.{self.renames[name]}"
+        self.frame_names[-1].add(name)
+        symbol = self.symbols.add_symbol(name, var_type,
+                                         frame_level=len(self.frame_sizes) - 1,
+                                         index=self.frame_sizes[-1], unique_name=unique_name)
+        self.resolve(node, symbol)
+
+    def resolve(self, node, symbol):
+        """Record the symbol, type and (frame depth, slot index) address of a variable reference"""
+        node.symbol = symbol
+        node.data_type = symbol.type
+        if symbol.index is not None:
+            node.address = (len(self.frame_sizes) - 1 - symbol.frame_level, symbol.index)
+        else:
+            node.address = None
+
+    def check_frame(self, node, symbol):
+        """Report a reference to a local of an enclosing function, which generated code cannot reach"""
+        if 0 < symbol.frame_level < len(self.frame_sizes) - 1:
+            self.error(f"Variable '{node.value}' belongs to an enclosing function; "
+                       "a nested function can only use its own variables and globals", node)
+
+    def unresolve(self, node):
+        """Clear what an earlier analysis of a reused node recorded for a name that no longer resolves"""
+        node.symbol = node.data_type = node.address = None
+
     def error(self, message, node):
         self.errors.append({
             'line': node.line if hasattr(node, 'line') else -1,
@@ -57,28 +173,23 @@ class SemanticAnalyzer:
         })
 
     def visit(self, node):
-        method_name = 'visit_' + node.type
-        visitor = getattr(self, method_name, self.generic_visit)
-        return visitor(node)
+        return walk(self.visitors, node)
 
     def generic_visit(self, node):
         for child in node.children:
-            self.visit(child)
+            yield child
 
     def visit_Program(self, node):
         for child in node.children:
-            self.visit(child)
+            yield child
 
     def visit_Block(self, node):
-        self.scope_level += 1
-        new_scope = SymbolTable(parent=self.current_scope)
-        self.current_scope = new_scope
+        self.symbols.enter_scope()
 
         for child in node.children:
-            self.visit(child)
+            yield child
 
-        self.current_scope = self.current_scope.parent
-        self.scope_level -= 1
+        self.symbols.exit_scope()
 
     def visit_Declaration(self, node):
         if len(node.children) < 2:
@@ -91,18 +202,20 @@ class SemanticAnalyzer:
         var_name = var_name_node.value
         var_type = var_type_node.value
 
-        if self.current_scope.lookup(var_name, current_scope_only=True):
+        existing = self.symbols.lookup(var_name, current_scope_only=True)
+        if existing:
             self.error(f"Variable '{var_name}' already declared in this scope", var_name_node)
+            self.resolve(var_name_node, existing)
             return
 
         expr_type = None
         if len(node.children) > 2 and node.children[2].type != 'NoValue':
             expr_node = node.children[2]
-            expr_type = self.visit(expr_node)
+            expr_type = yield expr_node
             if expr_type and not self.check_type_compatibility(var_type, expr_type):
                 self.error(f"Type mismatch: cannot assign {expr_type} to {var_type}", expr_node)
 
-        self.current_scope.add_symbol(var_name, var_type, self.scope_level)
+        self.declare(var_name, var_type, var_name_node)
         return var_type
 
     def visit_Assignment(self, node):
@@ -114,16 +227,19 @@ class SemanticAnalyzer:
         expr_node = node.children[1]
 
         var_name = var_name_node.value
-        symbol = self.current_scope.lookup(var_name)
+        symbol = self.symbols.lookup(var_name)
         if not symbol:
             self.error(f"Undeclared variable '{var_name}'", var_name_node)
+            self.unresolve(var_name_node)
             return
+        self.resolve(var_name_node, symbol)
+        self.check_frame(var_name_node, symbol)
 
-        expr_type = self.visit(expr_node)
-        if expr_type and not self.check_type_compatibility(symbol['type'], expr_type):
-            self.error(f"Type mismatch: cannot assign {expr_type} to {symbol['type']}", expr_node)
+        expr_type = yield expr_node
+        if expr_type and not self.check_type_compatibility(symbol.type, expr_type):
+            self.error(f"Type mismatch: cannot assign {expr_type} to {symbol.type}", expr_node)
 
-        return symbol['type']
+        return symbol.type
 
     def visit_Function(self, node):
         if len(node.children) < 3:
@@ -138,62 +254,68 @@ class SemanticAnalyzer:
         func_name = name_node.value
         return_type = return_type_node.value if return_type_node else None
 
-        if self.current_scope.lookup(func_name, current_scope_only=True):
+        if self.symbols.lookup(func_name, current_scope_only=True):
             self.error(f"Function '{func_name}' already declared in this scope", name_node)
             return
 
-        previous_function_return_type = self.current_function_return_type
-        self.current_function_return_type = return_type
-
-        self.scope_level += 1
-        new_scope = SymbolTable(parent=self.current_scope)
-        self.current_scope = new_scope
-
         params = []
         for param in params_node.children:
             if len(param.children) < 2:
                 continue
-            param_type_node = param.children[0]
-            param_name_node = param.children[1]
-            param_type = param_type_node.value
-            param_name = param_name_node.value
-            params.append((param_type, param_name))
-            self.current_scope.add_symbol(param_name, param_type, self.scope_level)
+            params.append((param.children[0].value, param.children[1].value))
 
-        self.current_scope.parent.add_symbol(
+        # Bound before the body so that recursive calls resolve
+        self.symbols.add_symbol(
             func_name,
             'function',
-            self.scope_level - 1,
             is_function=True,
             params=params,
             return_type=return_type
         )
 
-        self.visit(body_node)
+        previous_function_return_type = self.current_function_return_type
+        self.current_function_return_type = return_type
+
+        self.symbols.enter_scope()
+        self.frame_sizes.append(0)
+        self.frame_names.append(set())
+
+        for param in params_node.children:
+            if len(param.children) < 2:
+                continue
+            param_type_node = param.children[0]
+            param_name_node = param.children[1]
+            self.declare(param_name_node.value, param_type_node.value, param_name_node)
+
+        yield body_node
 
-        self.current_scope = self.current_scope.parent
-        self.scope_level -= 1
+        node.frame_size = self.frame_sizes.pop()
+        self.frame_names.pop()
+        self.symbols.exit_scope()
         self.current_function_return_type = previous_function_return_type
 
         return return_type or 'void'
 
     def visit_FunctionCall(self, node):
         func_name = node.value
-        symbol = self.current_scope.lookup(func_name)
-        if not symbol or not symbol['is_function']:
+        symbol = self.symbols.lookup(func_name)
+        if not symbol or not symbol.is_function:
             self.error(f"Undeclared function '{func_name}'", node)
+            node.symbol = node.data_type = None
             return None
+        node.symbol = symbol
+        node.data_type = symbol.return_type
 
-        if len(node.children) != len(symbol['params']):
-            self.error(f"Function '{func_name}' expects {len(symbol['params'])} arguments but got {len(node.children)}", node)
-            return symbol['return_type']
+        if len(node.children) != len(symbol.params):
+            self.error(f"Function '{func_name}' expects {len(symbol.params)} arguments but got {len(node.children)}", node)
+            return symbol.return_type
 
-        for i, (arg_node, (param_type, _)) in enumerate(zip(node.children, symbol['params'])):
-            arg_type = self.visit(arg_node)
+        for i, (arg_node, (param_type, _)) in enumerate(zip(node.children, symbol.params)):
+            arg_type = yield arg_node
             if arg_type and not self.check_type_compatibility(param_type, arg_type):
                 self.error(f"Argument {i+1} type mismatch: expected {param_type}, got {arg_type}", arg_node)
 
-        return symbol['return_type']
+        return symbol.return_type
 
     def visit_IfStatement(self, node):
         if len(node.children) < 2:
@@ -201,12 +323,12 @@ class SemanticAnalyzer:
             return
 
         condition_node = node.children[0]
-        condition_type = self.visit(condition_node)
+        condition_type = yield condition_node
         if condition_type and condition_type != 'HaaNaa':
             self.error("If condition must be boolean", condition_node)
 
         for child in node.children[1:]:
-            self.visit(child)
+            yield child
 
     def visit_WhileLoop(self, node):
         if len(node.children) < 2:
@@ -214,26 +336,31 @@ class SemanticAnalyzer:
             return
 
         condition_node = node.children[0]
-        condition_type = self.visit(condition_node)
+        condition_type = yield condition_node
         if condition_type and condition_type != 'HaaNaa':
             self.error("While condition must be boolean", condition_node)
 
         block_node = node.children[1]
-        self.visit(block_node)
+        yield block_node
 
     def visit_Output(self, node):
         if not node.children:
             self.error("Invalid output statement", node)
             return
-        self.visit(node.children[0])
+        yield node.children[0]
 
     def visit_BinaryOp(self, node):
         if len(node.children) < 2:
             self.error("Invalid binary operation", node)
             return None
 
-        left_type = self.visit(node.children[0])
-        right_type = self.visit(node.children[1])
+        left_type = yield node.children[0]
+        right_type = yield node.children[1]
+        node.data_type = self.binary_type(node, left_type, right_type)
+        return node.data_type
+
+    def binary_type(self, node, left_type, right_type):
+        """Result type of a BinaryOp, or None after reporting a type error"""
         op = node.value
 
         if op == '+':
@@ -241,11 +368,13 @@ class SemanticAnalyzer:
                 return 'Baat'
             if left_type in ['Ginti', 'PointWala'] and right_type in ['Ginti', 'PointWala']:
                 return 'PointWala' if 'PointWala' in (left_type, right_type) else 'Ginti'
-            self.error(f"Operator '+' requires numeric or string operands", node)
+            self.error("Operator '+' requires numeric or string operands", node)
         elif op in ['-', '*', '/', '%']:
             if left_type not in ['Ginti', 'PointWala'] or right_type not in ['Ginti', 'PointWala']:
                 self.error(f"Operator '{op}' requires numeric operands", node)
                 return None
+            if op == '/':
+                return 'PointWala'  # Division is exact on every runtime, even of two Ginti
             return 'PointWala' if 'PointWala' in (left_type, right_type) else 'Ginti'
         elif op in ['<', '<=', '>', '>=']:
             if left_type not in ['Ginti', 'PointWala'] or right_type not in ['Ginti', 'PointWala']:
@@ -266,20 +395,26 @@ class SemanticAnalyzer:
 
     def visit_Variable(self, node):
         var_name = node.value
-        symbol = self.current_scope.lookup(var_name)
+        symbol = self.symbols.lookup(var_name)
         if not symbol:
             self.error(f"Undeclared variable '{var_name}'", node)
+            self.unresolve(node)
             return None
-        return symbol['type']
+        self.resolve(node, symbol)
+        self.check_frame(node, symbol)
+        return symbol.type
 
     def visit_Number(self, node):
-        return 'PointWala' if '.' in node.value else 'Ginti'
+        node.data_type = 'PointWala' if '.' in node.value else 'Ginti'
+        return node.data_type
 
     def visit_String(self, node):
-        return 'Baat'
+        node.data_type = 'Baat'
+        return node.data_type
 
     def visit_Boolean(self, node):
-        return 'HaaNaa'
+        node.data_type = 'HaaNaa'
+        return node.data_type
 
     def check_type_compatibility(self, target_type, source_type):
         if target_type == source_type:
@@ -289,4 +424,29 @@ class SemanticAnalyzer:
         return False
 
     def get_symbol_table_output(self):
-        return self.root_scope.display() 
\ No newline at end of file
+        return self.symbols.display() 
+
+def assigned_globals(function_node):
+    """Generated-code names of the globals a function body assigns, in order of first assignment.
+
+    Code generators declare these with GLOBAL so that TAC runtimes write
+    them through instead of treating every assigned name as a local.
+    Nested function definitions are left to their own FUNC_BEGIN.
+    """
+    names = []
+    stack = [function_node.children[2]]
+    while stack:
+        node = stack.pop()
+        if node.type == 'Function':
+            continue
+        if node.type == 'Assignment' and node.children:
+            target = node.children[0]
+            if target.symbol is not None and target.symbol.frame_level == 0 and target.symbol.name not in names:
+                names.append(target.symbol.name)
+        stack.extend(reversed(node.children))
+    return names
+
+
+def tac_name(node):
+    """Name generated code uses for the variable a Variable node refers to"""
+    return node.symbol.name if node.symbol is not None else node.value
\ No newline at end of file
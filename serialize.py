@@ -0,0 +1,313 @@
+import mmap
+import struct
+import sys
+import zlib
+from array import array
+from my_ast import ColumnarAST, KINDS
+from executor import split_instruction
+
+MAGIC = b'HPYB'
+VERSION = 2
+AST_ARTIFACT = 1
+TAC_ARTIFACT = 2
+
+# magic, version, artifact kind, strings, instructions or nodes, the byte offset of each section,
+# then a CRC-32 of every other byte of the file
+HEADER = struct.Struct('<4sBBxxIIIIII')
+CHECKSUMMED = HEADER.size - 4   # Header bytes before the checksum
+AST_COLUMNS = ('kinds', 'values', 'lines', 'columns', 'first_child', 'next_sibling')
+
+
+class FormatError(Exception):
+    pass
+
+
+def write_varint(out, value):
+    """Append an unsigned LEB128 varint to a bytearray"""
+    while value > 0x7f:
+        out.append(value & 0x7f | 0x80)
+        value >>= 7
+    out.append(value)
+
+
+def read_varint(data, position):
+    """(value, next position) of the varint at position"""
+    value = shift = 0
+    while True:
+        byte = data[position]
+        position += 1
+        value |= (byte & 0x7f) << shift
+        if byte < 0x80:
+            return value, position
+        shift += 7
+
+
+def little_endian(column):
+    """int32 array bytes in file order"""
+    if sys.byteorder != 'little':
+        column = array('i', column)
+        column.byteswap()
+    return column.tobytes()
+
+
+class StringTable:
+    """Distinct strings in first-use order, written as an offset array and one UTF-8 blob"""
+    def __init__(self):
+        self.ids = {}
+        self.strings = []
+
+    def add(self, string):
+        string_id = self.ids.get(string)
+        if string_id is None:
+            string_id = self.ids[string] = len(self.strings)
+            self.strings.append(string)
+        return string_id
+
+    def encode(self):
+        blob = bytearray()
+        offsets = array('i', [0])
+        for string in self.strings:
+            blob += string.encode('utf-8')
+            offsets.append(len(blob))
+        return little_endian(offsets) + bytes(blob)
+
+
+def pack(kind, strings, count, sections):
+    """Header, string table and the artifact's sections, each section aligned to 4 bytes"""
+    table = strings.encode()
+    offsets = []
+    position = HEADER.size + len(table)
+    body = bytearray()
+    for section in sections:
+        padding = -position % 4
+        body += bytes(padding)
+        position += padding
+        offsets.append(position)
+        body += section
+        position += len(section)
+    offsets += [position] * (3 - len(offsets))
+    header = HEADER.pack(MAGIC, VERSION, kind, len(strings.strings), count, *offsets, 0)[:CHECKSUMMED]
+    payload = table + bytes(body)
+    return header + struct.pack('<I', checksum(header, payload)) + payload
+
+
+def checksum(header, payload):
+    return zlib.crc32(payload, zlib.crc32(header))
+
+
+def dumps_tac(lines):
+    """Binary form of TAC lines: per instruction, a varint part count then varint string ids"""
+    strings = StringTable()
+    code = bytearray()
+    offsets = array('i', [0])
+    for line in lines:
+        parts = split_instruction(line) if isinstance(line, str) else line
+        if not parts:
+            continue
+        write_varint(code, len(parts))
+        for part in parts:
+            write_varint(code, strings.add(part))
+        offsets.append(len(code))
+    return pack(TAC_ARTIFACT, strings, len(offsets) - 1, [little_endian(offsets), bytes(code)])
+
+
+def dumps_ast(root):
+    """Binary form of an AST: its ColumnarAST node table as int32 columns, values in the string table.
+
+    Kinds are indexes into a kind table stored first in the string table,
+    so a reader can tell when KINDS has changed since the file was written.
+    """
+    columns = ColumnarAST.encode(root)
+    strings = StringTable()
+    for name in KINDS:
+        strings.add(name)
+    # Value id 0 is None; the rest point one past their string
+    value_ids = array('i', [0] + [strings.add(value) + 1 for value in columns.value_table[1:]])
+    values = array('i', (value_ids[value] for value in columns.values))
+    table = array('i', [len(KINDS)])
+    node_table = b''.join(little_endian(column) for column in (
+        array('i', columns.kinds), values, columns.lines, columns.columns, columns.first_child, columns.next_sibling))
+    return pack(AST_ARTIFACT, strings, len(columns), [little_endian(table), node_table])
+
+
+class Artifact:
+    """Read-only view of a serialized artifact over bytes or an mmap; decodes strings on first use.
+
+    With verify, the whole file is checked against its header checksum
+    first, so a damaged artifact fails here rather than decoding to a
+    different program.
+    """
+
+    def __init__(self, data, mapping=None, verify=True):
+        self.data = memoryview(data)
+        self.mapping = mapping      # The mmap to close along with the view, if any
+        if len(self.data) < HEADER.size:
+            raise FormatError("Artifact is truncated")
+        (magic, version, self.kind, self.string_count, self.count,
+         self.first, self.second, self.end, stored) = HEADER.unpack_from(self.data)
+        if magic != MAGIC:
+            raise FormatError("Not a HindiPython artifact")
+        if version != VERSION:
+            raise FormatError(f"Artifact format version {version}, expected {VERSION}")
+        if verify and checksum(self.data[:CHECKSUMMED], self.data[HEADER.size:]) != stored:
+            raise FormatError("Artifact checksum does not match; the file is damaged")
+        self.string_base = HEADER.size + 4 * (self.string_count + 1)
+        if not self.string_base <= self.first <= self.second <= self.end <= len(self.data):
+            raise FormatError("Artifact sections are out of bounds")
+        self.string_offsets = self.int32s(HEADER.size, self.string_count + 1)
+        if self.string_offsets[0] != 0 or not 0 <= self.string_offsets[-1] <= self.first - self.string_base:
+            raise FormatError("Artifact string table is out of bounds")
+        self.strings = [None] * self.string_count
+
+    def int32s(self, start, count):
+        view = self.data[start:start + 4 * count]
+        if sys.byteorder == 'little':
+            return view.cast('i')
+        column = array('i', view)
+        column.byteswap()
+        return column
+
+    def string(self, string_id):
+        if not 0 <= string_id < self.string_count:
+            raise FormatError(f"Artifact has no string {string_id}")
+        string = self.strings[string_id]
+        if string is None:
+            start = self.string_base + self.string_offsets[string_id]
+            end = self.string_base + self.string_offsets[string_id + 1]
+            try:
+                string = self.strings[string_id] = str(self.data[start:end], 'utf-8')
+            except UnicodeDecodeError as e:
+                raise FormatError(f"Artifact string {string_id} is not UTF-8: {e}")
+        return string
+
+    def close(self):
+        # Column views keep the buffer exported, so they go before it is released
+        for name in ('string_offsets', 'offsets') + AST_COLUMNS:
+            self.__dict__.pop(name, None)
+        self.data.release()
+        if self.mapping is not None:
+            self.mapping.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class TACView(Artifact):
+    """TAC artifact as a sequence of lines, each decoded when it is first indexed"""
+
+    def __init__(self, data, mapping=None, verify=True):
+        super().__init__(data, mapping, verify)
+        if self.first + 4 * (self.count + 1) > self.second:
+            raise FormatError("TAC offsets are out of bounds")
+        self.offsets = self.int32s(self.first, self.count + 1)
+        if self.offsets[0] != 0 or not 0 <= self.offsets[-1] <= self.end - self.second:
+            raise FormatError("TAC code is out of bounds")
+
+    def __len__(self):
+        return self.count
+
+    def parts(self, index):
+        """Split instruction at index, as split_instruction would return it"""
+        data = self.data
+        position = self.second + self.offsets[index]
+        try:
+            length, position = read_varint(data, position)
+            parts = []
+            for _ in range(length):
+                string_id, position = read_varint(data, position)
+                parts.append(self.string(string_id))
+        except IndexError:
+            raise FormatError(f"TAC instruction {index} runs past the artifact")
+        if position > self.second + self.offsets[index + 1]:
+            raise FormatError(f"TAC instruction {index} overruns its offsets")
+        return parts
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(self.count))]
+        if index < 0:
+            index += self.count
+        if not 0 <= index < self.count:
+            raise IndexError("TAC index out of range")
+        return ' '.join(self.parts(index))
+
+    def __iter__(self):
+        return (self[index] for index in range(self.count))
+
+
+class LazyValues:
+    """A ColumnarAST value table backed by the string table"""
+    def __init__(self, artifact):
+        self.artifact = artifact
+
+    def __getitem__(self, value_id):
+        return None if value_id == 0 else self.artifact.string(value_id - 1)
+
+
+class ASTView(Artifact, ColumnarAST):
+    """AST artifact as a ColumnarAST whose columns are views of the file.
+
+    node, children and decode work as on an in-memory ColumnarAST. When the
+    file's kind table differs from KINDS, the kind column is remapped once
+    into a fresh array.
+    """
+
+    def __init__(self, data, mapping=None, verify=True):
+        Artifact.__init__(self, data, mapping, verify)
+        if self.first + 4 > self.second or self.second + 4 * self.count * len(AST_COLUMNS) > self.end:
+            raise FormatError("AST columns are out of bounds")
+        kind_count = self.int32s(self.first, 1)[0]
+        if not 0 <= kind_count <= self.string_count:
+            raise FormatError("AST kind table is out of bounds")
+        for column, name in enumerate(AST_COLUMNS):
+            setattr(self, name, self.int32s(self.second + 4 * self.count * column, self.count))
+        self.value_table = LazyValues(self)
+        names = [self.string(kind) for kind in range(kind_count)]
+        if names != KINDS[:kind_count]:
+            try:
+                mapping = [KINDS.index(name) for name in names]
+            except ValueError as e:
+                raise FormatError(f"Artifact has an unknown node kind: {e}")
+            self.kinds = array('i', (mapping[kind] if 0 <= kind < kind_count else -1 for kind in self.kinds))
+
+    def decode(self):
+        try:
+            return ColumnarAST.decode(self)
+        except ValueError as e:
+            raise FormatError(f"Artifact has a corrupt node table: {e}")
+
+
+VIEWS = {AST_ARTIFACT: ASTView, TAC_ARTIFACT: TACView}
+
+
+def loads(data, mapping=None, verify=True):
+    """ASTView or TACView over serialized bytes, by the kind in their header"""
+    if len(data) < HEADER.size:
+        raise FormatError("Artifact is truncated")
+    if data[:4] != MAGIC:
+        raise FormatError("Not a HindiPython artifact")
+    kind = data[5]
+    if kind not in VIEWS:
+        raise FormatError(f"Unknown artifact kind {kind}")
+    return VIEWS[kind](data, mapping, verify)
+
+
+def load(path, verify=True):
+    """Map an artifact file read-only and view it; close() unmaps it.
+
+    Without verify nothing is read in until it is used, which suits files
+    this process wrote itself.
+    """
+    with open(path, 'rb') as f:
+        mapping = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    return loads(mapping, mapping, verify)
+
+
+def dump(artifact, path):
+    """Write an AST root or a list of TAC lines to path"""
+    data = dumps_tac(artifact) if isinstance(artifact, (list, tuple, TACView)) else dumps_ast(artifact)
+    with open(path, 'wb') as f:
+        f.write(data)
\ No newline at end of file
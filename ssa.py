@@ -0,0 +1,533 @@
+import operator
+from collections import Counter, deque
+from cfg import JUMPS, read_positions, write_position, read_names, live_variables
+from executor import BINARY_OPS, is_literal, parse_literal, written_name
+from opcodes import TYPED_OPS, BRANCH_OPS, CONDITIONAL_JUMPS, base_opcode, is_pure
+from vm import TEMP_PATTERN
+
+# Python meaning of each untyped opcode, as the runtimes evaluate it
+OPERATIONS = {
+    'ADD': operator.add, 'SUB': operator.sub, 'MUL': operator.mul,
+    'DIV': operator.truediv, 'MOD': operator.mod,
+    'AND': lambda a, b: a and b, 'OR': lambda a, b: a or b,
+    'EQ': operator.eq, 'NEQ': operator.ne, 'LT': operator.lt,
+    'LTE': operator.le, 'GT': operator.gt, 'GTE': operator.ge,
+}
+
+# Typed ops whose operands may be swapped when numbering values
+COMMUTATIVE = {op for op, base in TYPED_OPS.items()
+               if base in ('ADD', 'MUL', 'EQ', 'NEQ') and op != 'SCONCAT'}
+
+# Lattice values besides constants: not yet known, and not a constant
+TOP = object()
+BOTTOM = object()
+
+
+def same(a, b):
+    """Constant equality that tells True from 1 and 1 from 1.0"""
+    return type(a) is type(b) and a == b
+
+
+def meet(a, b):
+    if a is TOP:
+        return b
+    if b is TOP:
+        return a
+    if a is BOTTOM or b is BOTTOM or not same(a, b):
+        return BOTTOM
+    return a
+
+
+def literal_text(value):
+    """TAC spelling of a constant that parses back to the same value, or None"""
+    if isinstance(value, bool):
+        return 'Sahi' if value else 'Ghalat'
+    if isinstance(value, str):
+        return None if "'" in value or '\n' in value else f"'{value}'"
+    try:
+        text = repr(value)
+        if is_literal(text) and same(parse_literal(text), value):
+            return text
+    except ValueError:
+        pass  # Too many digits to print, or no literal form
+    return None
+
+
+class Instruction:
+    """A TAC instruction over SSA names; a CALL also reads and redefines the globals it may touch"""
+    __slots__ = ('parts', 'uses', 'defs')
+
+    def __init__(self, parts):
+        self.parts = parts
+        self.uses = ()
+        self.defs = ()
+
+    def reads(self):
+        return read_names(self.parts) + list(self.uses)
+
+    def writes(self):
+        written = written_name(self.parts)
+        return list(self.defs) + ([written] if written is not None else [])
+
+
+class Phi:
+    """dest = phi(args) at the top of a join block; args maps each predecessor block to an SSA name"""
+    __slots__ = ('name', 'dest', 'args')
+
+    def __init__(self, name):
+        self.name = name
+        self.dest = None
+        self.args = {}
+
+    def reads(self):
+        return list(self.args.values())
+
+    def writes(self):
+        return [self.dest]
+
+
+class SSAForm:
+    """One ControlFlowGraph in SSA form, with the optimizations that run on it.
+
+    Version N of a name is spelled name.N; version 0 is its value on entry
+    to the region. Only constants and single-definition temps are ever
+    substituted for a name, so the versions of one variable never overlap
+    and destruct() can go back to TAC by dropping them.
+    """
+
+    def __init__(self, graph):
+        self.graph = graph
+        self.globals = sorted(graph.shared_variables())   # Names a CALL may read or assign
+        self.code = {}          # Block -> [Instruction]
+        self.phis = {}          # Block -> [Phi]
+        self.exit_uses = {}     # Exit block -> versions of globals a function leaves behind
+        self.base = {}          # SSA name -> TAC name
+        self.versions = {}      # TAC name -> versions defined so far
+        self.entry_names = set()
+        self.construct()
+
+    def construct(self):
+        graph = self.graph
+        reachable = graph.reverse_postorder()
+        if len(reachable) < len(graph.blocks):
+            graph.remove_blocks(set(graph.blocks) - set(reachable))
+        for block in graph.blocks:
+            self.code[block] = [Instruction(list(parts)) for parts in block.instructions]
+            self.phis[block] = []
+        self.place_phis()
+        self.rename()
+
+    def items(self, block):
+        return self.phis[block] + self.code[block]
+
+    def version(self, name, number):
+        ssa_name = f"{name}.{number}"
+        self.base[ssa_name] = name
+        return ssa_name
+
+    def place_phis(self):
+        """Phis at the iterated dominance frontier of each name's definitions, where it is live"""
+        graph = self.graph
+        live_in = live_variables(graph, self.globals)
+
+        sites = {}
+        for block in graph.blocks:
+            for parts in block.instructions:
+                written = written_name(parts)
+                names = self.globals if parts[0] == 'CALL' else []
+                for name in names + ([written] if written is not None else []):
+                    sites.setdefault(name, set()).add(block.index)
+
+        frontiers = graph.dominance_frontiers()
+        for name, defined in sites.items():
+            placed = set()
+            work = list(defined)
+            while work:
+                for index in frontiers[work.pop()]:
+                    if index not in placed:
+                        placed.add(index)
+                        if name in live_in[index]:
+                            block = graph.blocks[index]
+                            self.phis[block].append(Phi(name))
+                        if index not in defined:
+                            work.append(index)
+
+    def rename(self):
+        """Give each definition its own version, walking the dominator tree with undo logs"""
+        graph = self.graph
+        blocks = graph.blocks
+        children = graph.dominator_tree()
+        stacks = {}     # TAC name -> versions visible at this point of the walk
+        logs = []       # Names each open block pushed
+
+        def current(name):
+            stack = stacks.get(name)
+            if stack:
+                return stack[-1]
+            ssa_name = self.version(name, 0)
+            self.entry_names.add(ssa_name)
+            return ssa_name
+
+        def define(name):
+            number = self.versions[name] = self.versions.get(name, 0) + 1
+            ssa_name = self.version(name, number)
+            stacks.setdefault(name, []).append(ssa_name)
+            logs[-1].append(name)
+            return ssa_name
+
+        work = [0]
+        while work:
+            index = work.pop()
+            if index < 0:
+                for name in logs.pop():
+                    stacks[name].pop()
+                continue
+            block = blocks[index]
+            logs.append([])
+
+            for phi in self.phis[block]:
+                phi.dest = define(phi.name)
+            for instruction in self.code[block]:
+                parts = instruction.parts
+                for position in read_positions(parts):
+                    if not is_literal(parts[position]):
+                        parts[position] = current(parts[position])
+                if parts[0] == 'CALL':
+                    instruction.uses = [current(name) for name in self.globals]
+                    instruction.defs = [define(name) for name in self.globals]
+                position = write_position(parts)
+                if position is not None:
+                    parts[position] = define(parts[position])
+
+            for successor in block.successors:
+                for phi in self.phis[successor]:
+                    phi.args[block] = current(phi.name)
+            if not block.successors and graph.name is not None:
+                self.exit_uses[block] = [current(name) for name in self.globals]
+
+            work.append(~index)
+            work.extend(children[index])
+
+    def users(self):
+        """SSA name -> (block, phi or instruction) pairs that read it"""
+        users = {}
+        for block in self.graph.blocks:
+            for item in self.items(block):
+                for name in item.reads():
+                    users.setdefault(name, []).append((block, item))
+        return users
+
+    def propagate_constants(self):
+        """Sparse conditional constant propagation, after Wegman and Zadeck.
+
+        Blocks become executable only along edges a branch can take, and
+        names only hold constants agreed on by their executable definitions.
+        Constant results are then loaded directly, numeric constants replace
+        their uses, decided branches are resolved and dead blocks are removed.
+        """
+        graph = self.graph
+        blocks = graph.blocks
+        users = self.users()
+        values = dict.fromkeys(self.entry_names, BOTTOM)
+        executable = set()
+        edges = set()
+        flow = deque([(None, blocks[0])])
+        changed = deque()
+
+        def value(operand):
+            return parse_literal(operand) if is_literal(operand) else values.get(operand, TOP)
+
+        def lower(name, new):
+            old = values.get(name, TOP)
+            new = meet(old, new)
+            if new is not TOP and (old is TOP or (new is BOTTOM and old is not BOTTOM)):
+                values[name] = new
+                changed.append(name)
+
+        def test(parts):
+            """Lattice value of the condition a conditional jump tests"""
+            if parts[0] == 'IF_FALSE':
+                return value(parts[1])
+            return evaluate(BRANCH_OPS[parts[0]], value(parts[1]), value(parts[2]))
+
+        def branch(block, instruction):
+            parts = instruction.parts
+            following = blocks[block.index + 1] if block.index + 1 < len(blocks) else None
+            if parts[0] == 'GOTO':
+                flow.append((block, graph.label_block(parts[1])))
+            else:
+                condition = test(parts)
+                if condition is TOP:
+                    return
+                if condition is BOTTOM or not condition:
+                    flow.append((block, graph.label_block(parts[-1])))
+                if (condition is BOTTOM or condition) and following is not None:
+                    flow.append((block, following))
+
+        def visit(block, item):
+            if isinstance(item, Phi):
+                result = TOP
+                for predecessor, arg in item.args.items():
+                    if (predecessor, block) in edges:
+                        result = meet(result, value(arg))
+                lower(item.dest, result)
+                return
+            parts = item.parts
+            op = parts[0]
+            if op == 'LOAD':
+                lower(parts[2], parse_literal(parts[1]))
+            elif op == 'STORE':
+                lower(parts[2], value(parts[1]))
+            elif op in BINARY_OPS:
+                lower(parts[3], evaluate(op, value(parts[1]), value(parts[2])))
+            elif op in JUMPS:
+                branch(block, item)
+            elif op == 'CALL':
+                for name in item.writes():
+                    lower(name, BOTTOM)
+
+        while flow or changed:
+            while flow or changed:
+                if flow:
+                    edge = flow.popleft()
+                    block = edge[1]
+                    if edge in edges:
+                        continue
+                    edges.add(edge)
+                    if block in executable:
+                        for phi in self.phis[block]:
+                            visit(block, phi)
+                        continue
+                    executable.add(block)
+                    for item in self.items(block):
+                        visit(block, item)
+                    code = self.code[block]
+                    if not code or code[-1].parts[0] not in JUMPS:
+                        for successor in block.successors:
+                            flow.append((block, successor))
+                else:
+                    for block, item in users.get(changed.popleft(), ()):
+                        if block in executable:
+                            visit(block, item)
+            # A condition never given a value still has to branch somewhere
+            for block in executable:
+                code = self.code[block]
+                if code and code[-1].parts[0] in CONDITIONAL_JUMPS and test(code[-1].parts) is TOP:
+                    for name in read_names(code[-1].parts):
+                        if value(name) is TOP:
+                            lower(name, BOTTOM)
+
+        def constant(operand):
+            known = value(operand)
+            if is_literal(operand) or known is TOP or known is BOTTOM:
+                return None
+            return literal_text(known)
+
+        for block in blocks:
+            if block not in executable:
+                continue
+            code = []
+            for instruction in self.code[block]:
+                parts = instruction.parts
+                op = parts[0]
+                if op in CONDITIONAL_JUMPS and test(parts) is not BOTTOM:
+                    if not test(parts):
+                        instruction.parts = ['GOTO', parts[-1]]
+                        code.append(instruction)
+                    continue
+
+                position = write_position(parts)
+                literal = constant(parts[position]) if position is not None else None
+                if literal is not None and op not in ('LOAD', 'CALL'):
+                    instruction.parts = ['LOAD', literal, parts[position]]
+                else:
+                    # Operands only take numeric literals
+                    for position in read_positions(parts):
+                        literal = constant(parts[position])
+                        if literal is not None and is_literal(literal):
+                            parts[position] = literal
+                code.append(instruction)
+            self.code[block] = code
+        self.relink([block for block in blocks if block not in executable])
+
+    def relink(self, dead=()):
+        """Rebuild the graph's edges from the SSA code, dropping phi args from lost predecessors"""
+        graph = self.graph
+        for block in graph.blocks:
+            block.instructions = [instruction.parts for instruction in self.code[block]]
+        graph.remove_blocks(set(dead))
+        for block in graph.blocks:
+            for phi in self.phis[block]:
+                phi.args = {p: arg for p, arg in phi.args.items() if p in block.predecessors}
+
+    def single_temp(self, name):
+        base = self.base.get(name)
+        return base is not None and self.versions.get(base) == 1 and TEMP_PATTERN.match(base)
+
+    def number_values(self):
+        """Dominator-scoped global value numbering.
+
+        A temp computed from the same operation on the same value numbers
+        as a temp that dominates it is dropped, and its uses read the
+        dominating temp instead.
+        """
+        graph = self.graph
+        blocks = graph.blocks
+        children = graph.dominator_tree()
+        numbers = {}    # SSA name -> name of the value it holds
+        table = {}      # (op, value numbers...) -> temp holding it
+        replaced = {}   # Dropped temp -> temp read in its place
+        logs = []
+
+        work = [0]
+        while work:
+            index = work.pop()
+            if index < 0:
+                for key in logs.pop():
+                    del table[key]
+                continue
+            block = blocks[index]
+            log = []
+            logs.append(log)
+            code = []
+            for instruction in self.code[block]:
+                parts = instruction.parts
+                for position in read_positions(parts):
+                    parts[position] = replaced.get(parts[position], parts[position])
+                op = parts[0]
+                key = None
+                if op == 'LOAD':
+                    key = ('LOAD', parts[1])
+                elif op == 'STORE':
+                    numbers[parts[2]] = numbers.get(parts[1], parts[1])
+                elif op in BINARY_OPS:
+                    a = numbers.get(parts[1], parts[1])
+                    b = numbers.get(parts[2], parts[2])
+                    if op in COMMUTATIVE and b < a:
+                        a, b = b, a
+                    key = (op, a, b)
+
+                dest = written_name(parts)
+                if key is not None and self.single_temp(dest):
+                    leader = table.get(key)
+                    if leader is not None:
+                        replaced[dest] = leader
+                        continue
+                    table[key] = dest
+                    log.append(key)
+                code.append(instruction)
+            self.code[block] = code
+            work.append(~index)
+            work.extend(children[index])
+
+        if replaced:
+            for block in blocks:
+                for phi in self.phis[block]:
+                    phi.args = {p: replaced.get(arg, arg) for p, arg in phi.args.items()}
+                for instruction in self.code[block]:
+                    parts = instruction.parts
+                    for position in read_positions(parts):
+                        parts[position] = replaced.get(parts[position], parts[position])
+
+    def eliminate_dead_code(self):
+        """Aggressive dead code elimination: keep only what output, calls, branches and exits depend on.
+
+        Branches stay, so a loop that never ends still never ends.
+        """
+        definitions = {}
+        work = []
+        for uses in self.exit_uses.values():
+            work.extend(uses)
+        for block in self.graph.blocks:
+            for item in self.items(block):
+                for name in item.writes():
+                    definitions[name] = item
+                if isinstance(item, Instruction) and not is_pure(item.parts[0]):
+                    work.append(item)
+
+        live = set()
+        while work:
+            item = work.pop()
+            if isinstance(item, str):
+                item = definitions.get(item)
+            if item is None or item in live:
+                continue
+            live.add(item)
+            work.extend(item.reads())
+
+        for block in self.graph.blocks:
+            self.phis[block] = [phi for phi in self.phis[block] if phi in live]
+            self.code[block] = [instruction for instruction in self.code[block] if instruction in live]
+
+    def coalesce_copies(self):
+        """Make the definition of a temp that is only copied into a variable write the variable directly.
+
+        The variable must not be read or written between the two, so the
+        new version starts where no other version of it is live.
+        """
+        uses = Counter()
+        for block in self.graph.blocks:
+            for item in self.items(block):
+                uses.update(item.reads())
+
+        for block in self.graph.blocks:
+            code = self.code[block]
+            coalesced = set()
+            for position, instruction in enumerate(code):
+                parts = instruction.parts
+                if parts[0] != 'STORE' or uses[parts[1]] != 1 or not self.single_temp(parts[1]):
+                    continue
+                target = self.base[parts[2]]
+                for earlier in range(position - 1, -1, -1):
+                    other = code[earlier]
+                    if written_name(other.parts) == parts[1]:
+                        other.parts[write_position(other.parts)] = parts[2]
+                        coalesced.add(position)
+                        break
+                    if any(self.base.get(name) == target for name in other.reads() + other.writes()):
+                        break
+            if coalesced:
+                self.code[block] = [instruction for position, instruction in enumerate(code)
+                                    if position not in coalesced]
+
+    def destruct(self):
+        """Back to TAC by dropping versions and phis; False if a phi joins differently named values"""
+        for block in self.graph.blocks:
+            for phi in self.phis[block]:
+                if any(self.base.get(arg) != phi.name for arg in phi.args.values()):
+                    return False
+
+        self.coalesce_copies()
+        base = self.base
+        for block in self.graph.blocks:
+            code = []
+            for instruction in self.code[block]:
+                parts = instruction.parts
+                positions = list(read_positions(parts))
+                if write_position(parts) is not None:
+                    positions.append(write_position(parts))
+                for position in positions:
+                    parts[position] = base.get(parts[position], parts[position])
+                if parts[0] == 'STORE' and parts[1] == parts[2]:
+                    continue
+                code.append(instruction)
+            self.code[block] = code
+            self.phis[block] = []
+        self.relink()
+        return True
+
+
+def evaluate(op, a, b):
+    """Lattice value of a binary op on lattice values"""
+    base = base_opcode(op)
+    if base in ('AND', 'OR') and a is not TOP and a is not BOTTOM:
+        # Decided by the left operand alone, whatever the right one is
+        return a if bool(a) == (base == 'OR') else b
+    if a is BOTTOM or b is BOTTOM:
+        return BOTTOM
+    if a is TOP or b is TOP:
+        return TOP
+    try:
+        return OPERATIONS[base](a, b)
+    except Exception:
+        return BOTTOM  # Left for the runtime to report
\ No newline at end of file
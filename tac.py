@@ -1,4 +1,7 @@
-from my_ast import ASTNode
+from my_ast import dispatch_table
+from traversal import walk
+from semantic import assigned_globals, tac_name
+from opcodes import typed_opcode
 
 class ThreeAddressCodeGenerator:
     def __init__(self):
@@ -6,6 +9,7 @@ class ThreeAddressCodeGenerator:
         self.temp_counter = 0
         self.label_counter = 0
         self.current_scope = "global"
+        self.visitors = dispatch_table(self, 'visit_', self.generic_visit)
     
     def generate(self, ast):
         self.code = []
@@ -25,53 +29,35 @@ class ThreeAddressCodeGenerator:
         return label
     
     def visit(self, node):
-        method_name = 'visit_' + node.type
-        visitor = getattr(self, method_name, self.generic_visit)
-        return visitor(node)
+        return walk(self.visitors, node)
     
     def generic_visit(self, node):
         results = []
         for child in node.children:
-            results.append(self.visit(child))
+            results.append((yield child))
         return results
     
     def visit_Program(self, node):
         for child in node.children:
-            self.visit(child)
+            yield child
     
     def visit_Declaration(self, node):
-        var_name = node.children[1].value
+        var_name = tac_name(node.children[1])
         if len(node.children) > 2 and node.children[2].type != 'NoValue':
-            expr_result = self.visit(node.children[2])
+            expr_result = yield node.children[2]
             self.code.append(f"STORE {expr_result} {var_name}")
     
     def visit_Assignment(self, node):
-        var_name = node.children[0].value
-        expr_result = self.visit(node.children[1])
+        var_name = tac_name(node.children[0])
+        expr_result = yield node.children[1]
         self.code.append(f"STORE {expr_result} {var_name}")
     
     def visit_BinaryOp(self, node):
-        left = self.visit(node.children[0])
-        right = self.visit(node.children[1])
+        left = yield node.children[0]
+        right = yield node.children[1]
         temp = self.new_temp()
         
-        op_map = {
-            '+': 'ADD',
-            '-': 'SUB',
-            '*': 'MUL',
-            '/': 'DIV',
-            '%': 'MOD',
-            '&&': 'AND',
-            '||': 'OR',
-            '==': 'EQ',
-            '!=': 'NEQ',
-            '<': 'LT',
-            '<=': 'LTE',
-            '>': 'GT',
-            '>=': 'GTE'
-        }
-        
-        op = op_map.get(node.value, node.value)
+        op = typed_opcode(node)
         self.code.append(f"{op} {left} {right} {temp}")
         return temp
     
@@ -81,7 +67,7 @@ class ThreeAddressCodeGenerator:
         return temp
     
     def visit_Variable(self, node):
-        return node.value
+        return tac_name(node)
     
     def visit_String(self, node):
         temp = self.new_temp()
@@ -90,16 +76,15 @@ class ThreeAddressCodeGenerator:
     
     def visit_Boolean(self, node):
         temp = self.new_temp()
-        value = 1 if node.value == 'Sahi' else 0
-        self.code.append(f"LOAD {value} {temp}")
+        self.code.append(f"LOAD {node.value} {temp}")
         return temp
     
     def visit_Output(self, node):
-        expr_result = self.visit(node.children[0])
+        expr_result = yield node.children[0]
         self.code.append(f"PRINT {expr_result}")
     
     def visit_IfStatement(self, node):
-        condition = self.visit(node.children[0])
+        condition = yield node.children[0]
         true_label = self.new_label()
         false_label = self.new_label()
         end_label = self.new_label()
@@ -108,12 +93,29 @@ class ThreeAddressCodeGenerator:
         self.code.append(f"GOTO {true_label}")
         self.code.append(f"LABEL {true_label}")
         
-        self.visit(node.children[1])
+        yield node.children[1]
         self.code.append(f"GOTO {end_label}")
         
         self.code.append(f"LABEL {false_label}")
-        if len(node.children) > 2:
-            self.visit(node.children[2])
+        # WarnaAgar conditions and blocks come in pairs; a lone block after them is the Warna block
+        i = 2
+        while i < len(node.children):
+            if i + 1 < len(node.children):
+                condition = yield node.children[i]
+                true_label = self.new_label()
+                false_label = self.new_label()
+                
+                self.code.append(f"IF_FALSE {condition} GOTO {false_label}")
+                self.code.append(f"GOTO {true_label}")
+                self.code.append(f"LABEL {true_label}")
+                
+                yield node.children[i + 1]
+                self.code.append(f"GOTO {end_label}")
+                self.code.append(f"LABEL {false_label}")
+                i += 2
+            else:
+                yield node.children[i]
+                i += 1
         
         self.code.append(f"LABEL {end_label}")
     
@@ -126,10 +128,10 @@ class ThreeAddressCodeGenerator:
         self.code.append(f"GOTO {condition_label}")
         self.code.append(f"LABEL {condition_label}")
         
-        condition = self.visit(node.children[0])
+        condition = yield node.children[0]
         self.code.append(f"IF_FALSE {condition} GOTO {end_label}")
         
-        self.visit(node.children[1])
+        yield node.children[1]
         self.code.append(f"GOTO {start_label}")
         self.code.append(f"LABEL {end_label}")
     
@@ -144,25 +146,31 @@ class ThreeAddressCodeGenerator:
         self.code.append(f"FUNC_BEGIN {func_name} {return_type}")
         
         for param in params:
-            param_name = param.children[1].value
+            param_name = tac_name(param.children[1])
             param_type = param.children[0].value
             self.code.append(f"PARAM {param_name} {param_type}")
         
-        self.visit(node.children[2])
+        # Globals the body assigns; every other name it assigns is a local
+        for name in assigned_globals(node):
+            self.code.append(f"GLOBAL {name}")
+        
+        yield node.children[2]
         
         self.code.append(f"FUNC_END {func_name}")
         self.current_scope = old_scope
     
     def visit_Return(self, node):
         if node.children[0].type != 'NoReturnValue':
-            expr_result = self.visit(node.children[0])
+            expr_result = yield node.children[0]
             self.code.append(f"RETURN {expr_result}")
         else:
             self.code.append("RETURN")
     
     def visit_FunctionCall(self, node):
         func_name = node.value
-        args = [self.visit(arg) for arg in node.children]
+        args = []
+        for arg in node.children:
+            args.append((yield arg))
         temp = self.new_temp()
         
         for arg in args:
@@ -1,45 +1,190 @@
+from collections import Counter
+from opcodes import base_opcode, opcode_type, BRANCH_OPS
+from executor import REGISTERS, BINARY_OPS, BOOLEAN_LITERALS, split_instruction, is_literal, written_name
+from regalloc import LinearScanAllocator, regions
+from vm import TEMP_PATTERN
+
+# Jump taken when a fused branch's comparison does not hold
+NEGATED_JUMPS = {'EQ': 'jne', 'NEQ': 'je', 'LT': 'jge', 'LTE': 'jg', 'GT': 'jle', 'GTE': 'jl'}
+
+# Machine registers outside the allocatable file: return value, frame and stack pointers
+RESERVED = ('ax', 'bp', 'sp')
+NONE = '@none'  # Constant operand for a missing value; '@' cannot start a program name
+WORD = 4    # Bytes per stack slot
+
 class TargetCodeGenerator:
-    def __init__(self):
-        self.registers = ['r0', 'r1', 'r2', 'r3']
-        self.register_map = {}
+    """Pseudo-assembly for TAC, with temps in registers chosen by linear-scan allocation.
+
+    The main program comes first and ends with hlt; each function follows.
+    Temps the allocator spills live in stack slots below bp, as do the
+    variables a function assigns; its parameters sit above bp, and names
+    it only reads are globals in memory. Registers are caller-saved: around
+    each call, the ones holding temps live across it go to stack slots and
+    come back after. After generate, stats holds how many instructions were
+    emitted, how many of them touch memory operands or the stack, and how
+    many temps were spilled.
+    """
+
+    def __init__(self, registers=REGISTERS):
+        self.registers = list(registers)
+        self.register_map = {}  # Name -> register or stack slot in the region being emitted
         self.code = []
-    
+        self.stats = Counter()
+
     def generate(self, tac_code):
         self.code = []
         self.register_map = {}
-        
-        for line in tac_code.split('\n'):
-            if not line.strip():
-                continue
-                
-            parts = line.split()
+        self.stats = Counter()
+
+        lines = tac_code.split('\n') if isinstance(tac_code, str) else tac_code
+        instructions = [split_instruction(line) for line in lines if line.strip()]
+        allocator = LinearScanAllocator(self.registers)
+        functions = []
+        for begin, region in regions(instructions):
+            body = [instructions[index] for index in region]
+            allocation = allocator.allocate(body)
+            self.stats['spilled'] += sum(interval.register is None for interval in allocation.values())
+            if begin is None:
+                slots = self.frame(body, allocation, allocator.slots)
+                saves = self.caller_saves(body, allocation, slots)
+                slots += max(map(len, saves.values()), default=0)
+                if slots:
+                    # The main program's spilled temps need a frame too
+                    self.emit("mov", "bp", "sp")
+                    self.emit("sub", "sp", str(WORD * slots))
+                self.emit_body(body, saves)
+                self.emit("hlt")
+            else:
+                params = []
+                shared = set()
+                for parts in instructions[begin + 1:]:
+                    if parts[0] == 'PARAM':
+                        params.append(parts[1])
+                    elif parts[0] == 'GLOBAL':
+                        shared.add(parts[1])
+                    else:
+                        break
+                functions.append((instructions[begin][1], params, shared, body, allocation,
+                                  allocator.slots))
+
+        for name, params, shared, body, allocation, spilled in functions:
+            slots = self.frame(body, allocation, spilled, params, shared)
+            saves = self.caller_saves(body, allocation, slots)
+            slots += max(map(len, saves.values()), default=0)
+            self.code.append(f"{name}:")
+            self.emit("push", "bp")
+            self.emit("mov", "bp", "sp")
+            if slots:
+                self.emit("sub", "sp", str(WORD * slots))
+            self.emit_body(body, saves)
+            if not body or body[-1][0] != "RETURN":
+                self.emit("mov", "ax", NONE)    # Falling off the end returns nothing, as on the Executor
+                self.epilogue()
+
+        self.stats['instructions'] = sum(not line.endswith(':') for line in self.code)
+        return "\n".join(self.code)
+
+    def frame(self, body, allocation, spilled, params=None, shared=()):
+        """Lay out a region's names in register_map; returns how many stack slots it needs below bp.
+
+        Parameters sit above the saved bp and return address, the last one
+        nearest. A function's own variables take the first slots below bp
+        and spilled temps the ones after them. The main program's variables,
+        and the globals a function declares GLOBAL, stay in memory.
+        """
+        self.register_map = {name: f"[bp+{WORD * (len(params) + 1 - i)}]"
+                             for i, name in enumerate(params or ())}
+        local = []
+        if params is not None:
+            for parts in body:
+                name = written_name(parts)
+                if (name is not None and not TEMP_PATTERN.match(name) and name not in shared
+                        and name not in self.register_map and name not in local):
+                    local.append(name)
+        for slot, name in enumerate(local):
+            self.register_map[name] = f"[bp-{WORD * (slot + 1)}]"
+        for name, interval in allocation.items():
+            if interval.register is not None:
+                self.register_map[name] = interval.register
+            else:
+                self.register_map[name] = f"[bp-{WORD * (len(local) + interval.slot + 1)}]"
+        return len(local) + spilled
+
+    def caller_saves(self, body, allocation, first):
+        """Per CALL position, (register, stack slot) pairs of the temps live across it.
+
+        Save slots follow the first slots of the frame and are shared by all
+        calls; a call's own result is written after it and needs none.
+        """
+        saves = {}
+        for position, parts in enumerate(body):
+            if parts[0] == 'CALL':
+                registers = sorted(interval.register for interval in allocation.values()
+                                   if interval.register and interval.start < position < interval.end)
+                saves[position] = [(register, f"[bp-{WORD * (first + slot + 1)}]")
+                                   for slot, register in enumerate(registers)]
+        return saves
+
+    def emit_body(self, body, saves):
+        arguments = 0   # ARGs pushed since the last CALL
+        for position, parts in enumerate(body):
             op = parts[0]
-            
-            if op == "STORE":
-                self.code.append(f"mov {parts[2]}, {parts[1]}")
-            elif op == "LOAD":
-                self.code.append(f"mov {parts[2]}, {parts[1]}")
-            elif op in ["ADD", "SUB", "MUL", "DIV"]:
-                self.code.append(f"{op.lower()} {parts[3]}, {parts[1]}, {parts[2]}")
+            if op == "STORE" or op == "LOAD":
+                self.emit("mov", self.operand(parts[2]), self.operand(parts[1]))
+            elif op in BINARY_OPS:
+                self.emit(self.mnemonic(op), self.operand(parts[3]), self.operand(parts[1]),
+                          self.operand(parts[2]))
             elif op == "PRINT":
-                self.code.append(f"call printf, {parts[1]}")
+                self.emit("call", "printf", self.operand(parts[1]))
             elif op == "IF_FALSE":
-                self.code.append(f"cmp {parts[1]}, 0")
-                self.code.append(f"je {parts[3]}")
+                self.emit("test", self.operand(parts[1]), self.operand(parts[1]))
+                self.code.append(f"jz {parts[3]}")
+            elif op in BRANCH_OPS:
+                self.emit("cmp", self.operand(parts[1]), self.operand(parts[2]))
+                self.code.append(f"{NEGATED_JUMPS[base_opcode(BRANCH_OPS[op])]} {parts[4]}")
             elif op == "GOTO":
                 self.code.append(f"jmp {parts[1]}")
             elif op == "LABEL":
                 self.code.append(f"{parts[1]}:")
-            elif op == "FUNC_BEGIN":
-                self.code.append(f"{parts[1]}:")
-                self.code.append("push bp")
-                self.code.append("mov bp, sp")
-            elif op == "FUNC_END":
-                self.code.append("pop bp")
-                self.code.append("ret")
+            elif op == "ARG":
+                self.emit("push", self.operand(parts[1]))
+                arguments += 1
+            elif op == "CALL":
+                for register, slot in saves[position]:
+                    self.emit("mov", slot, register)
+                self.emit("call", parts[1])
+                if arguments:
+                    self.emit("add", "sp", str(WORD * arguments))
+                arguments = 0
+                for register, slot in saves[position]:
+                    self.emit("mov", register, slot)
+                if len(parts) > 2:
+                    self.emit("mov", self.operand(parts[2]), "ax")
             elif op == "RETURN":
-                if len(parts) > 1:
-                    self.code.append(f"mov ax, {parts[1]}")
-                self.code.append("ret")
-        
-        return "\n".join(self.code)
\ No newline at end of file
+                self.emit("mov", "ax", self.operand(parts[1]) if len(parts) > 1 else NONE)
+                self.epilogue()
+
+    def epilogue(self):
+        self.emit("mov", "sp", "bp")
+        self.emit("pop", "bp")
+        self.emit("ret")
+
+    def operand(self, name):
+        return self.register_map.get(name, name)
+
+    def emit(self, mnemonic, *operands):
+        """Append one instruction, counting it towards memory accesses if it reads or writes memory"""
+        if mnemonic in ("push", "pop", "call", "ret") or any(self.in_memory(op) for op in operands):
+            self.stats['memory accesses'] += 1
+        self.code.append(f"{mnemonic} {', '.join(operands)}" if operands else mnemonic)
+
+    def in_memory(self, operand):
+        if operand in self.registers or operand in RESERVED or operand in BOOLEAN_LITERALS or operand == NONE:
+            return False
+        return not (is_literal(operand) or operand.startswith("'"))
+
+    def mnemonic(self, op):
+        """Integer and untyped operations use the plain mnemonic; floats and strings get their own"""
+        if opcode_type(op) in ('PointWala', 'Baat'):
+            return op.lower()
+        return base_opcode(op).lower()
\ No newline at end of file
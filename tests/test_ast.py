@@ -0,0 +1,61 @@
+import io
+import pytest
+from my_ast import ASTNode, KINDS, KIND, NODE_CLASSES, LEAF_KINDS, dispatch_table, write_ast
+from pipeline import CompilationSession
+
+
+def test_each_kind_has_its_own_slotted_class():
+    for name in KINDS:
+        node = ASTNode(name)
+        assert type(node) is NODE_CLASSES[name]
+        assert node.type == name and node.kind == KIND[name]
+        assert not hasattr(node, '__dict__')
+        with pytest.raises(AttributeError):
+            node.unexpected = 1
+
+
+def test_unknown_kind_is_rejected():
+    with pytest.raises(ValueError, match="Unknown AST node type 'Loop'"):
+        ASTNode('Loop')
+
+
+def test_leaf_kinds_take_no_children():
+    for name in LEAF_KINDS:
+        assert ASTNode(name).children == ()
+        with pytest.raises(ValueError, match="nodes have no children"):
+            ASTNode(name, [ASTNode('Number', value='1')])
+    block = ASTNode('Block')
+    block.children.append(ASTNode('Break'))
+    assert ASTNode('Block').children == []
+
+
+def test_analysis_fills_kind_specific_fields():
+    session = CompilationSession("Rakho Ginti a = 1; Dikhao a + 2;")
+    session.analysis()
+    ast = session.ast()
+    output = ast.children[1].children[0]
+    variable = output.children[0]
+    assert ast.frame_size == 1
+    assert output.data_type == 'Ginti' and variable.address is not None and variable.symbol is not None
+
+
+def test_dispatch_table_is_indexed_by_kind():
+    class Visitor:
+        def visit_Number(self, node):
+            return 'number ' + node.value
+
+        def other(self, node):
+            return 'other ' + node.type
+
+    visitor = Visitor()
+    table = dispatch_table(visitor, 'visit_', visitor.other)
+    assert len(table) == len(KINDS)
+    assert table[KIND['Number']](ASTNode('Number', value='3')) == 'number 3'
+    assert table[KIND['String']](ASTNode('String')) == 'other String'
+
+
+def test_write_ast_streams_the_repr():
+    ast = CompilationSession("Kaam f(Ginti n) Wapis Ginti { Wapis n; } Dikhao f(2);").ast()
+    out = io.StringIO()
+    write_ast(ast, out)
+    assert out.getvalue() == repr(ast)
\ No newline at end of file
@@ -0,0 +1,71 @@
+import json
+import pytest
+import batch
+
+SOURCES = {
+    'ok.txt': "Rakho Ginti a = 2; Dikhao a * 3;",
+    'syntax.txt': "Rakho Ginti = 2;",
+    'semantic.txt': "Dikhao missing;",
+    'lexer.txt': "Dikhao @;",
+}
+STATUSES = {'ok.txt': 'ok', 'syntax.txt': 'syntax error', 'semantic.txt': 'semantic error',
+            'lexer.txt': 'lexer error', 'absent.txt': 'error'}
+
+# Slow enough that a short timeout always interrupts it
+SLOW = "Rakho Ginti a = 0;\n" + "a = a + 1;\n" * 20000
+
+
+def write(directory, sources):
+    for name, source in sources.items():
+        (directory / name).write_text(source, encoding='utf-8')
+
+
+def without_times(results):
+    return [{key: value for key, value in result.items() if key != 'seconds'} for result in results]
+
+
+@pytest.mark.parametrize('jobs', [1, 2])
+def test_results_come_back_in_input_order(tmp_path, jobs):
+    write(tmp_path, SOURCES)
+    names = ['semantic.txt', 'absent.txt', 'ok.txt', 'lexer.txt', 'syntax.txt'] * 3
+    results = list(batch.compile_files([str(tmp_path / name) for name in names], jobs=jobs))
+    assert [result['file'] for result in results] == [str(tmp_path / name) for name in names]
+    assert [result['status'] for result in results] == [STATUSES[name] for name in names]
+    assert without_times(results) == without_times(map(batch.compile_file, (str(tmp_path / name) for name in names)))
+
+
+@pytest.mark.parametrize('jobs', [1, 2])
+def test_slow_file_times_out_without_stopping_the_batch(tmp_path, jobs):
+    write(tmp_path, {'ok.txt': SOURCES['ok.txt'], 'slow.txt': SLOW})
+    paths = [str(tmp_path / 'slow.txt'), str(tmp_path / 'ok.txt')]
+    slow, ok = batch.compile_files(paths, jobs=jobs, timeout=0.05)
+    assert slow['status'] == 'timeout' and slow['seconds'] < 1
+    assert slow['errors'] == [{'message': "Compilation took over 0.05s"}]
+    assert ok['status'] == 'ok' and ok['optimized instructions'] > 0
+
+
+def test_emit_includes_optimized_tac(tmp_path):
+    write(tmp_path, SOURCES)
+    result = batch.compile_file(str(tmp_path / 'ok.txt'), emit=True)
+    assert result['tac'] and len(result['tac']) == result['optimized instructions']
+
+
+def test_expand_walks_directories_once_in_order(tmp_path):
+    write(tmp_path, SOURCES)
+    (tmp_path / 'sub').mkdir()
+    write(tmp_path / 'sub', {'inner.txt': SOURCES['ok.txt']})
+    (tmp_path / 'notes.md').write_text("not a program")
+    paths = batch.expand([str(tmp_path / 'ok.txt'), str(tmp_path), str(tmp_path / '*.txt')])
+    assert paths == [str(tmp_path / name) for name in
+                     ['ok.txt', 'lexer.txt', 'semantic.txt', 'sub/inner.txt', 'syntax.txt']]
+
+
+def test_main_prints_one_json_line_per_file(tmp_path, capsys):
+    write(tmp_path, SOURCES)
+    assert batch.main([str(tmp_path / 'ok.txt'), '-j', '1']) == 0
+    assert batch.main([str(tmp_path), '-j', '1']) == 1
+    out, err = capsys.readouterr()
+    statuses = [json.loads(line)['status'] for line in out.splitlines()]
+    assert statuses == ['ok', 'lexer error', 'ok', 'semantic error', 'syntax error']
+    assert json.loads(err.splitlines()[-1])['summary']['statuses'] == {
+        'ok': 1, 'lexer error': 1, 'semantic error': 1, 'syntax error': 1}
\ No newline at end of file
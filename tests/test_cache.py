@@ -0,0 +1,67 @@
+import os
+import subprocess
+import sys
+import pytest
+import batch
+from cache import CompilationCache, COMPILER_FILES, MISSING
+from serialize import dumps_tac, dumps_ast, loads, FormatError
+from pipeline import CompilationSession
+
+SOURCE = "Rakho Ginti a = 1; Kaam f(Ginti n) Wapis Ginti { Wapis n * 2; } Dikhao f(a);"
+
+
+def test_fingerprint_covers_every_compiler_module():
+    # A fresh interpreter, so only what the batch compiler itself imports is listed
+    root = os.path.dirname(os.path.abspath(batch.__file__))
+    listing = subprocess.run(
+        [sys.executable, '-c', "import os, sys, batch; print('\\n'.join(os.path.abspath(m.__file__) "
+         "for m in list(sys.modules.values()) if getattr(m, '__file__', None)))"],
+        cwd=root, capture_output=True, text=True, check=True).stdout.split('\n')
+    imported = {os.path.basename(path) for path in listing if os.path.dirname(path) == root}
+    assert imported - {'batch.py', 'cache.py'} <= set(COMPILER_FILES)
+
+
+def corruptions(data):
+    """Truncations and single-byte changes at every position"""
+    for end in range(len(data)):
+        yield data[:end]
+    for position in range(len(data)):
+        for byte in (0x00, 0x7f, 0xff):
+            if data[position] != byte:
+                yield data[:position] + bytes([byte]) + data[position + 1:]
+
+
+@pytest.mark.parametrize('stage', ['ast', 'tac'])
+def test_corrupt_artifact_is_missing(tmp_path, stage):
+    session = CompilationSession(SOURCE)
+    value = session.ast() if stage == 'ast' else session.tac()
+    cache = CompilationCache(str(tmp_path), fingerprint='test')
+    key = cache.key(SOURCE)
+    cache.put(key, stage, value)
+    path = cache.path(key, stage)
+    with open(path, 'rb') as f:
+        data = f.read()
+    for corrupt in corruptions(data):
+        with open(path, 'wb') as f:
+            f.write(corrupt)
+        assert cache.get(key, stage) is MISSING
+
+
+def test_artifact_sections_are_bounds_checked():
+    data = bytearray(dumps_tac(["LOAD 1 a", "PRINT a"]))
+    data[-1:] = b''
+    with pytest.raises(FormatError):
+        loads(bytes(data))
+    assert list(loads(dumps_ast(CompilationSession(SOURCE).ast())).decode().children)
+
+
+def test_evict_skips_files_being_written(tmp_path):
+    cache = CompilationCache(str(tmp_path), max_bytes=0, fingerprint='test')
+    key = cache.key(SOURCE)
+    cache.put(key, 'tokens', list(range(100)))
+    temporary = os.path.join(os.path.dirname(cache.path(key, 'tokens')), '.tmp-writing')
+    with open(temporary, 'wb') as f:
+        f.write(bytes(1000))
+    cache.evict()
+    assert os.path.exists(temporary)
+    assert cache.get(key, 'tokens') is MISSING
@@ -0,0 +1,57 @@
+import pytest
+from executor import Executor, OP_GOTO, OP_IF_FALSE, OP_NOP
+
+
+def test_labels_resolve_to_instruction_indexes():
+    executor = Executor()
+    executor.load(["LOAD 0 i", "LABEL top", "LT i 3 t0", "IF_FALSE t0 GOTO done",
+                   "ADD i 1 i", "GOTO top", "LABEL done", "PRINT i"])
+    assert executor.labels == {'top': 2, 'done': 7}
+    assert executor.code[1][0] == OP_NOP
+    assert executor.code[3][:3] == (OP_IF_FALSE, executor.slot_names['t0'], 7)
+    assert executor.code[5][:2] == (OP_GOTO, 2)
+
+
+def test_loop_with_arithmetic_and_logic():
+    code = """
+LOAD 0 i
+LOAD 0 total
+LABEL top
+LT i 10 t0
+IF_FALSE t0 GOTO done
+MOD i 3 t1
+EQ t1 0 t2
+GT i 4 t3
+AND t2 t3 t4
+OR t4 Sahi t5
+MUL i 2 t6
+DIV t6 4 t7
+ADD total t7 total
+SUB total 0 total
+ADD i 1 i
+GOTO top
+LABEL done
+PRINT total
+PRINT t4
+PRINT t5
+"""
+    executor = Executor()
+    assert executor.execute_tac(code) == "22.5\nTrue\nTrue"
+    assert executor.memory['i'] == 10
+    # Jumps land after their label, so each pass through the body runs 13 instructions
+    assert executor.executed == 3 + 10 * 13 + 2 + 3
+
+
+def test_unknown_label_is_rejected_at_load():
+    with pytest.raises(ValueError, match="Label nowhere not found"):
+        Executor().load(["GOTO nowhere"])
+
+
+def test_call_arity_is_checked_at_load():
+    with pytest.raises(ValueError, match="expects 1 arguments but got 2"):
+        Executor().load(["FUNC_BEGIN f", "PARAM n", "RETURN n", "FUNC_END f", "ARG 1", "ARG 2", "CALL f t0"])
+
+
+def test_runtime_error_names_the_instruction():
+    with pytest.raises(RuntimeError, match="Error executing 'DIV a 0 t0'"):
+        Executor().execute_tac(["LOAD 1 a", "DIV a 0 t0"])
\ No newline at end of file
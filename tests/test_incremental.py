@@ -0,0 +1,17 @@
+from pipeline import CompilationSession
+
+BEFORE = """Rakho Ginti a = 1;
+Rakho Ginti b = 7;
+Dikhao a;
+Dikhao b;
+"""
+
+
+def test_renamed_declaration_matches_fresh_compile():
+    session = CompilationSession(BEFORE)
+    assert session.output() == "1\n7"
+    after = BEFORE.replace("Rakho Ginti b", "Rakho Ginti c")
+    session.set_source(after)
+    fresh = CompilationSession(after)
+    assert session.semantic_errors() == fresh.semantic_errors()
+    assert session.output() == fresh.output()
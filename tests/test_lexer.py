@@ -0,0 +1,54 @@
+import sys
+import pytest
+from lexer import tokenize, iter_tokens, LexerError
+from parser import Parser
+
+SOURCE = """# Sum of the first n numbers
+Rakho Ginti n = 10;
+Rakho PointWala half = 0.5;
+Rakho Baat label = "sum is";
+Kaam total(Ginti k) Wapis Ginti {
+    Agar (k <= 0 && Sahi) { Wapis 0; }
+    Wapis k + total(k - 1);
+}
+Dikhao label;  Dikhao total(n) * half;
+"""
+
+
+def fields(token):
+    return (token.value, token.type, token.line, token.column)
+
+
+def test_stream_matches_token_list():
+    assert [fields(token) for token in iter_tokens(SOURCE)] == [fields(token) for token in tokenize(SOURCE)]
+
+
+def test_stream_is_lazy_and_reports_position():
+    tokens = iter_tokens("Dikhao 1;\nDikhao @;")
+    assert [next(tokens).value for _ in range(4)] == ['Dikhao', '1', ';', 'Dikhao']
+    with pytest.raises(LexerError, match="Unrecognized token '@' at line 2, column 7"):
+        next(tokens)
+    with pytest.raises(LexerError, match="Unrecognized token '@' at line 2, column 7"):
+        tokenize("Dikhao 1;\nDikhao @;")
+
+
+def test_keywords_and_operators_are_interned():
+    keyword, _, operator, _ = iter_tokens("Rakho x == y")
+    assert keyword.value is sys.intern('Rakho')
+    assert operator.value is sys.intern('==')
+
+
+def test_parser_reads_a_stream_with_bounded_lookahead():
+    buffered = []
+
+    def tokens():
+        for token in iter_tokens(SOURCE):
+            buffered.append(len(parser.stream.buffer))
+            yield token
+
+    parser = Parser(tokens())
+    _, ast = parser.parse()
+    assert not parser.errors
+    assert repr(ast) == repr(Parser(tokenize(SOURCE)).parse()[1])
+    # A new token is only pulled to fill the current one or the one after it
+    assert max(buffered) <= 1
\ No newline at end of file
@@ -0,0 +1,222 @@
+import pytest
+from pipeline import CompilationSession
+from optimizer import Optimizer, PASSES
+from executor import Executor
+from translator import PythonTranslator
+
+LOOP = """
+Rakho Ginti n = 10;
+Rakho Ginti k = 3;
+Rakho Ginti total = 0;
+Rakho Ginti i = 0;
+JabTak (i < n) {
+    total = total + i * 4 + k * 5;
+    i = i + 1;
+}
+Dikhao total;
+Dikhao i;
+"""
+
+FUNCTION = """
+Kaam f(Ginti n, Ginti k) Wapis Ginti {
+    Rakho Ginti total = 0;
+    Rakho Ginti i = 0;
+    JabTak (i < n) {
+        Agar (i % 2 == 0) { total = total + i * 3 + k * 5; } Warna { total = total - 1; }
+        i = i + 1;
+    }
+    Wapis total;
+}
+Kaam fact(Ginti n) Wapis Ginti {
+    Agar (n <= 1) { Wapis 1; }
+    Wapis n * fact(n - 1);
+}
+Dikhao f(10, 3);
+Dikhao f(0, 3);
+Dikhao fact(6);
+"""
+
+GLOBALS = """
+Rakho Ginti count = 0;
+Rakho Ginti step = 2;
+Kaam bump(Ginti k) Wapis Ginti {
+    count = count + k * step;
+    Wapis count;
+}
+Rakho Ginti i = 1;
+JabTak (i <= 4) {
+    Agar (i == 3) { step = 5; }
+    Dikhao bump(i);
+    i = i + 1;
+}
+Dikhao count;
+Rakho Baat s = "a";
+Rakho PointWala x = 1.5;
+JabTak (i < 7) { s = s + "b"; x = x * 2.0; i = i + 1; }
+Dikhao s;
+Dikhao x;
+"""
+
+PROGRAMS = {'loop': LOOP, 'function': FUNCTION, 'globals': GLOBALS}
+
+
+def optimize(source, passes=None):
+    """Unoptimized TAC of source and the optimizer's output for it, as lists of lines"""
+    tac = CompilationSession(source).tac()
+    return tac, Optimizer(list(tac), passes).optimize()
+
+
+def split(code):
+    return [line.split() for line in code]
+
+
+@pytest.mark.parametrize('program', PROGRAMS)
+@pytest.mark.parametrize('passes', [[name] for name in PASSES] + [None], ids=lambda passes: str(passes))
+def test_optimized_output_matches_unoptimized(program, passes):
+    tac, optimized = optimize(PROGRAMS[program], passes)
+    expected = Executor().execute_tac(tac)
+    assert Executor().execute_tac(optimized) == expected
+    assert PythonTranslator.run(optimized) == expected
+
+
+def test_constants_propagate_across_blocks():
+    source = """
+Rakho Ginti x = 4;
+Rakho Ginti y = 0;
+Agar (y < 1) { y = x + 1; } Warna { y = x + 2; }
+Rakho Ginti unused = y * 7;
+Dikhao y + x;
+"""
+    tac, optimized = optimize(source, ['propagate', 'dead_code'])
+    code = split(optimized)
+    assert ['LOAD', '5', 'y'] in code and ['LOAD', '6', 'y'] in code
+    # The paths disagree on y after the branch, so only x is known there
+    assert any(parts[:3] == ['IADD', 'y', '4'] for parts in code)
+    assert not any('unused' in parts for parts in code)
+    assert Executor().execute_tac(optimized) == Executor().execute_tac(tac) == "9"
+
+
+def test_loop_carried_variable_is_not_a_constant():
+    tac, optimized = optimize(LOOP, ['propagate', 'dead_code'])
+    code = split(optimized)
+    assert any(parts[0] == 'ILT' and parts[1] == 'i' for parts in code)
+    assert Executor().execute_tac(optimized) == "330\n10"
+
+def test_sccp_sees_branch_that_never_runs():
+    source = """
+Kaam g(Ginti n) Wapis Ginti {
+    Rakho Ginti x = 1;
+    Rakho Ginti i = 0;
+    JabTak (i < n) {
+        Agar (x != 1) { x = 2; }
+        i = i + 1;
+    }
+    Wapis x * 10;
+}
+Dikhao g(4);
+"""
+    # Plain propagation meets x = 2 from the guarded arm; SCCP never marks that arm executable
+    _, propagated = optimize(source, ['propagate', 'dead_code'])
+    assert ['LOAD', '2', 'x'] in split(propagated)
+    tac, optimized = optimize(source, ['ssa'])
+    code = split(optimized)
+    assert ['RETURN', '10'] in code
+    assert ['LOAD', '2', 'x'] not in code and not any(parts[0] == 'INEQ' for parts in code)
+    assert Executor().execute_tac(optimized) == Executor().execute_tac(tac) == "10"
+
+
+def test_value_numbering_and_dead_branch_removal():
+    source = """
+Kaam f(Ginti a, Ginti b) Wapis Ginti {
+    Rakho Ginti flag = 1;
+    Rakho Ginti r = 0;
+    Agar (flag == 1) { r = a * b; } Warna { r = a - b; }
+    Rakho Ginti again = a * b;
+    Wapis r + again;
+}
+Dikhao f(3, 4);
+"""
+    tac, optimized = optimize(source, ['ssa'])
+    ops = [parts[0] for parts in split(optimized)]
+    assert ops.count('IMUL') == 1
+    assert 'ISUB' not in ops and 'IEQ' not in ops and 'IF_FALSE' not in ops
+    assert Executor().execute_tac(optimized) == Executor().execute_tac(tac) == "24"
+
+
+def loop_body(code):
+    """The instructions from the first label to the jump back to it"""
+    start = next(index for index, parts in enumerate(code) if parts[0] == 'LABEL')
+    end = max(index for index, parts in enumerate(code) if parts == ['GOTO', code[start][1]])
+    return code[start:end + 1]
+
+
+def test_invariant_product_is_hoisted():
+    source = """
+Kaam f(Ginti n, Ginti k) Wapis Ginti {
+    Rakho Ginti total = 0;
+    Rakho Ginti i = 0;
+    JabTak (i < n) {
+        total = total + i + k * 5;
+        i = i + 1;
+    }
+    Wapis total;
+}
+Dikhao f(10, 3);
+"""
+    tac = CompilationSession(source).tac()
+    optimizer = Optimizer(list(tac), ['loops'])
+    code = split(optimizer.optimize())
+    assert optimizer.stats['hoisted'] >= 1
+    assert not any(parts[:2] == ['IMUL', 'k'] for parts in loop_body(code))
+    assert any(parts[:2] == ['IMUL', 'k'] for parts in code)
+    assert Executor().execute_tac(tac) == PythonTranslator.run(optimizer.optimized) == "195"
+
+
+def test_induction_product_is_strength_reduced():
+    tac = CompilationSession(LOOP).tac()
+    optimizer = Optimizer(list(tac), ['propagate', 'dead_code', 'loops'])
+    code = split(optimizer.optimize())
+    assert optimizer.stats['reduced'] == 1
+    assert not any(parts[0] == 'IMUL' for parts in loop_body(code))
+    assert Executor().execute_tac(optimizer.optimized) == "330\n10"
+
+
+def test_unused_induction_variable_is_eliminated():
+    source = LOOP.replace("Dikhao i;", "")
+    optimizer = Optimizer(list(CompilationSession(source).tac()), ['propagate', 'dead_code', 'loops'])
+    code = split(optimizer.optimize())
+    assert optimizer.stats['eliminated'] == 1 and optimizer.stats['compared'] == 1
+    assert not any('i' in parts for parts in loop_body(code))
+    assert Executor().execute_tac(optimizer.optimized) == "330"
+
+
+RETURNS = """
+Kaam f(Ginti p) Wapis Ginti {
+    Rakho Ginti a = p;
+    Rakho Ginti b = a;
+    Agar (b > 2) { Wapis b + 1; Dikhao 99; }
+    Wapis b - 1;
+    Dikhao 98;
+}
+Dikhao f(5);
+Dikhao f(1);
+"""
+
+
+def test_copies_are_forwarded_to_their_source():
+    tac, optimized = optimize(RETURNS, ['copies'])
+    code = split(optimized)
+    assert any(parts[:2] == ['IGT', 'p'] for parts in code)
+    assert not any({'a', 'b'} & set(parts) for parts in code if parts[0] != 'STORE')
+    assert Executor().execute_tac(optimized) == Executor().execute_tac(tac) == "6\n0"
+
+
+def test_code_after_return_is_removed():
+    tac, optimized = optimize(RETURNS, ['unreachable'])
+    code = split(optimized)
+    body = code[:code.index(['FUNC_END', 'f'])]
+    assert not any(parts[0] == 'PRINT' for parts in body)
+    # The label only the removed jump named goes too
+    labels = [parts[1] for parts in code if parts[0] == 'LABEL']
+    assert all(any(parts[-1] == label for parts in code if parts[0] != 'LABEL') for label in labels)
+    assert Executor().execute_tac(optimized) == Executor().execute_tac(tac) == "6\n0"
@@ -0,0 +1,37 @@
+import pytest
+from pipeline import CompilationSession
+from output import generate_output_from_ast
+from output_compiler import compile_output
+
+SUM = """
+Kaam s(Ginti n) Wapis Ginti {{
+    Agar (n == 0) {{ Wapis 0; }}
+    Wapis n + s(n - 1);
+}}
+Dikhao s({n});
+"""
+
+
+def analyzed(source):
+    session = CompilationSession(source)
+    session.analysis()
+    return session.ast()
+
+
+def test_compiled_deep_recursion():
+    ast = analyzed(SUM.format(n=5000))
+    assert compile_output(ast)() == ["12502500"]
+    assert generate_output_from_ast(ast) == "12502500"
+
+
+def test_compiled_deep_expression():
+    ast = analyzed("Dikhao " + "(" * 3000 + "1" + " + 1)" * 3000 + ";")
+    assert compile_output(ast)() == ["3001"]
+
+
+def test_runaway_recursion_fails_like_the_tree_walker():
+    ast = analyzed(SUM.format(n=100000))
+    with pytest.raises(RecursionError):
+        generate_output_from_ast(ast)
+    with pytest.raises(RecursionError):
+        generate_output_from_ast(ast, compiled=True)
@@ -0,0 +1,98 @@
+import pytest
+from lexer import tokenize
+from parser import Parser
+from incremental import IncrementalDocument
+
+PROGRAM = """
+Rakho Ginti n = 3;
+Kaam f(Ginti k, Baat s) Wapis Ginti {
+    JabTak (k > 0 && n != 2) { k = k - 1; }
+    Agar (k < 0) { Wapis 0; } WarnaAgar (k == 0) { Wapis 1; } Warna { Wapis k * (n + 2); }
+}
+Dikhao f(n, "x") - 1;
+"""
+
+MALFORMED = """
+Rakho Ginti = 3;
+Dikhao (1 + ;
+Agar (Sahi { Dikhao 2; }
+Dikhao 4;
+"""
+
+
+def parse(source, build_parse_tree=True):
+    parser = Parser(tokenize(source), build_parse_tree)
+    tree, ast = parser.parse()
+    return tree, ast, parser.errors
+
+
+@pytest.mark.parametrize('source', [PROGRAM, MALFORMED], ids=['valid', 'malformed'])
+def test_ast_only_mode_matches_full_parse(source):
+    tree, ast, errors = parse(source)
+    no_tree, ast_only, errors_only = parse(source, build_parse_tree=False)
+    assert tree is not None and no_tree is None
+    assert repr(ast_only) == repr(ast)
+    assert errors_only == errors
+    assert bool(errors) == (source is MALFORMED)
+
+
+def test_document_builds_its_parse_tree_on_request():
+    document = IncrementalDocument(PROGRAM)
+    tree, ast, _ = parse(PROGRAM)
+    assert document.cached_parse_tree is None
+    assert repr(document.parse_tree) == repr(tree)
+    assert document.parse_tree is document.parse_tree
+    assert repr(document.ast) == repr(ast)
+    edited = PROGRAM.replace("n = 3", "n = 4")
+    document.update_text(edited)
+    assert document.cached_parse_tree is None
+    assert repr(document.parse_tree) == repr(parse(edited)[0])
+
+def shape(node):
+    """An expression AST written with every binary operation parenthesized"""
+    if node.type == 'BinaryOp':
+        left, right = node.children
+        return f"({shape(left)} {node.value} {shape(right)})"
+    return str(node.value)
+
+
+def expression(text, build_parse_tree=True):
+    _, ast, errors = parse(f"Dikhao {text};", build_parse_tree)
+    assert not errors
+    return shape(ast.children[0].children[0])
+
+
+@pytest.mark.parametrize('text, expected', [
+    ("1 + 2 * 3", "(1 + (2 * 3))"),
+    ("1 - 2 - 3", "((1 - 2) - 3)"),
+    ("8 / 4 % 3 * 2", "(((8 / 4) % 3) * 2)"),
+    ("(1 + 2) * 3", "((1 + 2) * 3)"),
+    ("a < b + 1 == c >= d", "((a < (b + 1)) == (c >= d))"),
+    ("a || b && c || d", "((a || (b && c)) || d)"),
+    ("f(1 + 2, (3)) * 4", "(f * 4)"),
+])
+def test_precedence_and_associativity(text, expected):
+    assert expression(text) == expression(text, build_parse_tree=False) == expected
+
+
+def test_deep_parentheses_and_long_chains_do_not_recurse():
+    depth = 20000
+    assert expression("(" * depth + "1" + ")" * depth, build_parse_tree=False) == "1"
+    assert expression("(" * depth + "1" + ")" * depth) == "1"
+    _, ast, _ = parse("Dikhao " + " + ".join(["1"] * depth) + ";", build_parse_tree=False)
+    node, operations = ast.children[0].children[0], 0
+    while node.type == 'BinaryOp':
+        assert node.children[1].type == 'Number'
+        node, operations = node.children[0], operations + 1
+    assert operations == depth - 1
+
+
+@pytest.mark.parametrize('text, message', [
+    ("(1 + 2", "Expected ')', found ';' (Expected ')' after expression)"),
+    ("1 +", "Unexpected expression token ';'"),
+    ("1 2", "Expected ';', found '2' (Expected ';')"),
+])
+def test_malformed_expressions_report_the_first_error(text, message):
+    for build_parse_tree in (True, False):
+        _, _, errors = parse(f"Dikhao {text};", build_parse_tree)
+        assert errors[0]['message'] == message
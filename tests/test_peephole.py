@@ -0,0 +1,48 @@
+from pipeline import CompilationSession
+from peephole import PeepholeOptimizer
+from executor import Executor
+
+
+def rewrite(code, rules=None):
+    """Peephole output for TAC lines, with the rules that fired"""
+    peephole = PeepholeOptimizer(rules)
+    result = peephole.optimize([line.split() for line in code])
+    return [' '.join(parts) for parts in result], peephole.hits
+
+
+def test_compare_and_branch_fuse_in_a_loop():
+    session = CompilationSession("Rakho Ginti i = 0; JabTak (i < 5) { Dikhao i; i = i + 2; }")
+    optimized = session.optimized()
+    ops = [line.split()[0] for line in optimized]
+    assert 'IF_NOT_ILT' in ops and 'IF_FALSE' not in ops and 'ILT' not in ops
+    assert Executor().execute_tac(optimized) == Executor().execute_tac(session.tac()) == "0\n2\n4"
+
+
+def test_comparison_read_again_is_not_fused():
+    code = ["LOAD 1 a", "ILT a 2 t0", "IF_FALSE t0 GOTO L0", "PRINT t0", "LABEL L0"]
+    result, hits = rewrite(code, ['compare_branch'])
+    assert result == code and not hits
+    result, hits = rewrite(code[:3] + ["PRINT a"] + code[4:], ['compare_branch'])
+    assert result == ["LOAD 1 a", "IF_NOT_ILT a 2 GOTO L0", "PRINT a", "LABEL L0"]
+    assert hits == {'compare_branch': 1}
+
+
+def test_store_of_single_use_temp_fuses():
+    code = ["LOAD 1 a", "IADD a 1 t0", "STORE t0 b", "PRINT b"]
+    result, hits = rewrite(code, ['fuse_store'])
+    assert result == ["LOAD 1 a", "IADD a 1 b", "PRINT b"]
+    assert hits == {'fuse_store': 1}
+
+
+def test_jumps_thread_through_label_runs_and_gotos():
+    code = ["GOTO L0", "PRINT a", "LABEL L0", "LABEL L1", "GOTO L2", "PRINT b", "LABEL L2", "PRINT c"]
+    result, hits = rewrite(code)
+    assert result == ["PRINT c"]
+    assert hits['thread_jump'] == 1 and hits['unreachable'] == 2 and hits['dead_label'] == 3
+
+
+def test_untyped_branch_to_next_keeps_its_test():
+    # An untyped comparison can fail at run time, so its branch stays even though it leads nowhere
+    code = ["LOAD 1 a", "LT a 2 t0", "IF_FALSE t0 GOTO L0", "LABEL L0", "PRINT a"]
+    result, _ = rewrite(code)
+    assert result == ["LOAD 1 a", "IF_NOT_LT a 2 GOTO L0", "LABEL L0", "PRINT a"]
\ No newline at end of file
@@ -0,0 +1,59 @@
+import pytest
+from pipeline import CompilationSession
+from lexer import LexerError
+
+SOURCE = """Rakho Ginti a = 4;
+Rakho Ginti b = a * 3;
+Dikhao a + b;
+"""
+
+
+def run_all(session):
+    return session.output(), session.execution(), session.target_execution()
+
+
+def test_each_stage_runs_once():
+    session = CompilationSession(SOURCE)
+    assert run_all(session) == ("16", "16", "16")
+    first = dict(session.computed)
+    assert run_all(session) == ("16", "16", "16")
+    assert session.computed == first
+    assert all(count == 1 for count in first.values())
+    assert {'ast', 'analysis', 'tac', 'optimized', 'target', 'execution', 'target execution', 'output'} <= set(first)
+
+
+def test_unchanged_source_keeps_every_stage():
+    session = CompilationSession(SOURCE)
+    run_all(session)
+    first = dict(session.computed)
+    assert session.set_source(SOURCE) is False
+    run_all(session)
+    assert session.computed == first
+
+
+def test_edit_with_the_same_tac_reuses_later_stages():
+    session = CompilationSession(SOURCE)
+    run_all(session)
+    assert session.set_source("# A comment\n" + SOURCE.replace("a * 3", "a  *  3"))
+    assert run_all(session) == ("16", "16", "16")
+    # The front end and TAC generation rerun; the TAC comes out the same, so nothing after it does
+    assert session.computed['tac'] == session.computed['output'] == 2
+    assert session.computed['optimized'] == session.computed['execution'] == 1
+    assert session.computed['target'] == session.computed['target execution'] == 1
+
+
+def test_edit_that_changes_the_program_reruns_later_stages():
+    session = CompilationSession(SOURCE)
+    run_all(session)
+    session.set_source(SOURCE.replace("a * 3", "a * 5"))
+    assert run_all(session) == ("24", "24", "24")
+    assert session.computed['optimized'] == session.computed['target execution'] == 2
+
+
+def test_lexer_error_leaves_the_session_unchanged():
+    session = CompilationSession(SOURCE)
+    run_all(session)
+    with pytest.raises(LexerError):
+        session.set_source(SOURCE + "Dikhao @;")
+    assert run_all(session) == ("16", "16", "16")
+    assert session.computed['output'] == 1
\ No newline at end of file
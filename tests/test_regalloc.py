@@ -0,0 +1,69 @@
+import pytest
+from pipeline import CompilationSession
+from regalloc import LinearScanAllocator, allocate_registers, regions
+from target import TargetCodeGenerator
+from machine import run_target
+from executor import Executor
+
+PRESSURE = """
+Kaam f(Ginti a, Ginti b, Ginti c, Ginti d) Wapis Ginti {
+    Wapis (a + b) * (c + d) * ((a - c) * (b - d) + (a * d));
+}
+Dikhao f(1, 2, 3, 4);
+"""
+
+LOOPS = """
+Rakho Ginti total = 0;
+Kaam add(Ginti k) Wapis Ginti { total = total + k * k; Wapis total; }
+Rakho Ginti i = 0;
+JabTak (i < 6) {
+    Agar (i % 2 == 0) { Dikhao add(i) + i * 3; } Warna { Dikhao (i + 1) * (i + 2); }
+    i = i + 1;
+}
+Dikhao total;
+"""
+
+
+def registers(count):
+    return [f"r{i}" for i in range(count)]
+
+
+def overlapping(intervals):
+    """Pairs of intervals that are live at once, in the sense the allocator uses"""
+    return [(a, b) for a in intervals for b in intervals
+            if a is not b and a.start < b.end and b.start < a.end]
+
+
+@pytest.mark.parametrize('count', [1, 2, 3])
+def test_overlapping_intervals_get_different_homes(count):
+    instructions = [line.split() for line in CompilationSession(PRESSURE).optimized()]
+    _, region = regions(instructions)[0]
+    allocator = LinearScanAllocator(registers(count))
+    intervals = list(allocator.allocate([instructions[index] for index in region]).values())
+    assert overlapping(intervals)
+    for a, b in overlapping(intervals):
+        assert a.register is None or a.register != b.register
+        assert a.slot is None or a.slot != b.slot
+    assert all((interval.register is None) != (interval.slot is None) for interval in intervals)
+
+
+def test_spills_under_register_pressure():
+    optimized = CompilationSession(PRESSURE).optimized()
+    spilled = {}
+    for count in (1, 2, 8):
+        generator = TargetCodeGenerator(registers(count))
+        assert run_target(generator.generate(optimized)) == "168"
+        spilled[count] = generator.stats['spilled']
+    assert spilled[1] > spilled[2] > 0 == spilled[8]
+
+
+@pytest.mark.parametrize('source', [PRESSURE, LOOPS], ids=['pressure', 'loops'])
+@pytest.mark.parametrize('count', [0, 1, 2, 3, 8])
+def test_allocated_code_matches_unallocated(source, count):
+    session = CompilationSession(source)
+    expected = Executor().execute_tac(session.tac())
+    optimized = session.optimized()
+    assert run_target(TargetCodeGenerator(registers(count)).generate(optimized)) == expected
+    if count:
+        executor = Executor(registers(count))
+        assert executor.execute_tac(allocate_registers(optimized, registers(count))) == expected
\ No newline at end of file
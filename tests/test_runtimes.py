@@ -0,0 +1,166 @@
+from pipeline import CompilationSession
+from output import generate_output_from_ast
+from executor import Executor
+from vm import run_tac
+from translator import PythonTranslator
+from target import TargetCodeGenerator
+from machine import run_target
+
+
+def outputs(source):
+    """Printed output of source under every evaluator and TAC runtime, by runtime name"""
+    session = CompilationSession(source)
+    assert not session.syntax_errors() and not session.semantic_errors()
+    tac, optimized = session.tac(), session.optimized()
+    results = {
+        'tree walker': generate_output_from_ast(session.ast()),
+        'compiled': generate_output_from_ast(session.ast(), compiled=True),
+        'executor': Executor().execute_tac(tac),
+        'executor optimized': Executor().execute_tac(optimized),
+        'vm': run_tac(session.intermediate()),
+        'translator': PythonTranslator.run(tac),
+        'translator optimized': PythonTranslator.run(optimized),
+    }
+    for size in (0, 4):
+        target = TargetCodeGenerator([f"r{i}" for i in range(size)]).generate(optimized)
+        results[f'target machine {size} registers'] = run_target(target)
+    return results
+
+
+def assert_same(source, expected):
+    for runtime, output in outputs(source).items():
+        assert output == expected, runtime
+
+
+def test_function_reads_then_writes_global():
+    assert_same("Rakho Ginti g = 1; Kaam f() Wapis Ginti { g = g + 1; Wapis g; } Dikhao f(); Dikhao g;",
+                "2\n2")
+
+def test_local_declaration_shadows_global():
+    assert_same("Rakho Ginti g = 5; Kaam f(Ginti p) Wapis Ginti { Rakho Ginti g = p; g = g * 2; Wapis g; } "
+                "Dikhao f(3); Dikhao g;",
+                "6\n5")
+
+
+def test_caller_sees_callee_global_write():
+    assert_same("""
+Rakho Ginti count = 0;
+Rakho Ginti total = 10;
+Kaam bump(Ginti k) Wapis Ginti {
+    count = count + k;
+    Wapis count;
+}
+Kaam twice() Wapis Ginti {
+    Rakho Ginti before = count;
+    bump(1);
+    total = total + count - before;
+    bump(2);
+    Wapis count;
+}
+Rakho Ginti i = 0;
+JabTak (i < 3) {
+    twice();
+    i = i + 1;
+}
+Dikhao count;
+Dikhao total;
+Dikhao twice() + count;
+""", "9\n13\n24")
+
+
+def test_recursion_writes_global():
+    assert_same("""
+Rakho Ginti calls = 0;
+Kaam down(Ginti n) Wapis Ginti {
+    calls = calls + 1;
+    Agar (n == 0) { Wapis calls; }
+    Wapis down(n - 1);
+}
+Dikhao down(5);
+Dikhao calls;
+""", "6\n6")
+
+
+def test_loop_in_main_accumulates_through_function():
+    assert_same("""
+Rakho Ginti total = 0;
+Kaam add(Ginti k) Wapis Ginti {
+    total = total + k;
+    Wapis total;
+}
+Rakho Ginti i = 1;
+JabTak (i <= 4) {
+    Dikhao add(i);
+    i = i + 1;
+}
+Dikhao total;
+""", "1\n3\n6\n10\n10")
+
+
+def test_fall_through_returns_none():
+    assert_same("""
+Kaam f(Ginti n) Wapis Ginti { Agar (n > 0) { Wapis n; } }
+Kaam g() { Dikhao 1; Wapis; }
+Dikhao f(0);
+Dikhao f(2);
+Dikhao g();
+""", "None\n2\n1\nNone")
+
+
+def test_integer_division_is_exact():
+    source = "Rakho Ginti a = 7; Rakho Ginti b = 2; Dikhao a / b; Dikhao a / b + 1; Dikhao (a / b) * 2; Dikhao 6 / 2;"
+    assert {line.split()[0] for line in CompilationSession(source).tac()} & {'IDIV', 'IADD', 'IMUL'} == set()
+    assert_same(source, "3.5\n4.5\n7.0\n3.0")
+
+
+def test_block_declaration_shadows_outer_variable():
+    assert_same("Rakho Ginti x = 1; Agar (Sahi) { Rakho Ginti x = 2; Dikhao x; } Dikhao x;", "2\n1")
+
+
+def test_function_local_shadows_global_it_read_first():
+    assert_same("""
+Rakho Ginti x = 1;
+Kaam f() Wapis Ginti {
+    Rakho Ginti y = x;
+    Rakho Ginti x = 10;
+    Wapis x + y;
+}
+Dikhao f();
+Dikhao x;
+""", "11\n1")
+
+
+def test_sibling_blocks_reuse_a_name():
+    assert_same("""
+Rakho Ginti i = 0;
+JabTak (i < 2) {
+    Agar (i == 0) { Rakho Ginti v = 5; Dikhao v; } Warna { Rakho Ginti v = 7; Dikhao v; }
+    i = i + 1;
+}
+""", "5\n7")
+
+
+def test_block_local_and_global_with_one_name_in_a_function():
+    assert_same("Rakho Ginti g = 5; Kaam f() Wapis Ginti { Agar (Sahi) { Rakho Ginti g = 1; g = g + 1; } "
+                "g = g + 100; Wapis g; } Dikhao f(); Dikhao g;",
+                "105\n105")
+
+
+def test_function_writes_shadowing_global_from_a_block():
+    assert_same("Rakho Ginti g = 5; Agar (Sahi) { Rakho Ginti g = 1; Kaam f() Wapis Ginti { g = g + 1; Wapis g; } "
+                "Dikhao f(); Dikhao g; } Dikhao g;",
+                "2\n2\n5")
+
+
+def test_elif_chain():
+    assert_same("""
+Kaam grade(Ginti n) Wapis Baat {
+    Agar (n > 90) { Wapis "A"; } WarnaAgar (n > 75) { Wapis "B"; } WarnaAgar (n > 50) { Wapis "C"; } Warna { Wapis "F"; }
+}
+Rakho Ginti i = 0;
+JabTak (i < 100) {
+    Agar (i % 3 == 0) { Dikhao grade(i); } WarnaAgar (i % 3 == 1) { Dikhao i; }
+    i = i + 17;
+}
+Agar (Ghalat) { Dikhao 1; } WarnaAgar (Ghalat) { Dikhao 2; } WarnaAgar (Sahi) { Dikhao 3; } Warna { Dikhao 4; }
+""", '"F"\n34\n"C"\n85\n3')
@@ -0,0 +1,28 @@
+from pipeline import CompilationSession
+
+
+def errors(source):
+    return [error['message'] for error in CompilationSession(source).semantic_errors()]
+
+
+def test_nested_function_cannot_read_enclosing_local():
+    messages = errors("Kaam f(Ginti a) Wapis Ginti { Kaam g() Wapis Ginti { Wapis a + 1; } Wapis g(); } Dikhao f(1);")
+    assert messages == ["Variable 'a' belongs to an enclosing function; "
+                        "a nested function can only use its own variables and globals"]
+
+
+def test_nested_function_cannot_assign_enclosing_local():
+    assert len(errors("Kaam f() Wapis Ginti { Rakho Ginti a = 1; Kaam g() { a = 2; } g(); Wapis a; }")) == 1
+
+
+def test_nested_function_uses_own_locals_and_globals():
+    assert errors("Rakho Ginti z = 1; Kaam f(Ginti a) Wapis Ginti { "
+                  "Kaam g(Ginti b) Wapis Ginti { z = b + z; Wapis z; } Wapis g(a); } Dikhao f(1);") == []
+
+
+def test_division_is_pointwala():
+    assert errors("Rakho Ginti a = 7; Rakho Ginti b = 2; Rakho PointWala c = a / b; Dikhao c;") == []
+    assert errors("Rakho Ginti a = 7; Rakho Ginti b = 2; Rakho Ginti c = a / b;") == [
+        "Type mismatch: cannot assign PointWala to Ginti"]
+    tac = CompilationSession("Rakho Ginti a = 7; Rakho Ginti b = 2; Dikhao a / b + 1;").tac()
+    assert [line.split()[0] for line in tac if line[0] in 'IF'] == ['FDIV', 'FADD']
@@ -0,0 +1,98 @@
+import pytest
+from my_ast import ColumnarAST
+from pipeline import CompilationSession
+from semantic import SemanticAnalyzer
+from output import generate_output_from_ast
+from serialize import dumps_ast, dumps_tac, loads, load, dump, FormatError
+
+SOURCE = """
+Rakho Ginti a = 1;
+Kaam f(Ginti n) Wapis Ginti { Agar (n > 0) { Wapis n * 2; } Warna { Wapis 0; } }
+JabTak (a < 5) { Dikhao f(a); a = a + 1; }
+Rakho Baat s = "a b  \u00fc";
+Dikhao s;
+Dikhao 2.5;
+"""
+
+
+def test_ast_round_trip():
+    ast = CompilationSession(SOURCE).ast()
+    data = dumps_ast(ast)
+    decoded = loads(data).decode()
+    assert repr(decoded) == repr(ast)
+    assert dumps_ast(decoded) == data
+    # The decoded tree is a fresh one that analysis and evaluation accept
+    analyzer = SemanticAnalyzer()
+    analyzer.analyze(decoded)
+    assert analyzer.errors == []
+    assert generate_output_from_ast(decoded) == CompilationSession(SOURCE).output()
+
+
+def test_deep_ast_round_trip():
+    depth = 5000
+    nested = "Rakho Ginti g = 1;\n" + "Agar (Sahi) {\n" * depth + "Dikhao g;\n" + "}\n" * depth
+    chain = "Dikhao " + " + ".join(["1"] * 20000) + ";"
+    for source in (nested, chain):
+        ast = CompilationSession(source).ast()
+        data = dumps_ast(ast)
+        # Re-encoding the decoded tree reproduces every node, value and position
+        assert dumps_ast(loads(data).decode()) == data
+
+
+def test_tac_round_trip(tmp_path):
+    tac = CompilationSession(SOURCE).tac()
+    view = loads(dumps_tac(tac))
+    assert len(view) == len(tac) and list(view) == tac
+    assert view[-1] == tac[-1] and view[2:5] == tac[2:5]
+    assert any("'" in line for line in view)    # The string literal with spaces comes back whole
+    with pytest.raises(IndexError):
+        view[len(tac)]
+
+    path = tmp_path / "program.tac"
+    dump(tac, path)
+    with load(path) as mapped:
+        assert list(mapped) == tac
+        dump(mapped, tmp_path / "copy.tac")
+    assert (tmp_path / "copy.tac").read_bytes() == path.read_bytes()
+
+
+@pytest.mark.parametrize('data, message', [
+    (b'HPYB', "truncated"),
+    (b'XXXX' + bytes(28), "Not a HindiPython artifact"),
+])
+def test_foreign_bytes_are_rejected(data, message):
+    with pytest.raises(FormatError, match=message):
+        loads(data)
+
+
+def test_backward_sibling_link_is_rejected():
+    columns = ColumnarAST.encode(CompilationSession(SOURCE).ast())
+    last = len(columns) - 1
+    columns.next_sibling[last] = 1
+    with pytest.raises(ValueError):
+        columns.decode()
+
+
+def test_shared_child_is_rejected():
+    columns = ColumnarAST.encode(CompilationSession(SOURCE).ast())
+    assert columns.first_child[1] == 2
+    columns.next_sibling[1] = 2     # Node 2 becomes both the root's second child and node 1's first
+    with pytest.raises(ValueError):
+        columns.decode()
+
+
+def test_unverified_corrupt_link_is_a_format_error():
+    data = bytearray(dumps_ast(CompilationSession(SOURCE).ast()))
+    view = loads(bytes(data), verify=False)
+    offset = view.second + 4 * view.count * 5 + 4 * (view.count - 1)    # Last node's next_sibling
+    view.close()
+    data[offset:offset + 4] = (0).to_bytes(4, 'little')
+    with pytest.raises(FormatError):
+        loads(bytes(data), verify=False).decode()
+
+
+def test_checksum_rejects_changed_payload():
+    data = bytearray(dumps_tac(["LOAD 1 t0", "PRINT t0"]))
+    data[-1] ^= 1
+    with pytest.raises(FormatError, match="checksum"):
+        loads(bytes(data))
@@ -0,0 +1,59 @@
+from semantic import SymbolTable
+from pipeline import CompilationSession
+
+
+def test_inner_binding_shadows_until_its_scope_exits():
+    table = SymbolTable()
+    outer = table.add_symbol('x', 'Ginti')
+    table.enter_scope()
+    assert table.lookup('x', current_scope_only=True) is None
+    inner = table.add_symbol('x', 'Baat')
+    assert table.lookup('x') is inner and inner.scope_level == 1
+    table.enter_scope()
+    table.add_symbol('y', 'Ginti')
+    table.exit_scope()
+    assert table.lookup('y') is None and table.lookup('x') is inner
+    table.exit_scope()
+    assert table.lookup('x') is outer and table.depth == 0
+
+
+def test_rebinding_in_one_scope_is_undone_once():
+    table = SymbolTable()
+    table.enter_scope()
+    table.add_symbol('x', 'Ginti')
+    second = table.add_symbol('x', 'Baat')
+    assert table.lookup('x') is second and table.bindings['x'] == [second]
+    table.exit_scope()
+    assert table.bindings == {}
+
+
+def test_scope_tree_is_kept_only_on_request():
+    table = SymbolTable()
+    table.add_symbol('x', 'Ginti')
+    assert table.root is None and table.display() == ""
+
+    session = CompilationSession('Rakho Ginti x = 1; Kaam f(Ginti n) Wapis Ginti { Rakho Baat x = "s"; Wapis n; } '
+                                 'Agar (Sahi) { Rakho Ginti y = 1; }', retain_scopes=True)
+    assert session.analysis().get_symbol_table_output() == (
+        "Scope Level: 0\n"
+        "  Name: x, Type: Ginti, Scope: 0\n"
+        "  Name: f, Type: function, Scope: 0, Function Params: [('Ginti', 'n')], Returns: Ginti\n"
+        "  Scope Level: 1\n"
+        "    Name: n, Type: Ginti, Scope: 1\n"
+        "    Scope Level: 2\n"
+        "      Name: x, Type: Baat, Scope: 2\n"
+        "  Scope Level: 1\n"
+        "    Name: y, Type: Ginti, Scope: 1\n")
+
+
+def test_names_leave_scope_with_their_block():
+    session = CompilationSession("Agar (Sahi) { Rakho Ginti y = 1; } Dikhao y;")
+    assert [error['message'] for error in session.semantic_errors()] == ["Undeclared variable 'y'"]
+
+
+def test_deeply_nested_blocks_resolve_the_global():
+    depth = 2000
+    source = "Rakho Ginti g = 1;\n" + "Agar (Sahi) { Rakho Ginti v = g;\n" * depth + "Dikhao v + g;\n" + "}\n" * depth
+    session = CompilationSession(source)
+    assert session.semantic_errors() == []
+    assert session.output() == "2"
\ No newline at end of file
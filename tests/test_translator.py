@@ -0,0 +1,66 @@
+import pytest
+from pipeline import CompilationSession
+from translator import PythonTranslator
+from executor import Executor
+
+PROGRAMS = {
+    'loop': """
+Rakho Ginti i = 0;
+Rakho Ginti total = 0;
+JabTak (i < 10) {
+    Agar (i % 2 == 0) { total = total + i; } Warna { total = total - 1; }
+    i = i + 1;
+}
+Dikhao total;
+""",
+    'nested loops': """
+Rakho Ginti i = 0;
+JabTak (i < 3) {
+    Rakho Ginti j = 0;
+    JabTak (j < i) { Dikhao i * 10 + j; j = j + 1; }
+    i = i + 1;
+}
+""",
+    'functions': """
+Rakho Baat name = "x";
+Kaam fib(Ginti n) Wapis Ginti {
+    Agar (n < 2) { Wapis n; }
+    Wapis fib(n - 1) + fib(n - 2);
+}
+Kaam tag(Baat s) Wapis Baat { Wapis s + name; }
+Dikhao fib(12);
+Dikhao tag("a");
+Dikhao 7 / 2;
+""",
+}
+
+
+@pytest.mark.parametrize('program', PROGRAMS)
+def test_translation_matches_executor(program):
+    session = CompilationSession(PROGRAMS[program])
+    for tac in (session.tac(), session.optimized()):
+        assert PythonTranslator.run(tac) == Executor().execute_tac(tac)
+
+
+def test_generator_output_becomes_structured_python():
+    python = PythonTranslator.tac_to_python(CompilationSession(PROGRAMS['loop']).tac())
+    assert "while " in python and "if " in python
+    assert "state = " not in python
+
+
+def test_unstructured_code_falls_back_to_a_state_machine():
+    # The first jump enters the loop in the middle
+    tac = ["LOAD 0 i", "GOTO mid", "LABEL top", "PRINT i", "LABEL mid", "ADD i 1 i", "LT i 3 t0",
+           "IF_FALSE t0 GOTO done", "GOTO top", "LABEL done", "PRINT i"]
+    assert "state = " in PythonTranslator.tac_to_python(tac)
+    assert PythonTranslator.run(tac) == Executor().execute_tac(tac) == "1\n2\n3"
+
+
+def test_unknown_label_is_rejected():
+    with pytest.raises(ValueError, match="Label nowhere not found"):
+        PythonTranslator.tac_to_python(["LABEL top", "GOTO nowhere", "GOTO top"])
+
+
+def test_compiled_code_is_reused_for_identical_tac():
+    tac = CompilationSession("Dikhao 1 + 2;").tac()
+    assert PythonTranslator.compile(tac) is PythonTranslator.compile('\n'.join(tac))
\ No newline at end of file
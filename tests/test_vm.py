@@ -0,0 +1,23 @@
+import pytest
+from pipeline import CompilationSession
+from executor import Executor
+from vm import run_tac, VMError, MAX_CALL_DEPTH
+
+SUM = """
+Kaam s(Ginti n) Wapis Ginti {{
+    Agar (n == 0) {{ Wapis 0; }}
+    Wapis n + s(n - 1);
+}}
+Dikhao s({n});
+"""
+
+
+def test_deep_recursion_matches_executor():
+    session = CompilationSession(SUM.format(n=300))
+    assert run_tac(session.intermediate()) == Executor().execute_tac(session.tac()) == "45150"
+
+
+def test_call_depth_limit():
+    session = CompilationSession(SUM.format(n=MAX_CALL_DEPTH + 10))
+    with pytest.raises(VMError, match="Maximum call depth"):
+        run_tac(session.intermediate())
\ No newline at end of file
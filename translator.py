@@ -1,46 +1,361 @@
+import hashlib
+from collections import OrderedDict
+from executor import split_instruction, parse_literal, is_literal, written_name
+from opcodes import TYPED_OPS, BRANCH_OPS, CONDITIONAL_JUMPS
+from vm import TEMP_PATTERN
+
+BINARY_OPERATORS = {
+    'ADD': '{} + {}', 'SUB': '{} - {}', 'MUL': '{} * {}', 'DIV': '{} / {}', 'MOD': '{} % {}',
+    'AND': '{} and {}', 'OR': '{} or {}',
+    'EQ': '{} == {}', 'NEQ': '{} != {}', 'LT': '{} < {}', 'LTE': '{} <= {}',
+    'GT': '{} > {}', 'GTE': '{} >= {}',
+}
+BINARY_OPERATORS.update({typed: BINARY_OPERATORS[op] for typed, op in TYPED_OPS.items()})
+
+JUMPS = {'GOTO', 'LABEL'} | CONDITIONAL_JUMPS
+
+
+class Unstructured(Exception):
+    """Control flow that does not match the generator's if/else and while shapes"""
+
+
+class FunctionTranslation:
+    """Python source for one FUNC_BEGIN ... FUNC_END region, or the main program"""
+
+    def __init__(self, unit, name, params, body, shared=()):
+        self.unit = unit
+        self.name = name
+        self.params = params
+        self.shared = shared    # Globals the function assigns, declared by GLOBAL
+        self.body = body
+        self.labels = {parts[1]: i for i, parts in enumerate(body) if parts[0] == 'LABEL'}
+        self.references = {}    # Label -> indexes of the jumps to it, in order
+        for i, parts in enumerate(body):
+            if parts[0] in JUMPS and parts[0] != 'LABEL':
+                self.references.setdefault(parts[-1], []).append(i)
+        self.pending_args = []
+
+    def translate(self, indent):
+        if self.name is None:
+            header = []
+        else:
+            params = ', '.join(self.unit.variable(p) for p in self.params)
+            header = [f"{indent}def {self.unit.function(self.name)}({params}):"]
+            indent += "    "
+            if self.shared:
+                # Main program variables are locals of execute(), which encloses every function
+                header.append(f"{indent}nonlocal {', '.join(self.unit.variable(name) for name in self.shared)}")
+        try:
+            lines = self.structured(0, len(self.body), indent)
+        except Unstructured:
+            lines = self.state_machine(indent)
+        if not lines or not lines[-1].startswith(f"{indent}return"):
+            lines.append(f"{indent}{self.return_statement(None)}")
+        return header + lines
+
+    def return_statement(self, value):
+        if self.name is None:
+            return "return '\\n'.join(output)"
+        return f"return {value}"
+
+    def structured(self, start, end, indent, follow=None, head=None):
+        """Rebuild if/else and while statements from the generator's label patterns.
+
+        Leaving the region [start, end) goes on at body[end], or jumps to
+        follow when that is given; head is the label of the innermost
+        enclosing loop, which a jump turns into continue.
+        """
+        lines = []
+        body = self.body
+        i = start
+        while i < end:
+            parts = body[i]
+            op = parts[0]
+
+            if op == 'LABEL' and self.loop_end(i, end) is not None:
+                # LABEL start; [GOTO cond; LABEL cond;] <cond>; jump out; <body>; GOTO start
+                start_label = parts[1]
+                j = i + 1
+                if (j + 1 < end and body[j][0] == 'GOTO' and body[j + 1] == ['LABEL', body[j][1]]):
+                    j += 2
+                condition_start = j
+                while j < end and body[j][0] not in JUMPS:
+                    j += 1
+                back = self.loop_end(i, end)
+                if (j >= back or body[j][0] not in CONDITIONAL_JUMPS
+                        or not self.reaches(body[j][-1], back + 1, end, follow)):
+                    raise Unstructured()
+                lines.append(f"{indent}while True:")
+                lines.extend(self.straight(condition_start, j, indent + "    "))
+                lines.append(f"{indent}    if not {self.condition(body[j])}:")
+                lines.append(f"{indent}        break")
+                lines.extend(self.structured(j + 1, back, indent + "    ", start_label, start_label))
+                i = back + 1
+
+            elif op == 'LABEL':
+                # Every jump here came from code already translated
+                if any(index > i for index in self.references.get(parts[1], ())):
+                    raise Unstructured()
+                i += 1
+
+            elif op in CONDITIONAL_JUMPS and parts[-1] == head:
+                lines.append(f"{indent}if not {self.condition(parts)}:")
+                lines.append(f"{indent}    continue")
+                i += 1
+
+            elif op in CONDITIONAL_JUMPS:
+                # jump else; <then>; [GOTO end; LABEL else; <else>;] LABEL end
+                else_index = self.labels.get(parts[-1])
+                if else_index is None:
+                    raise ValueError(f"Label {parts[-1]} not found")
+                if else_index <= i:
+                    raise Unstructured()
+                if else_index > end:
+                    if not self.reaches(parts[-1], end, end, follow):
+                        raise Unstructured()
+                    else_index = end
+                lines.append(f"{indent}if {self.condition(parts)}:")
+                last = body[else_index - 1]
+                end_index = self.labels.get(last[1]) if last[0] == 'GOTO' and else_index < end else None
+                if end_index is not None and end_index > else_index and (
+                        end_index <= end or self.reaches(last[1], end, end, follow)):
+                    # if/else: both branches meet at the end label
+                    end_index = min(end_index, end)
+                    lines.extend(self.structured(i + 1, else_index - 1, indent + "    ", last[1], head)
+                                 or [f"{indent}    pass"])
+                    else_lines = self.structured(else_index, end_index, indent + "    ",
+                                                 follow if end_index == end else None, head)
+                    if else_lines:
+                        lines.append(f"{indent}else:")
+                        lines.extend(else_lines)
+                    i = end_index
+                else:
+                    then_follow = follow if else_index == end else None
+                    lines.extend(self.structured(i + 1, else_index, indent + "    ", then_follow, head)
+                                 or [f"{indent}    pass"])
+                    i = else_index
+
+            elif op == 'GOTO' and self.reaches(parts[1], i + 1, end, follow):
+                i += 1
+            elif op == 'GOTO' and parts[1] == head:
+                lines.append(f"{indent}continue")
+                i += 1
+            elif op in JUMPS:
+                raise Unstructured()
+            else:
+                lines.extend(self.statement(parts, indent))
+                i += 1
+        return lines
+
+    def loop_end(self, i, end):
+        """Index of the last GOTO back to the label at i within the region, or None"""
+        later = [index for index in self.references.get(self.body[i][1], ()) if index > i]
+        if later and later[-1] < end and self.body[later[-1]][0] == 'GOTO':
+            return later[-1]
+        return None
+
+    def reaches(self, label, position, end, follow):
+        """Whether jumping to label does the same as going on at position in the region [position, end)"""
+        index = self.labels.get(label)
+        if index is None:
+            raise ValueError(f"Label {label} not found")
+        body = self.body
+        if position <= index and all(parts[0] == 'LABEL' for parts in body[position:index]):
+            return True
+        if all(parts[0] == 'LABEL' for parts in body[position:end]):
+            if follow is not None:
+                return label == follow
+            return end <= index and all(parts[0] == 'LABEL' for parts in body[end:index])
+        return False
+
+    def condition(self, parts):
+        """Python test a conditional jump falls through on"""
+        if parts[0] == 'IF_FALSE':
+            return self.operand(parts[1])
+        expression = BINARY_OPERATORS[BRANCH_OPS[parts[0]]]
+        return f"({expression.format(self.operand(parts[1]), self.operand(parts[2]))})"
+
+    def straight(self, start, end, indent):
+        lines = []
+        for parts in self.body[start:end]:
+            lines.extend(self.statement(parts, indent))
+        return lines
+
+    def state_machine(self, indent):
+        """Fallback: one state per basic block inside a dispatch loop"""
+        blocks = [[]]
+        block_of_label = {}
+        for parts in self.body:
+            if parts[0] == 'LABEL':
+                if blocks[-1]:
+                    blocks.append([])
+                block_of_label[parts[1]] = len(blocks) - 1
+            else:
+                blocks[-1].append(parts)
+                if parts[0] in JUMPS or parts[0] == 'RETURN':
+                    blocks.append([])
+
+        def target(label):
+            if label not in block_of_label:
+                raise ValueError(f"Label {label} not found")
+            return block_of_label[label]
+
+        lines = [f"{indent}state = 0", f"{indent}while True:"]
+        inner = indent + "        "
+        for number, block in enumerate(blocks):
+            keyword = "if" if number == 0 else "elif"
+            lines.append(f"{indent}    {keyword} state == {number}:")
+            ends_with_jump = False
+            for parts in block:
+                op = parts[0]
+                if op == 'GOTO':
+                    lines.append(f"{inner}state = {target(parts[1])}")
+                    ends_with_jump = True
+                elif op in CONDITIONAL_JUMPS:
+                    lines.append(f"{inner}state = {number + 1} if {self.condition(parts)} "
+                                 f"else {target(parts[-1])}")
+                    ends_with_jump = True
+                else:
+                    lines.extend(self.statement(parts, inner))
+                    ends_with_jump = op == 'RETURN'
+            if not ends_with_jump:
+                if number + 1 < len(blocks):
+                    lines.append(f"{inner}state = {number + 1}")
+                else:
+                    lines.append(f"{inner}{self.return_statement(None)}")
+        return lines
+
+    def statement(self, parts, indent):
+        op = parts[0]
+        if op == 'LOAD':
+            value = parse_literal(parts[1])
+            return [f"{indent}{self.unit.variable(parts[2])} = {value!r}"]
+        elif op == 'STORE':
+            return [f"{indent}{self.unit.variable(parts[2])} = {self.operand(parts[1])}"]
+        elif op in BINARY_OPERATORS:
+            expression = BINARY_OPERATORS[op].format(self.operand(parts[1]), self.operand(parts[2]))
+            return [f"{indent}{self.unit.variable(parts[3])} = {expression}"]
+        elif op == 'PRINT':
+            if parts[1] in self.unit.strings:
+                return [f"{indent}output.append({self.operand(parts[1])})"]
+            return [f"{indent}output.append(str({self.operand(parts[1])}))"]
+        elif op == 'ARG':
+            self.pending_args.append(self.operand(parts[1]))
+            return []
+        elif op == 'CALL':
+            if parts[1] not in self.unit.functions:
+                raise ValueError(f"Function {parts[1]} not found")
+            args = ', '.join(self.pending_args)
+            self.pending_args = []
+            call = f"{self.unit.function(parts[1])}({args})"
+            if len(parts) > 2:
+                return [f"{indent}{self.unit.variable(parts[2])} = {call}"]
+            return [f"{indent}{call}"]
+        elif op == 'RETURN':
+            value = self.operand(parts[1]) if len(parts) > 1 else None
+            return [f"{indent}{self.return_statement(value)}"]
+        return []
+
+    def operand(self, name):
+        if is_literal(name):
+            return repr(parse_literal(name))
+        return self.unit.variable(name)
+
+
+class TranslationUnit:
+    """Translates a whole TAC program into the source of an execute() function"""
+
+    def __init__(self, tac_code):
+        lines = tac_code.split('\n') if isinstance(tac_code, str) else tac_code
+        instructions = [split_instruction(line) for line in lines if line.strip()]
+        self.names = set()
+        self.functions = {}
+        self.main = []
+        self.strings = self.string_temps(instructions)
+
+        stack = []
+        for parts in instructions:
+            op = parts[0]
+            if op == 'FUNC_BEGIN':
+                stack.append((parts[1], [], [], []))
+            elif op == 'FUNC_END':
+                name, params, shared, body = stack.pop()
+                self.functions[name] = (params, shared, body)
+            elif stack and op == 'PARAM':
+                stack[-1][1].append(parts[1])
+            elif stack and op == 'GLOBAL':
+                stack[-1][2].append(parts[1])
+            elif stack:
+                stack[-1][3].append(parts)
+            else:
+                self.main.append(parts)
+
+    @staticmethod
+    def string_temps(instructions):
+        """Temps whose every definition is a Baat value, so printing them needs no str()"""
+        strings = set()
+        others = set()
+        for parts in instructions:
+            dest = written_name(parts)
+            if dest is None or not TEMP_PATTERN.match(dest):
+                continue
+            if parts[0] == 'SCONCAT' or (parts[0] == 'LOAD' and parts[1].startswith("'")):
+                strings.add(dest)
+            else:
+                others.add(dest)
+        return strings - others
+
+    def variable(self, name):
+        self.names.add(name)
+        base, _, suffix = name.partition('.')
+        # A renamed shadowing declaration such as x.1 becomes s1_x, which no source name maps onto
+        return f"s{suffix}_{base}" if suffix else f"v_{name}"
+
+    def function(self, name):
+        return f"f_{name}"
+
+    def translate(self):
+        body = ["def execute():", "    output = []"]
+        for name, (params, shared, instructions) in self.functions.items():
+            body.extend(FunctionTranslation(self, name, params, instructions, shared).translate("    "))
+        main = FunctionTranslation(self, None, [], self.main).translate("    ")
+
+        # Variables read before any assignment evaluate to themselves, as in the Executor
+        body.extend(f"    {self.variable(name)} = {name!r}" for name in sorted(self.names)
+                    if not TEMP_PATTERN.match(name))
+        body.extend(main)
+        body.append("result = execute()")
+        return '\n'.join(body)
+
+
 class PythonTranslator:
+    _cache = OrderedDict()  # sha256 of TAC text -> code object
+    CACHE_SIZE = 64
+
     @staticmethod
     def tac_to_python(tac_code):
         """Convert TAC to executable Python code"""
-        python_code = [
-            "def execute():",
-            "    memory = {}",
-            "    output = []"
-        ]
-        
-        for line in tac_code.split('\n'):
-            if not line.strip():
-                continue
-                
-            parts = line.split()
-            op = parts[0]
-            
-            if op == "STORE":
-                python_code.append(f"    memory['{parts[2]}'] = memory.get('{parts[1]}', {parts[1]})")
-                
-            elif op == "LOAD":
-                value = parts[1]
-                if value.replace('.','',1).isdigit():
-                    python_code.append(f"    memory['{parts[2]}'] = {value}")
-                else:
-                    python_code.append(f"    memory['{parts[2]}'] = '{value.strip("'")}'")
-                    
-            elif op == "ADD":
-                python_code.append(
-                    f"    memory['{parts[3]}'] = "
-                    f"memory.get('{parts[1]}', {parts[1]}) + "
-                    f"memory.get('{parts[2]}', {parts[2]})"
-                )
-                
-            elif op == "PRINT":
-                python_code.append(f"    output.append(str(memory.get('{parts[1]}', '{parts[1]}')))")
-                
-            elif op == "IF_FALSE":
-                python_code.append(f"    if not memory.get('{parts[1]}', {parts[1]}):")
-                python_code.append(f"        pass  # GOTO {parts[3]} implementation needed")
-                
-            # Add other operations as needed...
-        
-        python_code.append("    return '\\n'.join(output)")
-        python_code.append("result = execute()")
-        return '\n'.join(python_code)
\ No newline at end of file
+        return TranslationUnit(tac_code).translate()
+
+    @staticmethod
+    def compile(tac_code):
+        """Translate and compile TAC, reusing the code object for identical TAC"""
+        text = tac_code if isinstance(tac_code, str) else '\n'.join(tac_code)
+        key = hashlib.sha256(text.encode('utf-8')).hexdigest()
+        cache = PythonTranslator._cache
+        if key in cache:
+            cache.move_to_end(key)
+            return cache[key]
+
+        code = compile(PythonTranslator.tac_to_python(text), '<tac>', 'exec')
+        cache[key] = code
+        if len(cache) > PythonTranslator.CACHE_SIZE:
+            cache.popitem(last=False)
+        return code
+
+    @staticmethod
+    def run(tac_code):
+        """Run compiled TAC and return its printed output"""
+        namespace = {}
+        exec(PythonTranslator.compile(tac_code), namespace)
+        return namespace['result']
\ No newline at end of file
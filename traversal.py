@@ -0,0 +1,99 @@
+from types import GeneratorType
+
+MAX_DEPTH = 100000  # Nested visits before walk gives up, in place of Python's recursion limit
+
+
+def walk(table, node, max_depth=MAX_DEPTH):
+    """Run a kind-indexed table of visitor methods over node on an explicit stack.
+
+    A visitor method is either a plain function, whose return value is the
+    result, or a generator that yields child nodes and is sent back each
+    child's result; its return value is its own result. Exceptions raised by
+    a child are thrown into the parent generator, as a recursive call would.
+    """
+    result = table[node.kind](node)
+    if type(result) is not GeneratorType:
+        return result
+
+    stack = [result]
+    value = None
+    error = None
+    while stack:
+        try:
+            if error is None:
+                child = stack[-1].send(value)
+            else:
+                pending, error = error, None
+                child = stack[-1].throw(pending)
+        except StopIteration as stop:
+            stack.pop()
+            value = stop.value
+            continue
+        except Exception as e:
+            stack.pop()
+            if not stack:
+                raise
+            error = e
+            continue
+
+        try:
+            result = table[child.kind](child)
+        except Exception as e:
+            error = e
+            continue
+        if type(result) is GeneratorType:
+            if len(stack) >= max_depth:
+                result.close()
+                error = RecursionError("maximum AST nesting depth exceeded")
+                continue
+            stack.append(result)
+            value = None
+        else:
+            value = result
+    return value
+
+
+def run(generator, max_depth=MAX_DEPTH):
+    """Drive a generator that yields sub-generators, sending each one's return value back"""
+    stack = [generator]
+    value = None
+    error = None
+    while stack:
+        try:
+            if error is None:
+                child = stack[-1].send(value)
+            else:
+                pending, error = error, None
+                child = stack[-1].throw(pending)
+        except StopIteration as stop:
+            stack.pop()
+            value = stop.value
+            continue
+        except Exception as e:
+            stack.pop()
+            if not stack:
+                raise
+            error = e
+            continue
+
+        if len(stack) >= max_depth:
+            child.close()
+            error = RecursionError("maximum nesting depth exceeded")
+            continue
+        stack.append(child)
+        value = None
+    return value
+
+
+def dump(root, out, label, level=0):
+    """Write an indented tree, one label(node) per line, to a file-like object"""
+    write = out.write
+    stack = [(root, level)]
+    while stack:
+        node, depth = stack.pop()
+        write("  " * depth)
+        write(label(node))
+        write("\n")
+        children = node.children
+        for index in range(len(children) - 1, -1, -1):
+            stack.append((children[index], depth + 1))
\ No newline at end of file
@@ -0,0 +1,532 @@
+import re
+from executor import split_instruction, parse_literal, is_literal, MAX_CALL_DEPTH
+from opcodes import TYPED_OPS, BRANCH_OPS
+
+# Bytecode opcodes. Every instruction is four ints: opcode, a, b, c
+(MOVE, GETG, SETG, ADD, SUB, MUL, DIV, MOD, AND, OR, EQ, NEQ, LT, LTE, GT, GTE,
+ PRINT, JUMP, JUMP_IF_FALSE, BR_EQ, BR_NEQ, BR_LT, BR_LTE, BR_GT, BR_GTE,
+ CALL, RET, RET_NONE) = range(28)
+
+BINARY_OPCODES = {
+    'ADD': ADD, 'SUB': SUB, 'MUL': MUL, 'DIV': DIV, 'MOD': MOD,
+    'AND': AND, 'OR': OR,
+    'EQ': EQ, 'NEQ': NEQ, 'LT': LT, 'LTE': LTE, 'GT': GT, 'GTE': GTE,
+}
+BINARY_OPCODES.update({typed: BINARY_OPCODES[op] for typed, op in TYPED_OPS.items()})
+
+# Comparison followed by IF_FALSE on its result becomes one branch
+BRANCH_OPCODES = {EQ: BR_EQ, NEQ: BR_NEQ, LT: BR_LT, LTE: BR_LTE, GT: BR_GT, GTE: BR_GTE}
+
+TEMP_PATTERN = re.compile(r't\d+$')
+
+RETURN_SLOT = 0
+# Negative pcs a handler returns to leave the dispatch loop
+RETURNING = -1
+CALLING = -2
+
+
+class Function:
+    """Bytecode and frame layout of one FUNC_BEGIN/FUNC_END region (or the main program)"""
+    def __init__(self, name):
+        self.name = name
+        self.code = []          # Flat bytecode, 4 ints per instruction
+        self.source = []        # TAC text per instruction, for error messages
+        self.calls = []         # Per CALL: (function name, [(param slot, arg operand)])
+        self.frame = [None]     # Frame template: return slot, registers, locals, constants
+        self.params = []        # Parameter slots in declaration order
+        self.registers = {}     # Temp name -> slot
+        self.locals = {}        # Variable name -> slot
+        self.shared = set()     # Globals the function assigns, declared by GLOBAL
+        self.constants = {}     # Literal text -> slot
+
+    def new_slot(self, value=None):
+        self.frame.append(value)
+        return len(self.frame) - 1
+
+
+class BytecodeCompiler:
+    """Compiles IntermediateCodeGenerator output into register bytecode"""
+
+    def compile(self, tac_code):
+        lines = tac_code.split('\n') if isinstance(tac_code, str) else tac_code
+        instructions = [split_instruction(line) for line in lines if line.strip()]
+
+        main_body, bodies = self.split_functions(instructions)
+        self.main = Function('main')
+        self.functions = {}
+        self.stores = []    # SETGs to emit after the instruction being compiled
+
+        # Names stored at top level are the globals every function can read
+        for parts in main_body:
+            for name in self.written_names(parts):
+                self.variable_slot(self.main, name)
+
+        for name, (params, shared, body) in bodies.items():
+            function = Function(name)
+            for param in params:
+                slot = self.variable_slot(function, param)
+                function.params.append(slot)
+            function.shared.update(shared)
+            for global_name in shared:
+                self.variable_slot(self.main, global_name)
+            for parts in body:
+                for written in self.written_names(parts):
+                    if written not in function.shared:
+                        self.variable_slot(function, written)
+            self.functions[name] = (function, body)
+
+        self.emit_body(self.main, main_body)
+        for function, body in self.functions.values():
+            self.emit_body(function, body)
+
+        return Program(self.main, {name: f for name, (f, _) in self.functions.items()})
+
+    def split_functions(self, instructions):
+        """Separate FUNC_BEGIN ... FUNC_END regions from the top-level code"""
+        main_body = []
+        bodies = {}
+        stack = []
+        for parts in instructions:
+            op = parts[0]
+            if op == 'FUNC_BEGIN':
+                stack.append((parts[1], [], [], []))
+            elif op == 'FUNC_END':
+                name, params, shared, body = stack.pop()
+                bodies[name] = (params, shared, body)
+            elif stack and op == 'PARAM':
+                stack[-1][1].append(parts[1])
+            elif stack and op == 'GLOBAL':
+                stack[-1][2].append(parts[1])
+            elif stack:
+                stack[-1][3].append(parts)
+            else:
+                main_body.append(parts)
+        return main_body, bodies
+
+    def written_names(self, parts):
+        op = parts[0]
+        if op in ('STORE', 'LOAD'):
+            dest = parts[2]
+        elif op in BINARY_OPCODES or op == 'CALL':
+            dest = parts[-1]
+        else:
+            return []
+        return [] if TEMP_PATTERN.match(dest) else [dest]
+
+    def variable_slot(self, function, name):
+        if name not in function.locals:
+            function.locals[name] = function.new_slot(name)
+        return function.locals[name]
+
+    def operand(self, function, name, prefix):
+        """Resolve an operand to a frame slot, reading globals into a register first"""
+        if TEMP_PATTERN.match(name):
+            if name not in function.registers:
+                function.registers[name] = function.new_slot(name)
+            return function.registers[name]
+        if is_literal(name):
+            return self.constant(function, parse_literal(name), name)
+        if name in function.locals:
+            return function.locals[name]
+        if function is not self.main and name in self.main.locals:
+            register = function.new_slot()
+            prefix.append((GETG, self.main.locals[name], register, 0))
+            return register
+        return self.variable_slot(function, name)
+
+    def constant(self, function, value, key):
+        if key not in function.constants:
+            function.constants[key] = function.new_slot(value)
+        return function.constants[key]
+
+    def destination(self, function, name):
+        """Frame slot an instruction writes name to; a global assigned in a function goes
+        through a register that a following SETG copies out"""
+        if TEMP_PATTERN.match(name):
+            return self.operand(function, name, None)
+        if name in function.shared:
+            register = function.new_slot()
+            self.stores.append((SETG, register, self.main.locals[name], 0))
+            return register
+        return self.variable_slot(function, name)
+
+    def emit_body(self, function, body):
+        uses, definitions = self.count_uses(body)
+        labels = {}
+        pending_jumps = []
+        pending_args = []
+        emitted = []  # (opcode, a, b, c, source text)
+
+        def emit(op, a=0, b=0, c=0, text=''):
+            emitted.append([op, a, b, c, text])
+
+        i = 0
+        while i < len(body):
+            parts = body[i]
+            op = parts[0]
+            text = ' '.join(parts)
+            prefix = []
+
+            if op == 'LABEL':
+                labels[parts[1]] = len(emitted)
+            elif op == 'LOAD':
+                # Literals live in the frame as constants; a temp loaded once is an alias
+                value = parse_literal(parts[1])
+                dest = parts[2]
+                const = self.constant(function, value, parts[1])
+                if (TEMP_PATTERN.match(dest) and definitions.get(dest) == 1
+                        and dest not in function.registers):
+                    function.registers[dest] = const
+                else:
+                    emit(MOVE, const, self.destination(function, dest), 0, text)
+            elif op == 'STORE':
+                src = self.operand(function, parts[1], prefix)
+                for instr in prefix:
+                    emit(*instr, text)
+                emit(MOVE, src, self.destination(function, parts[2]), 0, text)
+            elif op in BINARY_OPCODES:
+                opcode = BINARY_OPCODES[op]
+                a = self.operand(function, parts[1], prefix)
+                b = self.operand(function, parts[2], prefix)
+                for instr in prefix:
+                    emit(*instr, text)
+                dest = parts[3]
+                following = body[i + 1] if i + 1 < len(body) else None
+
+                if (opcode in BRANCH_OPCODES and following and following[0] == 'IF_FALSE'
+                        and following[1] == dest and uses.get(dest) == 1):
+                    emit(BRANCH_OPCODES[opcode], a, b, 0, text + '; ' + ' '.join(following))
+                    pending_jumps.append((len(emitted) - 1, 3, following[3]))
+                    i += 1
+                elif (following and following[0] == 'STORE' and following[1] == dest
+                        and TEMP_PATTERN.match(dest) and uses.get(dest) == 1):
+                    emit(opcode, a, b, self.destination(function, following[2]),
+                         text + '; ' + ' '.join(following))
+                    i += 1
+                else:
+                    emit(opcode, a, b, self.destination(function, dest), text)
+            elif op == 'PRINT':
+                a = self.operand(function, parts[1], prefix)
+                for instr in prefix:
+                    emit(*instr, text)
+                emit(PRINT, a, 0, 0, text)
+            elif op == 'IF_FALSE':
+                a = self.operand(function, parts[1], prefix)
+                for instr in prefix:
+                    emit(*instr, text)
+                emit(JUMP_IF_FALSE, a, 0, 0, text)
+                pending_jumps.append((len(emitted) - 1, 2, parts[3]))
+            elif op in BRANCH_OPS:
+                a = self.operand(function, parts[1], prefix)
+                b = self.operand(function, parts[2], prefix)
+                for instr in prefix:
+                    emit(*instr, text)
+                emit(BRANCH_OPCODES[BINARY_OPCODES[BRANCH_OPS[op]]], a, b, 0, text)
+                pending_jumps.append((len(emitted) - 1, 3, parts[4]))
+            elif op == 'GOTO':
+                emit(JUMP, 0, 0, 0, text)
+                pending_jumps.append((len(emitted) - 1, 1, parts[1]))
+            elif op == 'ARG':
+                pending_args.append(self.operand(function, parts[1], prefix))
+                for instr in prefix:
+                    emit(*instr, text)
+            elif op == 'CALL':
+                name = parts[1]
+                if name not in self.functions:
+                    raise ValueError(f"Function {name} not found")
+                callee = self.functions[name][0]
+                if len(pending_args) != len(callee.params):
+                    raise ValueError(f"Function {name} expects {len(callee.params)} "
+                                     f"arguments but got {len(pending_args)}")
+                function.calls.append((name, list(zip(callee.params, pending_args))))
+                pending_args = []
+                dest = self.destination(function, parts[2]) if len(parts) > 2 else RETURN_SLOT
+                emit(CALL, len(function.calls) - 1, dest, 0, text)
+            elif op == 'RETURN':
+                if len(parts) > 1:
+                    a = self.operand(function, parts[1], prefix)
+                    for instr in prefix:
+                        emit(*instr, text)
+                    emit(RET, a, 0, 0, text)
+                else:
+                    emit(RET_NONE, 0, 0, 0, text)
+            for instr in self.stores:
+                emit(*instr, text)
+            self.stores = []
+            i += 1
+
+        emit(RET_NONE, 0, 0, 0, 'FUNC_END')
+
+        for index, field, label in pending_jumps:
+            if label not in labels:
+                raise ValueError(f"Label {label} not found")
+            emitted[index][field] = labels[label]
+
+        # Thread jumps that land on an unconditional JUMP straight to its target
+        for index, field, _ in pending_jumps:
+            target = emitted[index][field]
+            seen = set()
+            while emitted[target][0] == JUMP and target not in seen:
+                seen.add(target)
+                target = emitted[target][1]
+            emitted[index][field] = target
+
+        for op, a, b, c, text in emitted:
+            function.code.extend((op, a, b, c))
+            function.source.append(text)
+
+    def count_uses(self, body):
+        uses = {}
+        definitions = {}
+        for parts in body:
+            op = parts[0]
+            if op in ('LOAD', 'STORE') or op in BINARY_OPCODES or op == 'CALL':
+                definitions[parts[-1]] = definitions.get(parts[-1], 0) + 1
+            if op in BINARY_OPCODES or op in BRANCH_OPS:
+                names = parts[1:3]
+            elif op in ('STORE', 'PRINT', 'IF_FALSE', 'ARG', 'RETURN'):
+                names = parts[1:2]
+            else:
+                continue
+            for name in names:
+                uses[name] = uses.get(name, 0) + 1
+        return uses, definitions
+
+
+class Program:
+    def __init__(self, main, functions):
+        self.main = main
+        self.functions = functions
+
+
+class VirtualMachine:
+    """Runs compiled bytecode with a table-driven dispatch loop.
+
+    Linking turns each bytecode instruction into a small closure through
+    the HANDLERS table; the dispatch loop then only calls the closure at
+    the current pc, which returns the next pc. A negative pc leaves the
+    loop to return, or to enter the callee a CALL left in pending; calls
+    go on an explicit frame stack, so recursion depth is not bounded by
+    Python's.
+    """
+
+    def __init__(self, program, max_depth=MAX_CALL_DEPTH):
+        self.program = program
+        self.max_depth = max_depth
+        self.output = []
+        self.globals = list(program.main.frame)
+        self.pending = None     # (callee, its frame, return pc, result slot) of the CALL being made
+        self.linked = {}
+
+        functions = dict(program.functions)
+        functions[None] = program.main
+        for name in functions:
+            self.linked[name] = []
+        for name, function in functions.items():
+            self.linked[name].extend(self.link(function))
+
+    def link(self, function):
+        code = function.code
+        ops = []
+        for pc in range(0, len(code), 4):
+            op, a, b, c = code[pc:pc + 4]
+            ops.append(HANDLERS[op](self, function, a, b, c, pc // 4 + 1))
+        return ops
+
+    def run(self):
+        self.output.clear()
+        self.globals[:] = self.program.main.frame
+        linked = self.linked
+        max_depth = self.max_depth
+        function = self.program.main
+        ops = linked[None]
+        frame = self.globals
+        stack = []  # (function, ops, frame, return pc, result slot) of each caller
+        pc = 0
+        try:
+            while True:
+                while pc >= 0:
+                    pc = ops[pc](frame)
+                if pc == CALLING:
+                    callee, new_frame, nxt, dest = self.pending
+                    if len(stack) >= max_depth:
+                        raise VMError(f"Maximum call depth {max_depth} exceeded in '{callee.name}'")
+                    stack.append((function, ops, frame, nxt, dest))
+                    function, ops, frame = callee, linked[callee.name], new_frame
+                    pc = 0
+                    continue
+                if not stack:
+                    break
+                value = frame[RETURN_SLOT]
+                function, ops, frame, pc, dest = stack.pop()
+                frame[dest] = value
+        except VMError:
+            raise
+        except Exception as e:
+            raise VMError(f"Error executing '{function.source[pc]}': {str(e)}")
+        return '\n'.join(self.output)
+
+
+class VMError(RuntimeError):
+    pass
+
+
+def _binary(operation):
+    def factory(vm, function, a, b, c, nxt):
+        def op(r):
+            r[c] = operation(r[a], r[b])
+            return nxt
+        return op
+    return factory
+
+
+def _branch(operation):
+    def factory(vm, function, a, b, target, nxt):
+        def op(r):
+            return nxt if operation(r[a], r[b]) else target
+        return op
+    return factory
+
+
+def _move(vm, function, a, b, c, nxt):
+    def op(r):
+        r[b] = r[a]
+        return nxt
+    return op
+
+
+def _getg(vm, function, a, b, c, nxt):
+    g = vm.globals
+
+    def op(r):
+        r[b] = g[a]
+        return nxt
+    return op
+
+
+def _setg(vm, function, a, b, c, nxt):
+    g = vm.globals
+
+    def op(r):
+        g[b] = r[a]
+        return nxt
+    return op
+
+
+def _add(vm, function, a, b, c, nxt):
+    def op(r):
+        r[c] = r[a] + r[b]
+        return nxt
+    return op
+
+
+def _sub(vm, function, a, b, c, nxt):
+    def op(r):
+        r[c] = r[a] - r[b]
+        return nxt
+    return op
+
+
+def _mul(vm, function, a, b, c, nxt):
+    def op(r):
+        r[c] = r[a] * r[b]
+        return nxt
+    return op
+
+
+def _lt(vm, function, a, b, c, nxt):
+    def op(r):
+        r[c] = r[a] < r[b]
+        return nxt
+    return op
+
+
+def _br_lt(vm, function, a, b, target, nxt):
+    def op(r):
+        return nxt if r[a] < r[b] else target
+    return op
+
+
+def _print(vm, function, a, b, c, nxt):
+    out = vm.output
+
+    def op(r):
+        out.append(str(r[a]))
+        return nxt
+    return op
+
+
+def _jump(vm, function, target, b, c, nxt):
+    def op(r):
+        return target
+    return op
+
+
+def _jump_if_false(vm, function, a, target, c, nxt):
+    def op(r):
+        return nxt if r[a] else target
+    return op
+
+
+def _call(vm, function, index, dest, c, nxt):
+    name, bindings = function.calls[index]
+    callee = vm.program.functions[name]
+    template = callee.frame
+
+    def op(r):
+        frame = template[:]
+        for param, arg in bindings:
+            frame[param] = r[arg]
+        vm.pending = (callee, frame, nxt, dest)
+        return CALLING
+    return op
+
+
+def _ret(vm, function, a, b, c, nxt):
+    def op(r):
+        r[RETURN_SLOT] = r[a]
+        return RETURNING
+    return op
+
+
+def _ret_none(vm, function, a, b, c, nxt):
+    def op(r):
+        return RETURNING
+    return op
+
+
+HANDLERS = [None] * (RET_NONE + 1)
+HANDLERS[MOVE] = _move
+HANDLERS[GETG] = _getg
+HANDLERS[SETG] = _setg
+HANDLERS[ADD] = _add
+HANDLERS[SUB] = _sub
+HANDLERS[MUL] = _mul
+HANDLERS[DIV] = _binary(lambda x, y: x / y)
+HANDLERS[MOD] = _binary(lambda x, y: x % y)
+HANDLERS[AND] = _binary(lambda x, y: x and y)
+HANDLERS[OR] = _binary(lambda x, y: x or y)
+HANDLERS[EQ] = _binary(lambda x, y: x == y)
+HANDLERS[NEQ] = _binary(lambda x, y: x != y)
+HANDLERS[LT] = _lt
+HANDLERS[LTE] = _binary(lambda x, y: x <= y)
+HANDLERS[GT] = _binary(lambda x, y: x > y)
+HANDLERS[GTE] = _binary(lambda x, y: x >= y)
+HANDLERS[PRINT] = _print
+HANDLERS[JUMP] = _jump
+HANDLERS[JUMP_IF_FALSE] = _jump_if_false
+HANDLERS[BR_EQ] = _branch(lambda x, y: x == y)
+HANDLERS[BR_NEQ] = _branch(lambda x, y: x != y)
+HANDLERS[BR_LT] = _br_lt
+HANDLERS[BR_LTE] = _branch(lambda x, y: x <= y)
+HANDLERS[BR_GT] = _branch(lambda x, y: x > y)
+HANDLERS[BR_GTE] = _branch(lambda x, y: x >= y)
+HANDLERS[CALL] = _call
+HANDLERS[RET] = _ret
+HANDLERS[RET_NONE] = _ret_none
+
+
+def run_tac(tac_code):
+    """Compile TAC to bytecode and run it, returning the printed output"""
+    program = BytecodeCompiler().compile(tac_code)
+    return VirtualMachine(program).run()
\ No newline at end of file